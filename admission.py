@@ -0,0 +1,107 @@
+import time
+from collections import OrderedDict
+from threading import BoundedSemaphore, Lock
+
+# Outcomes of AdmissionController.acquire()
+ADMITTED = 'admitted'
+LIMITED = 'limited'  # this user is over their rate
+SHED = 'shed'  # the process is at its concurrency limit
+
+CANNED_REPLIES = {
+    LIMITED: {
+        'en': "You are sending messages faster than we can answer. Please wait a minute and try again.",
+        'hi': "आप बहुत जल्दी-जल्दी संदेश भेज रहे हैं। कृपया एक मिनट रुककर दोबारा प्रयास करें।",
+    },
+    SHED: {
+        'en': "We are receiving a lot of messages right now. Please try again in a few minutes. "
+              "In an emergency call 108.",
+        'hi': "अभी बहुत सारे संदेश आ रहे हैं। कृपया कुछ मिनट बाद दोबारा प्रयास करें। "
+              "आपातकाल में 108 पर कॉल करें।",
+    },
+}
+
+
+class AdmissionController:
+    """Per-user token buckets behind a process-wide concurrency limit.
+
+    Each key refills at rate tokens per second up to burst. Buckets live in
+    an LRU of at most max_users entries; a bucket idle for idle_ttl seconds
+    would be full again anyway, so it is dropped. At most max_concurrency
+    admitted requests run at once; callers must release() each ADMITTED
+    request when it finishes.
+
+    Both limits are per process. Under serve.py each worker keeps its own
+    buckets, so a user spread across WEB_WORKERS workers can send up to
+    WEB_WORKERS times rate; keep-alive clients usually stay on one worker.
+    """
+
+    def __init__(self, rate=20 / 60, burst=10, max_users=100000, idle_ttl=600, max_concurrency=64):
+        self.rate = rate
+        self.burst = burst
+        self.max_users = max_users
+        self.idle_ttl = max(idle_ttl, burst / rate)
+        self._buckets = OrderedDict()  # key -> [tokens, last_refill]
+        self._lock = Lock()
+        self._slots = BoundedSemaphore(max_concurrency)
+        self.admitted = 0
+        self.limited = 0
+        self.shed = 0
+
+    def acquire(self, key, now=None, cost=1):
+        """Take a concurrency slot and cost tokens from key's bucket.
+
+        A cost above burst is admitted once the bucket is full and leaves it
+        in debt, so a large batch is paid for by the requests after it.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.shed += 1
+            return SHED
+
+        try:
+            now = now or time.monotonic()
+            with self._lock:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = self._buckets[key] = [self.burst, now]
+                else:
+                    self._buckets.move_to_end(key)
+                    bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                    bucket[1] = now
+                self._evict(now)
+
+                if bucket[0] >= min(cost, self.burst):
+                    bucket[0] -= cost
+                    self.admitted += 1
+                    return ADMITTED
+                self.limited += 1
+        except BaseException:
+            # e.g. an unhashable key; the slot must not leak
+            self._slots.release()
+            raise
+
+        self._slots.release()
+        return LIMITED
+
+    def release(self):
+        self._slots.release()
+
+    def _evict(self, now):
+        # Oldest first, so stop at the first bucket that is still in use
+        while self._buckets:
+            key, (_, last_refill) = next(iter(self._buckets.items()))
+            if len(self._buckets) <= self.max_users and now - last_refill < self.idle_ttl:
+                break
+            del self._buckets[key]
+
+    def tracked_users(self):
+        with self._lock:
+            return len(self._buckets)
+
+    def stats(self):
+        with self._lock:
+            return {'admitted': self.admitted, 'limited': self.limited, 'shed': self.shed}
+
+
+def canned_reply(decision, language):
+    return CANNED_REPLIES[decision].get(language, CANNED_REPLIES[decision]['en'])
@@ -0,0 +1,182 @@
+import json
+import logging
+import queue
+import threading
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+# Sentinel telling a subscriber's stream to end
+_CLOSED = None
+
+# Most rows one sync() publishes; the rest follow on the next poll
+SYNC_BATCH = 500
+
+
+def stream_capacity(request_threads, requested=None):
+    """How many streams a worker with request_threads threads may hold open.
+
+    An open stream keeps its request thread until the client goes away, so
+    at most requested streams, by default half the threads, and always at
+    least one thread left for everything else.
+    """
+    if requested is None:
+        requested = request_threads // 2
+    return max(0, min(requested, request_threads - 1))
+
+
+def format_event(alert, event='alert'):
+    """Serialize an alert dict as one Server-Sent Events message."""
+    return f"id: {alert['id']}\nevent: {event}\ndata: {json.dumps(alert, default=str)}\n\n"
+
+
+class AlertBroadcaster:
+    """In-process fan-out of new government alerts to SSE subscribers.
+
+    Each subscriber gets a bounded queue. publish() never blocks. A
+    subscriber too slow to keep up is disconnected and can resume with
+    Last-Event-ID. At most max_subscribers streams may be open at once.
+    """
+
+    def __init__(self, max_subscribers=100, queue_size=100):
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self):
+        """Return a queue of alert dicts, or None when the subscriber cap is reached."""
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            subscriber = queue.Queue(maxsize=self.queue_size)
+            self._subscribers.add(subscriber)
+            return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, alert):
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self.published += 1
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(alert)
+            except queue.Full:
+                self._drop(subscriber)
+
+    def _drop(self, subscriber, reason='slow'):
+        self.unsubscribe(subscriber)
+        if reason:
+            self.dropped += 1
+            logger.warning(f"⚠️ Dropping {reason} alert stream subscriber")
+        # Make room for the sentinel so the stream loop wakes up and ends;
+        # a publish that raced the unsubscribe may refill the queue once
+        while True:
+            try:
+                while True:
+                    subscriber.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                subscriber.put_nowait(_CLOSED)
+                return
+            except queue.Full:
+                continue
+
+    def close(self):
+        """End every open stream, e.g. while draining; clients resume elsewhere with Last-Event-ID."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            self._drop(subscriber, reason=None)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+
+class SharedAlertBroadcaster(AlertBroadcaster):
+    """AlertBroadcaster fed from the government_alerts table.
+
+    Alerts may be created by any worker process, so each worker publishes
+    the rows it has not seen yet (by id) to its own subscribers: every
+    poll_interval seconds on the thread start() runs, and whenever sync()
+    is called. PRAGMA data_version makes a poll with no new commits cheap.
+    to_dict turns a row into the alert dict that is sent.
+    """
+
+    def __init__(self, pool, to_dict, poll_interval=1.0, **kwargs):
+        super().__init__(**kwargs)
+        self.pool = pool
+        self.to_dict = to_dict
+        self.poll_interval = poll_interval
+        self._sync_lock = Lock()
+        self._stopped = threading.Event()
+        self._version = pool.data_version()
+        # Streams start with alerts created from now on; Last-Event-ID covers the past
+        self._last_id = pool.fetchone("SELECT COALESCE(MAX(id), 0) FROM government_alerts")[0]
+
+    def sync(self):
+        """Publish alerts committed by any worker since the last sync; return how many."""
+        with self._sync_lock:
+            version = self.pool.data_version()
+            if version == self._version:
+                return 0
+            rows = self.pool.fetchall(
+                "SELECT * FROM government_alerts WHERE id > ? ORDER BY id LIMIT ?",
+                (self._last_id, SYNC_BATCH)
+            )
+            for row in rows:
+                self._last_id = row[0]
+                self.publish(self.to_dict(row))
+            # A full batch leaves rows behind, so the next poll must not skip
+            if len(rows) < SYNC_BATCH:
+                self._version = version
+            return len(rows)
+
+    def start(self):
+        """Run sync() every poll_interval seconds on a daemon thread until stop()."""
+        def loop():
+            while not self._stopped.wait(self.poll_interval):
+                try:
+                    self.sync()
+                except Exception as e:
+                    logger.error(f"❌ Alert stream sync failed: {e}")
+
+        thread = threading.Thread(target=loop, name='alert-stream-sync', daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stopped.set()
+
+
+def stream_alerts(subscriber, backlog, last_id, broadcaster, keepalive=15.0):
+    """Yield SSE text: the backlog after last_id, then live alerts with keepalives."""
+    sent = last_id or 0
+    try:
+        yield "retry: 5000\n\n"
+        for alert in backlog:
+            yield format_event(alert)
+            sent = alert['id']
+        while True:
+            try:
+                alert = subscriber.get(timeout=keepalive)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            if alert is _CLOSED:
+                return
+            # Already delivered from the backlog
+            if alert['id'] <= sent:
+                continue
+            yield format_event(alert)
+            sent = alert['id']
+    finally:
+        broadcaster.unsubscribe(subscriber)
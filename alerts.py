@@ -0,0 +1,260 @@
+import logging
+import threading
+import time
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+NEW = 'NEW'
+ESCALATED = 'ESCALATED'
+RESOLVED = 'RESOLVED'
+# A lower-severity row replaced by an escalation; not counted as an outbreak of its own
+SUPERSEDED = 'SUPERSEDED'
+
+# 'ACTIVE' is the schema default and what rows written before alert
+# lifecycle tracking carry; they are treated as open alerts.
+OPEN_STATUSES = ('ACTIVE', NEW, ESCALATED)
+
+SEVERITY_RANK = {'MEDIUM': 1, 'HIGH': 2}
+
+
+def db_time(now):
+    """now in the format of the timestamp columns, so sweeps and writes share one clock."""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(now))
+
+
+class AlertState:
+    __slots__ = ('alert_id', 'cell_key', 'severity', 'status', 'open_status', 'case_count',
+                 'stored_count', 'last_triggered', 'last_written', 'resolved_at')
+
+    def __init__(self, alert_id, cell_key, severity, status, case_count, now):
+        self.alert_id = alert_id
+        self.cell_key = cell_key
+        self.severity = severity
+        self.status = status
+        self.open_status = status
+        self.case_count = case_count
+        self.stored_count = case_count
+        self.last_triggered = now
+        self.last_written = now
+        self.resolved_at = None
+
+
+class AlertManager:
+    """Per-cell lifecycle for government_alerts rows: NEW -> ESCALATED -> RESOLVED.
+
+    A row is inserted when a cell first crosses the outbreak threshold and
+    again only when its severity goes up, which marks the older row
+    SUPERSEDED. Further reports for an open alert update the row in place,
+    at most once per update_interval. Cells with no report for resolve_after
+    seconds are resolved by sweep(), which start_sweeper() runs on a timer;
+    if they flare up again within cooldown seconds the resolved row is
+    reopened instead of inserting a new one.
+    """
+
+    def __init__(self, pool, cooldown=3600, update_interval=60, resolve_after=6 * 3600,
+                 sweep_interval=300):
+        self.pool = pool
+        self.cooldown = cooldown
+        self.update_interval = update_interval
+        self.resolve_after = resolve_after
+        self.sweep_interval = sweep_interval
+        self._states = {}
+        self._lock = Lock()
+        self._stopped = threading.Event()
+        self._last_sweep = time.time()
+
+    def handle(self, alert, cell_keys=None, now=None):
+        """Apply one outbreak detection and return (alert_id, action).
+
+        action is 'created', 'escalated', 'reopened', 'updated' or 'unchanged';
+        only the first three insert or change the status of a row.
+        cell_keys lists neighbouring cells that belong to the same cluster.
+        """
+        now = now if now is not None else time.time()
+        keys = cell_keys or [alert['location']]
+
+        with self._lock:
+            if now - self._last_sweep >= self.sweep_interval:
+                self._resolve_stale(now)
+
+            state = self._find_state(keys, alert['location'])
+            severity = alert['severity']
+
+            if state is None or (state.status == RESOLVED and now - state.resolved_at >= self.cooldown):
+                state = self._insert(alert, alert['location'], NEW, now)
+                return state.alert_id, 'created'
+
+            state.case_count = max(state.case_count, alert['case_count'])
+            state.last_triggered = now
+
+            if SEVERITY_RANK.get(severity, 0) > SEVERITY_RANK.get(state.severity, 0):
+                state = self._insert(alert, state.cell_key, ESCALATED, now)
+                return state.alert_id, 'escalated'
+
+            if state.status == RESOLVED:
+                state.status = state.open_status
+                state.resolved_at = None
+                self._write_update(state, now, status=True)
+                return state.alert_id, 'reopened'
+
+            # Written even when the count is unchanged: updated_at is what the
+            # sweep in every worker reads to tell a live alert from a stale one
+            if now - state.last_written >= self.update_interval:
+                changed = state.case_count != state.stored_count
+                if not self._write_update(state, now):
+                    return self._follow_row(state, now)
+                if changed:
+                    return state.alert_id, 'updated'
+            return state.alert_id, 'unchanged'
+
+    def _follow_row(self, state, now):
+        """Catch up with a row another worker resolved or superseded since it was loaded."""
+        row = self.pool.fetchone("SELECT status FROM government_alerts WHERE id = ?", (state.alert_id,))
+        if row is not None and row[0] == RESOLVED:
+            # Its sweep saw no reports, but this worker is still getting them
+            self._write_update(state, now, status=True)
+            return state.alert_id, 'reopened'
+
+        del self._states[state.cell_key]
+        fresh = self._load([state.cell_key])
+        if fresh is None:
+            return state.alert_id, 'unchanged'
+        self._states[fresh.cell_key] = fresh
+        fresh.case_count = max(fresh.case_count, state.case_count)
+        fresh.last_triggered = now
+        self._write_update(fresh, now)
+        return fresh.alert_id, 'updated'
+
+    def _find_state(self, keys, cell_key):
+        for key in keys:
+            state = self._states.get(key)
+            if state is not None and state.status != RESOLVED:
+                return state
+        state = self._states.get(cell_key)
+        if state is None:
+            state = self._load(keys)
+            if state is not None:
+                self._states[state.cell_key] = state
+        return state
+
+    def _load(self, keys):
+        placeholders = ','.join('?' * len(keys))
+        row = self.pool.fetchone(f"""
+            SELECT id, cell_key, severity, status, symptoms_count
+            FROM government_alerts
+            WHERE cell_key IN ({placeholders}) AND status IN ({','.join('?' * len(OPEN_STATUSES))})
+            ORDER BY id DESC LIMIT 1
+        """, (*keys, *OPEN_STATUSES))
+        if row is None:
+            return None
+        alert_id, cell_key, severity, status, case_count = row
+        return AlertState(alert_id, cell_key, severity, status, case_count or 0, time.time())
+
+    def _insert(self, alert, cell_key, status, now):
+        with self.pool.transaction() as conn:
+            # Another worker may have opened an alert for this cell already.
+            row = conn.execute("""
+                SELECT id, severity, status FROM government_alerts
+                WHERE cell_key = ? AND status IN (?, ?, ?)
+                ORDER BY id DESC LIMIT 1
+            """, (cell_key, *OPEN_STATUSES)).fetchone()
+            if row is not None and SEVERITY_RANK.get(row[1], 0) >= SEVERITY_RANK.get(alert['severity'], 0):
+                alert_id, status = row[0], row[2]
+            else:
+                conn.execute("""
+                    UPDATE government_alerts SET status = ?, updated_at = ?
+                    WHERE cell_key = ? AND status IN (?, ?, ?)
+                """, (SUPERSEDED, db_time(now), cell_key, *OPEN_STATUSES))
+                alert_id = conn.execute("""
+                    INSERT INTO government_alerts
+                    (alert_type, location, symptoms_count, severity, status, cell_key, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    'OUTBREAK_DETECTED',
+                    f"Lat: {alert['lat']:.4f}, Lng: {alert['lng']:.4f}",
+                    alert['case_count'],
+                    alert['severity'],
+                    status,
+                    cell_key,
+                    db_time(now),
+                )).lastrowid
+
+        state = AlertState(alert_id, cell_key, alert['severity'], status, alert['case_count'], now)
+        self._states[cell_key] = state
+        return state
+
+    def _write_update(self, state, now, status=False):
+        """Store state's count (and status); False if the row is no longer open."""
+        if status:
+            updated = self.pool.execute("""
+                UPDATE government_alerts
+                SET symptoms_count = ?, status = ?, updated_at = ?
+                WHERE id = ?
+            """, (state.case_count, state.status, db_time(now), state.alert_id)).rowcount
+        else:
+            # Another worker may have resolved or superseded the row meanwhile
+            updated = self.pool.execute("""
+                UPDATE government_alerts
+                SET symptoms_count = ?, updated_at = ?
+                WHERE id = ? AND status IN (?, ?, ?)
+            """, (state.case_count, db_time(now), state.alert_id, *OPEN_STATUSES)).rowcount
+        if updated:
+            state.stored_count = state.case_count
+            state.last_written = now
+        return updated > 0
+
+    def sweep(self, now=None):
+        """Resolve alerts whose cells have gone quiet."""
+        now = now if now is not None else time.time()
+        with self._lock:
+            self._resolve_stale(now)
+
+    def start_sweeper(self):
+        """Run sweep() every sweep_interval seconds on a daemon thread until stop()."""
+        def loop():
+            while not self._stopped.wait(self.sweep_interval):
+                try:
+                    self.sweep()
+                except Exception as e:
+                    logger.error(f"❌ Alert sweep failed: {e}")
+
+        thread = threading.Thread(target=loop, name='alert-sweeper', daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stopped.set()
+
+    def _resolve_stale(self, now):
+        self._last_sweep = now
+        # Any worker still seeing reports for a cell keeps its updated_at fresh
+        cutoff = db_time(now - self.resolve_after)
+        for key, state in list(self._states.items()):
+            if state.status == RESOLVED:
+                if now - state.resolved_at >= self.cooldown:
+                    del self._states[key]
+                continue
+            if now - state.last_triggered >= self.resolve_after:
+                # The stored count may be newer than this worker's
+                resolved = self.pool.execute("""
+                    UPDATE government_alerts
+                    SET symptoms_count = MAX(symptoms_count, ?), status = ?, updated_at = ?
+                    WHERE cell_key = ? AND status IN (?, ?, ?) AND COALESCE(updated_at, timestamp) < ?
+                """, (state.case_count, RESOLVED, db_time(now), state.cell_key, *OPEN_STATUSES,
+                      cutoff)).rowcount
+                if not resolved:
+                    continue  # quiet here, but another worker reported the cell since
+                state.status = RESOLVED
+                # The cell went quiet at this point, not when the sweep noticed it
+                state.resolved_at = state.last_triggered + self.resolve_after
+                logger.info(f"✅ Alert resolved for cell {state.cell_key}")
+
+        # Alerts opened by other workers, or before a restart, are not in _states
+        resolved = self.pool.execute("""
+            UPDATE government_alerts
+            SET status = ?, updated_at = ?
+            WHERE status IN (?, ?, ?) AND COALESCE(updated_at, timestamp) < ?
+        """, (RESOLVED, db_time(now), *OPEN_STATUSES, cutoff)).rowcount
+        if resolved:
+            logger.info(f"✅ Resolved {resolved} stale alerts")
@@ -1,44 +1,43 @@
-from flask import Flask, request, jsonify, render_template
-from flask_cors import CORS
-from twilio.twiml.messaging_response import MessagingResponse
+from flask import Blueprint, Flask, request, jsonify, render_template, Response, stream_with_context, g
 import logging
 from datetime import datetime, timedelta
 import re
-import sqlite3
-from collections import defaultdict, Counter
-from threading import Lock
 import os
+import time
+from functools import lru_cache
+from contextlib import ExitStack
+
+from database import ConnectionPool, utc_day_range
+from interaction_writer import start_writer
+from outbreak import SharedOutbreakTracker, coordinates
+from alerts import SUPERSEDED, AlertManager
+from knowledge_base import KB_FILE, open_knowledge_base
+from llm_cache import ResponseCache
+from llm_client import GeminiClient, GuardedLLM, StubClient
+import stats_rollup
+import migrations
+from retention import start_retention_thread
+from alert_stream import SharedAlertBroadcaster, stream_alerts, stream_capacity
+from idempotency import DUPLICATE, IN_FLIGHT, WebhookReceipts
+from admission import ADMITTED, LIMITED, AdmissionController, canned_reply
+from exporter import ExportFilters, export
+from pagination import ConditionalCache, body_etag, fetch_page, parse_page_args, parse_timestamp
+import metrics
+from metrics import stage, timed
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-from google import genai
+# Importing this module only defines things. create_app() builds the Flask app
+# and everything behind it (database pool, writer, outbreak window, LLM), so
+# workers and tools that never serve requests start fast. Accessing app.app,
+# app.db, app.chatbot, ... from outside creates the default app on first use.
+routes = Blueprint('chatbot', __name__)
 
-GEMINI_AVAILABLE = False
-gemini_client = None
-
-api_key = os.environ.get("GEMINI_API_KEY")
-
-if api_key:
-    try:
-        gemini_client = genai.Client(api_key=api_key)
-        GEMINI_AVAILABLE = True
-        logger.info("✅ Gemini AI is ENABLED (new SDK)")
-    except Exception as e:
-        logger.error(f"❌ Gemini init failed: {e}")
-
-
-if gemini_client:
-    logger.info("✅ Gemini AI is ENABLED and ready")
-else:
-    logger.warning("⚠️ Gemini AI is DISABLED — running in rule-only mode")
-
-app = Flask(__name__)
-CORS(app)
-
-
-DATABASE = 'health_chatbot.db'
-db_lock = Lock()
+def messaging_response():
+    # The Twilio SDK is only needed once a webhook arrives
+    from twilio.twiml.messaging_response import MessagingResponse
+    return MessagingResponse()
 
 def html_to_text(html_response):
     """Convert HTML response to plain text for WhatsApp"""
@@ -49,292 +48,287 @@ def html_to_text(html_response):
     return text
 
 def init_db():
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS user_interactions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_phone TEXT,
-            message TEXT,
-            response TEXT,
-            language TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            location_lat REAL,
-            location_lng REAL,
-            symptoms TEXT
-        )
-    """)
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS government_alerts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            alert_type TEXT,
-            location TEXT,
-            symptoms_count INTEGER,
-            severity TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            status TEXT DEFAULT 'ACTIVE'
-        )
-    """)
-
-    conn.commit()
-    conn.close()
-
-init_db()
-
-HEALTH_KNOWLEDGE = {
-    'fever': {
-        'en': {
-            'symptoms': 'High temperature (>100.4°F), chills, sweating, headache, body aches',
-            'treatment': 'Rest, drink plenty of fluids, take paracetamol. Consult doctor if fever persists >3 days or exceeds 102°F',
-            'prevention': 'Maintain good hygiene, avoid crowded places, get adequate sleep'
-        },
-        'hi': {
-            'symptoms': 'तेज बुखार (>100.4°F), कंपकंपी, पसीना, सिरदर्द, शरीर में दर्द',
-            'treatment': 'आराम करें, खूब पानी पिएं, पैरासिटामोल लें। 3 दिन से ज्यादा या 102°F से ज्यादा बुखार हो तो डॉक्टर से मिलें',
-            'prevention': 'स्वच्छता बनाए रखें, भीड़भाड़ से बचें, पर्याप्त नींद लें'
-        }
-    },
-    'cough': {
-        'en': {
-            'symptoms': 'Persistent coughing, throat irritation, phlegm production, chest discomfort',
-            'treatment': 'Warm water gargling, honey, steam inhalation, avoid cold drinks. See doctor if persistent >2 weeks',
-            'prevention': 'Avoid smoking, wear mask in dusty areas, stay hydrated, avoid cold exposure'
-        },
-        'hi': {
-            'symptoms': 'लगातार खांसी, गले में जलन, कफ निकलना, छाती में परेशानी',
-            'treatment': 'गुनगुने पानी से गरारे करें, शहद लें, भाप लें, ठंडा न पिएं। 2 हफ्ते से ज्यादा हो तो डॉक्टर को दिखाएं',
-            'prevention': 'धूम्रपान न करें, धूल भरी जगह मास्क पहनें, पानी पिएं, ठंड से बचें'
-        }
-    },
-    'headache': {
-        'en': {
-            'symptoms': 'Head pain, sensitivity to light/sound, nausea, neck stiffness',
-            'treatment': 'Rest in dark room, apply cold/warm compress, take paracetamol, stay hydrated',
-            'prevention': 'Regular sleep schedule, avoid stress, limit screen time, stay hydrated'
-        },
-        'hi': {
-            'symptoms': 'सिर में दर्द, रोशनी/आवाज से परेशानी, जी मिचलाना, गर्दन में अकड़न',
-            'treatment': 'अंधेरे कमरे में आराम करें, ठंडी/गर्म पट्टी लगाएं, पैरासिटामोल लें, पानी पिएं',
-            'prevention': 'नियमित नींद लें, तनाव से बचें, स्क्रीन टाइम कम करें, पानी पिएं'
-        }
-    },
-    'vaccination': {
-        'en': {
-            'info': 'Visit nearest Primary Health Center (PHC) or Community Health Center (CHC) for vaccination. Carry Aadhar card and vaccination certificate.',
-            'schedule': 'COVID-19: Available for age 18+, Polio: For children under 5 years, Hepatitis B: Birth to 6 months, DPT: 6 weeks to 5 years'
-        },
-        'hi': {
-            'info': 'टीकाकरण के लिए नजदीकी प्राथमिक स्वास्थ्य केंद्र (PHC) या सामुदायिक स्वास्थ्य केंद्र (CHC) जाएं। आधार कार्ड और टीकाकरण प्रमाणपत्र साथ लें।',
-            'schedule': 'कोविड-19: 18+ उम्र के लिए, पोलियो: 5 साल से कम बच्चों के लिए, हेपेटाइटिस बी: जन्म से 6 महीने तक, डीपीटी: 6 सप्ताह से 5 साल तक'
-        }
-    }
+    with db.connection() as conn:
+        migrations.migrate(conn)
+
+    # Rollups start empty when rows were loaded without going through the app
+    with db.transaction() as conn:
+        if stats_rollup.needs_rebuild(conn):
+            stats_rollup.rebuild_rollups(conn)
+
+def update_rollups(conn, batch):
+    # Keep dashboard counters in step with each written batch
+    stats_rollup.apply_rollups(conn, [(row[0], row[3], row[7]) for row in batch])
+
+# Markup per channel: (bold open, bold close, line break)
+CHANNEL_MARKUP = {
+    'web': ('<strong>', '</strong>', '<br>'),
+    'whatsapp': ('**', '**', '\n'),
 }
 
-symptom_clusters = defaultdict(list)
+@lru_cache(maxsize=4096)
+def render_health_response(symptoms, language, channel='web', version=None):
+    """Render the rule-based reply for a symptom tuple; version ties cached replies to the knowledge base content"""
+    b, eb, br = CHANNEL_MARKUP[channel]
+
+    response_parts = []
+    for symptom in symptoms:
+        entry = knowledge.entry(symptom, language)
+        if entry is None:
+            continue
+        heading, sections, labels = entry
+        response_parts.append(f"{b}{heading}:{eb}{br}")
+        for key, text in sections:
+            response_parts.append(f"{labels[key]}: {text}{br}")
+
+    # Add escalation message
+    important = knowledge.label(language, 'important')
+    response_parts.append(f"{br}⚠️ {b}{important}:{eb} {knowledge.label(language, 'escalation')}")
+
+    return br.join(response_parts)
+
+def prerender_responses():
+    """Fill the response cache with every single-topic reply in the languages loaded so far"""
+    version = knowledge.version
+    for language in knowledge.loaded_languages():
+        for topic in knowledge.topics:
+            for channel in CHANNEL_MARKUP:
+                render_health_response((topic,), language, channel, version)
+
+def on_knowledge_reload(version):
+    # Replies rendered from the old content are unreachable now, free them
+    render_health_response.cache_clear()
+    prerender_responses()
 
 class HealthChatbot:
+    def __init__(self, llm=None, llm_cache=None):
+        # llm is anything with generate(prompt), e.g. a GuardedLLM around a StubClient
+        self.llm = llm
+        self.llm_cache = llm_cache
+
     def detect_language(self, message):
         if re.search(r'[ऀ-ॿ]', message):
             return 'hi'
         return 'en'
 
+    @timed('extract_symptoms')
     def extract_symptoms(self, message):
-        msg = message.lower()
-        symptoms = []
-
-        # English symptoms
-        if any(word in msg for word in ['fever', 'temperature', 'hot', 'burning']):
-            symptoms.append('fever')
-        if any(word in msg for word in ['cough', 'coughing', 'throat']):
-            symptoms.append('cough')
-        if any(word in msg for word in ['headache', 'head pain', 'migraine']):
-            symptoms.append('headache')
-        if any(word in msg for word in ['vaccine', 'vaccination', 'immunize']):
-            symptoms.append('vaccination')
-            
-        # Hindi symptoms
-        if any(word in msg for word in ['बुखार', 'तेज़ बुखार', 'तापमान']):
-            symptoms.append('fever')
-        if any(word in msg for word in ['खांसी', 'खाँसी', 'गला']):
-            symptoms.append('cough')
-        if any(word in msg for word in ['सिरदर्द', 'सर में दर्द', 'सिर दर्द']):
-            symptoms.append('headache')
-        if any(word in msg for word in ['टीका', 'टीकाकरण', 'वैक्सीन']):
-            symptoms.append('vaccination')
-            
-        return symptoms
+        # Synonyms of every language are matched in a single pass
+        return knowledge.extract(message)
 
+    @timed('process_location_data')
     def process_location_data(self, lat, lng, symptoms, user_phone):
         if lat is None or lng is None or not symptoms:
 
             return None
             
-        location_key = f"{round(lat, 2)}_{round(lng, 2)}"
         timestamp = datetime.now()
 
-        symptom_clusters[location_key].append({
-            'symptoms': symptoms, 
-            'timestamp': timestamp, 
-            'user': user_phone
-        })
-
-        # Check for outbreak patterns (3+ cases in 24 hours)
-        recent_symptoms = [s for s in symptom_clusters[location_key] 
-                          if (timestamp - s['timestamp']).total_seconds() <= 86400]  # 24 hours
-
-        if len(recent_symptoms) >= 3:
-            symptom_counts = Counter()
-            for case in recent_symptoms:
-                for symptom in case['symptoms']:
-                    symptom_counts[symptom] += 1
-                    
-            alert = {
-                'location': location_key,
-                'lat': lat,
-                'lng': lng,
-                'symptoms': dict(symptom_counts),
-                'case_count': len(recent_symptoms),
-                'timestamp': timestamp,
-                'severity': 'HIGH' if len(recent_symptoms) >= 5 else 'MEDIUM'
-            }
+        # Check for outbreak patterns (3+ cases in 24 hours around this cell)
+        location_key, case_count, symptom_counts = outbreak_tracker.record(
+            lat, lng, symptoms, user_phone, timestamp.timestamp()
+        )
+
+        alert = self.build_alert(lat, lng, location_key, case_count, symptom_counts, timestamp)
+        if alert:
+            self.send_government_alert(alert)
+        return alert
+
+    def process_location_batch(self, cases):
+        """Record (lat, lng, symptoms, user) cases together; return one alert or None per case"""
+        if not cases:
+            return []
+
+        timestamp = datetime.now()
+        results = outbreak_tracker.record_many(cases, timestamp.timestamp())
+
+        alerts = []
+        latest = {}
+        for (lat, lng, _, _), (location_key, case_count, symptom_counts) in zip(cases, results):
+            alert = self.build_alert(lat, lng, location_key, case_count, symptom_counts, timestamp)
+            alerts.append(alert)
+            if alert:
+                latest[location_key] = alert
+
+        # One alert update per affected cell rather than one per message
+        for alert in latest.values():
             self.send_government_alert(alert)
-            return alert
-        return None
+        for alert in alerts:
+            if alert and 'alert_id' not in alert:
+                alert['alert_id'] = latest[alert['location']].get('alert_id')
+        return alerts
+
+    def build_alert(self, lat, lng, location_key, case_count, symptom_counts, timestamp):
+        if case_count < 3:
+            return None
+        return {
+            'location': location_key,
+            'lat': lat,
+            'lng': lng,
+            'symptoms': symptom_counts,
+            'case_count': case_count,
+            'timestamp': timestamp,
+            'severity': 'HIGH' if case_count >= 5 else 'MEDIUM'
+        }
 
     
     def send_government_alert(self, alert):
-        with db_lock:
-            conn = sqlite3.connect(DATABASE)
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO government_alerts
-                (alert_type, location, symptoms_count, severity) 
-                VALUES (?, ?, ?, ?)
-            """, (
-                'OUTBREAK_DETECTED', 
-                f"Lat: {alert['lat']:.4f}, Lng: {alert['lng']:.4f}", 
-                alert['case_count'], 
-                alert['severity']
-            ))
-            conn.commit()
-            conn.close()
-        logger.info(f"🚨 Government alert sent: {alert}")
-
-    def get_health_response(self, message, language='en'):
-        symptoms = self.extract_symptoms(message)
+        # Only a new or escalated outbreak writes a row; repeats update it in place
+        alert_id, action = alert_manager.handle(
+            alert, outbreak_tracker.neighbour_keys(alert['lat'], alert['lng'])
+        )
+        alert['alert_id'] = alert_id
+        if action in ('created', 'escalated', 'reopened'):
+            logger.info(f"🚨 Government alert {action}: {alert}")
+        if action in ('created', 'escalated'):
+            # New rows reach this worker's stream subscribers now, other workers' on their next poll
+            alert_broadcaster.sync()
+
+    @timed('get_health_response')
+    def get_health_response(self, message, language='en', symptoms=None, channel='web'):
+        if symptoms is None:
+            symptoms = self.extract_symptoms(message)
         
         if not symptoms:
             # STEP 6: Try Gemini fallback first
             gemini_response = self.gemini_fallback(message, language)
             if gemini_response:
+                if channel == 'whatsapp':
+                    return html_to_text(gemini_response)
                 return gemini_response
 
             # Final fallback if Gemini is unavailable or fails
-            if language == 'hi':
-                return "मुझे आपकी समस्या समझने में मदद चाहिए। कृपया अपने लक्षण बताएं जैसे बुखार, खांसी, सिरदर्द आदि।"
-            return "I need help understanding your concern. Please describe your symptoms like fever, cough, headache, etc."
-
-
-        response_parts = []
-        for symptom in symptoms:
-            if symptom in HEALTH_KNOWLEDGE:
-                data = HEALTH_KNOWLEDGE[symptom][language]
-                if language == 'hi':
-                    if symptom == 'vaccination':
-                        response_parts.append(f"<strong>{symptom.title()} की जानकारी:</strong><br>")
-                        response_parts.append(f"📍 कहाँ जाएं: {data['info']}<br>")
-                        response_parts.append(f"📅 टीकाकरण शेड्यूल: {data['schedule']}<br>")
-                    else:
-                        response_parts.append(f"<strong>{symptom.title()} के बारे में:</strong><br>")
-                        response_parts.append(f"🔸 लक्षण: {data['symptoms']}<br>")
-                        response_parts.append(f"💊 इलाज: {data['treatment']}<br>")
-                        if 'prevention' in data:
-                            response_parts.append(f"🛡️ बचाव: {data['prevention']}<br>")
-                else:
-                    if symptom == 'vaccination':
-                        response_parts.append(f"<strong>Vaccination Information:</strong><br>")
-                        response_parts.append(f"📍 Where to go: {data['info']}<br>")
-                        response_parts.append(f"📅 Schedule: {data['schedule']}<br>")
-                    else:
-                        response_parts.append(f"<strong>About {symptom.title()}:</strong><br>")
-                        response_parts.append(f"🔸 Symptoms: {data['symptoms']}<br>")
-                        response_parts.append(f"💊 Treatment: {data['treatment']}<br>")
-                        if 'prevention' in data:
-                            response_parts.append(f"🛡️ Prevention: {data['prevention']}<br>")
-
-        # Add escalation message
-        if language == 'hi':
-            response_parts.append("<br>⚠️ <strong>महत्वपूर्ण:</strong> गंभीर लक्षण हों तो तुरंत डॉक्टर से मिलें। आपातकाल में 108 पर कॉल करें।")
-        else:
-            response_parts.append("<br>⚠️ <strong>Important:</strong> Consult a doctor immediately for severe symptoms. Call 108 for emergencies.")
-            
-        return "<br>".join(response_parts)
+            return knowledge.label(language, 'no_match')
+
+        return render_health_response(tuple(symptoms), language, channel, knowledge.version)
     
+    @timed('gemini_fallback')
     def gemini_fallback(self, message, language):
-        if not GEMINI_AVAILABLE or not gemini_client:
+        if not self.llm:
             return None
 
+        if self.llm_cache:
+            cached = self.llm_cache.get(message, language)
+            if cached:
+                return cached
+
         logger.info("🤖 Gemini fallback triggered")
 
-        try:
-            prompt = (
-                "You are vedura, a conservative health assistant for India.\n"
-                "Do NOT diagnose.\n"
-                "Do NOT prescribe medicines except paracetamol.\n"
-                "Always suggest consulting a doctor.\n"
-                "Use calm, supportive language.\n\n"
-                f"User ({language}): {message}"
-            )
-
-            response = gemini_client.models.generate_content(
-                             model="gemini-2.5-flash",
-                            contents=[
-                                {
-                                    "role": "user",
-                                    "parts": [
-                                        {"text": prompt}
-                                    ]
-                                }
-                                     ]
-                )
-            return response.text if response and hasattr(response, "text") else None
+        prompt = (
+            "You are vedura, a conservative health assistant for India.\n"
+            "Do NOT diagnose.\n"
+            "Do NOT prescribe medicines except paracetamol.\n"
+            "Always suggest consulting a doctor.\n"
+            "Use calm, supportive language.\n\n"
+            f"User ({language}): {message}"
+        )
 
-        except Exception as e:
-            logger.error(f"❌ Gemini failed: {e}")
-            return None
+        # Returns None on timeout, failure, saturation or an open circuit
+        with stage('llm_generate'):
+            text = self.llm.generate(prompt)
+        if text and self.llm_cache:
+            self.llm_cache.put(message, language, text)
+        return text
 
 
 
-chatbot = HealthChatbot()
+def alert_to_dict(alert):
+    return {
+        'id': alert[0],
+        'alert_type': alert[1],
+        'location': alert[2],
+        'symptoms_count': alert[3],
+        'severity': alert[4],
+        'timestamp': alert[5],
+        'status': alert[6]
+    }
 
-@app.route('/')
+@routes.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/admin')
+@routes.route('/admin')
 def admin():
-    with db_lock:
-        conn = sqlite3.connect(DATABASE)
+    with db.connection() as conn:
         cursor = conn.cursor()
         
         cursor.execute("SELECT * FROM government_alerts ORDER BY timestamp DESC LIMIT 10")
         alerts = cursor.fetchall()
         
-        cursor.execute("""
-            SELECT COUNT(*) as total, language, COUNT(DISTINCT user_phone) as unique_users
-            FROM user_interactions 
-            WHERE date(timestamp) = date('now')
-            GROUP BY language
-        """)
-        stats = cursor.fetchall()
-        
-        conn.close()
+        stats = stats_rollup.read_day(conn, utc_day_range()[0][:10])
     return render_template('admin.html', alerts=alerts, stats=stats)
 
-@app.route('/whatsapp_webhook', methods=['POST'])
+XML_HEADERS = {'Content-Type': 'application/xml'}
+
+def parse_location(lat, lng):
+    """(lat, lng) as floats, or (None, None) when no location was sent; ValueError if malformed"""
+    if lat in (None, '') and lng in (None, ''):
+        return None, None
+    return coordinates(lat, lng)
+
+def parse_user_id(value, default):
+    """A client-supplied user id as a string, default when absent; ValueError if not a scalar"""
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError('user_id must be a string')
+    return str(value)
+
+def webhook_payload():
+    if request.is_json:
+        return request.get_json(silent=True) or {}
+    return request.form
+
+@routes.route('/whatsapp_webhook', methods=['POST'])
 def whatsapp_webhook():
+    payload = webhook_payload()
+
+    # Over-limit senders get a canned reply before any DB or LLM work
+    decision = admission.acquire(payload.get('From', '').replace('whatsapp:', '') or request.remote_addr)
+    if decision != ADMITTED:
+        twilio_resp = messaging_response()
+        twilio_resp.message(canned_reply(decision, chatbot.detect_language(payload.get('Body', ''))))
+        return str(twilio_resp), 200, XML_HEADERS
+
+    try:
+        return idempotent_whatsapp_reply(payload.get('MessageSid'))
+    finally:
+        admission.release()
+
+def idempotent_whatsapp_reply(message_sid):
+    # Twilio retries slow replies with the same MessageSid; those must not run the pipeline again
+    if not message_sid:
+        return handle_whatsapp_message()
+
+    try:
+        state, twiml = webhook_receipts.begin(message_sid)
+    except Exception as e:
+        logger.error(f"❌ Webhook receipt lookup failed, processing {message_sid} anyway: {e}")
+        return handle_whatsapp_message()
+
+    if state == DUPLICATE:
+        logger.info(f"🔁 Replaying stored reply for retried webhook {message_sid}")
+        return twiml, 200, XML_HEADERS
+    if state == IN_FLIGHT:
+        # The first attempt is still running and will deliver the reply itself
+        logger.info(f"🔁 Webhook {message_sid} is already being processed")
+        return str(messaging_response()), 200, XML_HEADERS
+
+    try:
+        twiml, status, headers = handle_whatsapp_message()
+    except Exception:
+        webhook_receipts.release(message_sid)
+        raise
+    try:
+        if status == 200:
+            webhook_receipts.complete(message_sid, twiml)
+        else:
+            webhook_receipts.release(message_sid)
+    except Exception as e:
+        logger.error(f"❌ Could not store webhook receipt for {message_sid}: {e}")
+    return twiml, status, headers
+
+def handle_whatsapp_message():
     try:
         # Handle both JSON and form data
         if request.is_json:
@@ -348,9 +342,9 @@ def whatsapp_webhook():
         from_number = data.get('From', '').replace('whatsapp:', '')
 
         if not message_body:
-            twilio_resp = MessagingResponse()
+            twilio_resp = messaging_response()
             twilio_resp.message("Sorry, I did not receive any message.")
-            return str(twilio_resp), 200, {'Content-Type': 'application/xml'}
+            return str(twilio_resp), 200, XML_HEADERS
 
         language = chatbot.detect_language(message_body)
         lat, lng = None, None
@@ -360,36 +354,24 @@ def whatsapp_webhook():
             parts = message_body.split(':', 3)
             if len(parts) >= 4:
                 try:
-                    lat = float(parts[1])
-                    lng = float(parts[2])
+                    lat, lng = coordinates(parts[1], parts[2])
                     message_body = parts[3]
                 except ValueError:
                     pass
 
-        response_text = chatbot.get_health_response(message_body, language)
-        response_text = html_to_text(response_text)  # Convert HTML to plain text for WhatsApp
-        
         symptoms = chatbot.extract_symptoms(message_body)
 
+        # Plain-text variant for WhatsApp, rendered directly instead of converted from HTML
+        response_text = chatbot.get_health_response(message_body, language, symptoms, channel='whatsapp')
+
         # Process location for outbreak detection
         alert = None
         if lat and lng and symptoms:
             alert = chatbot.process_location_data(lat, lng, symptoms, from_number)
 
-        # Save interaction to database
-        with db_lock:
-            conn = sqlite3.connect(DATABASE)
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO user_interactions
-                (user_phone, message, response, language, location_lat, location_lng, symptoms)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                from_number, message_body, response_text, language, 
-                lat, lng, ','.join(symptoms) if symptoms else None
-            ))
-            conn.commit()
-            conn.close()
+        # Queue interaction for the background writer
+        with stage('queue_interaction'):
+            interaction_writer.submit(from_number, message_body, response_text, language, lat, lng, symptoms)
 
         # Add alert notification to response
         if alert:
@@ -399,59 +381,80 @@ def whatsapp_webhook():
                 response_text += f"\n\n📍 **Location Alert:** {alert['case_count']} cases detected in your area. Health authorities have been notified."
 
         # Create TwiML response for Twilio
-        twilio_resp = MessagingResponse()
-        twilio_resp.message(response_text)
+        with stage('twiml_build'):
+            twilio_resp = messaging_response()
+            twilio_resp.message(response_text)
+            twiml = str(twilio_resp)
 
         logger.info(f"📤 WhatsApp response sent: {response_text[:50]}...")
         
-        return str(twilio_resp), 200, {'Content-Type': 'application/xml'}
+        return twiml, 200, XML_HEADERS
 
     except Exception as e:
         logger.error(f"❌ Webhook error: {str(e)}")
-        twilio_resp = MessagingResponse()
+        twilio_resp = messaging_response()
         twilio_resp.message("Sorry, there was an error processing your request.")
-        return str(twilio_resp), 500, {'Content-Type': 'application/xml'}
+        return str(twilio_resp), 500, XML_HEADERS
+
+def admission_rejected(decision, language):
+    """The 429/503 JSON reply for a request admission turned away."""
+    retry_after = int(1 / admission.rate) + 1 if decision == LIMITED else 5
+    return jsonify({
+        'response': canned_reply(decision, language if isinstance(language, str) else 'en'),
+        'error': decision
+    }), 429 if decision == LIMITED else 503, {'Retry-After': str(retry_after)}
 
-@app.route('/api/chat', methods=['POST'])
+@routes.route('/api/chat', methods=['POST'])
 def chat_api():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    try:
+        user_id = parse_user_id(data.get('user_id'), None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    decision = admission.acquire(user_id or request.remote_addr)
+    if decision != ADMITTED:
+        return admission_rejected(decision, data.get('language'))
+
+    try:
+        return handle_chat_message()
+    finally:
+        admission.release()
+
+def handle_chat_message():
     try:
-        data = request.get_json()
-        if not data:
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data, dict):
             return jsonify({'error': 'No data provided'}), 400
-            
-        message = data.get('message', '').strip()
-        language = data.get('language', 'en')
-        lat = data.get('lat')
-        lng = data.get('lng')
-        user_id = data.get('user_id', f'web_demo_{datetime.now().strftime("%H%M%S")}')
+
+        message = data.get('message')
+        if not isinstance(message, str):
+            return jsonify({'error': 'No message provided'}), 400
+        message = message.strip()
+        language = data.get('language') or 'en'
+        try:
+            lat, lng = parse_location(data.get('lat'), data.get('lng'))
+            user_id = parse_user_id(data.get('user_id'), f'web_demo_{datetime.now().strftime("%H%M%S")}')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
         if not message:
             return jsonify({'error': 'No message provided'}), 400
 
         logger.info(f"💬 Processing message: {message} (lang: {language})")
 
-        response = chatbot.get_health_response(message, language)
         symptoms = chatbot.extract_symptoms(message)
+        response = chatbot.get_health_response(message, language, symptoms)
 
         # Process location data for outbreak detection
         alert = None
         if lat and lng and symptoms:
             alert = chatbot.process_location_data(lat, lng, symptoms, user_id)
 
-        # Save interaction to database
-        with db_lock:
-            conn = sqlite3.connect(DATABASE)
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO user_interactions
-                (user_phone, message, response, language, location_lat, location_lng, symptoms)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                user_id, message, response, language, 
-                lat, lng, ','.join(symptoms) if symptoms else None
-            ))
-            conn.commit()
-            conn.close()
+        # Queue interaction for the background writer
+        with stage('queue_interaction'):
+            interaction_writer.submit(user_id, message, response, language, lat, lng, symptoms)
 
         logger.info(f"✅ Response generated: {len(response)} chars, Alert: {alert is not None}")
 
@@ -467,45 +470,227 @@ def chat_api():
         logger.error(f"❌ Chat API error: {str(e)}")
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
-@app.route('/api/alerts')
+BATCH_MAX_MESSAGES = int(os.environ.get('BATCH_MAX_MESSAGES', 500))
+
+@routes.route('/api/chat/batch', methods=['POST'])
+def chat_batch_api():
+    data = request.get_json(silent=True)
+    items = data.get('messages') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'Expected a non-empty list of messages'}), 400
+    if len(items) > BATCH_MAX_MESSAGES:
+        return jsonify({'error': f'At most {BATCH_MAX_MESSAGES} messages per batch'}), 413
+    try:
+        caller = parse_user_id(data.get('user_id') if isinstance(data, dict) else None, request.remote_addr)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # One slot per batch, one token per message from the caller's bucket
+    decision = admission.acquire(caller, cost=len(items))
+    if decision != ADMITTED:
+        return admission_rejected(decision, data.get('language') if isinstance(data, dict) else None)
+
+    try:
+        return handle_chat_batch(items)
+    finally:
+        admission.release()
+
+def handle_chat_batch(items):
+    try:
+        started = time.perf_counter()
+        default_user = f'web_demo_{datetime.now().strftime("%H%M%S")}'
+        results = [None] * len(items)
+        accepted = []
+
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results[index] = {'index': index, 'error': 'Item must be an object'}
+                continue
+            message = str(item.get('message') or '').strip()
+            if not message:
+                results[index] = {'index': index, 'error': 'No message provided'}
+                continue
+            try:
+                lat, lng = parse_location(item.get('lat'), item.get('lng'))
+                user_id = parse_user_id(item.get('user_id'), default_user)
+            except ValueError as e:
+                results[index] = {'index': index, 'error': str(e)}
+                continue
+            try:
+                language = item.get('language') or 'en'
+                symptoms = chatbot.extract_symptoms(message)
+                response = chatbot.get_health_response(message, language, symptoms)
+            except Exception as e:
+                results[index] = {'index': index, 'error': f'Processing error: {str(e)}'}
+                continue
+            accepted.append((index, user_id, message, language, symptoms, response, lat, lng))
+
+        # Everything in the batch is stored in a single transaction, before any
+        # outbreak state, so a failed batch leaves nothing behind to double-count on retry
+        records = [interaction_writer.make_record(user_id, message, response, language, lat, lng, symptoms)
+                   for _, user_id, message, language, symptoms, response, lat, lng in accepted]
+        if records:
+            interaction_writer.write_now(records)
+
+        # Outbreak state is updated once for all located cases in the batch
+        located = [(index, lat, lng, symptoms, user_id)
+                   for index, user_id, _, _, symptoms, _, lat, lng in accepted
+                   if lat and lng and symptoms]
+        alerts = chatbot.process_location_batch([case[1:] for case in located])
+        alert_by_index = {case[0]: alert for case, alert in zip(located, alerts)}
+
+        for index, _, message, _, symptoms, response, _, _ in accepted:
+            alert = alert_by_index.get(index)
+            results[index] = {
+                'index': index,
+                'response': response,
+                'language_detected': chatbot.detect_language(message),
+                'symptoms_detected': symptoms,
+                'alert_generated': alert is not None,
+                'alert_details': alert
+            }
+
+        elapsed = time.perf_counter() - started
+        logger.info(f"📦 Batch processed: {len(records)}/{len(items)} messages in {elapsed * 1000:.1f} ms")
+
+        return jsonify({
+            'results': results,
+            'processed': len(records),
+            'failed': len(items) - len(records),
+            'elapsed_ms': round(elapsed * 1000, 2),
+            'messages_per_second': round(len(items) / elapsed, 1) if elapsed > 0 else None
+        }), 200
+
+    except Exception as e:
+        logger.error(f"❌ Batch chat API error: {str(e)}")
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+def interaction_to_dict(row):
+    # Same fields as the exporter: user_phone never leaves the database
+    return {
+        'id': row[0],
+        'message': row[2],
+        'response': row[3],
+        'language': row[4],
+        'timestamp': row[5],
+        'location_lat': row[6],
+        'location_lng': row[7],
+        'symptoms': row[8].split(',') if row[8] else []
+    }
+
+page_cache = ConditionalCache()
+
+def paged_response(table, to_dict, modified_at):
+    """One keyset page of table with ETag/Last-Modified, see pagination."""
+    try:
+        after_id, since, limit = parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Nothing has been committed since this URL was last served
+    version = db.data_version()
+    cached = page_cache.lookup(request.full_path, version)
+    if cached:
+        etag, last_modified = cached
+        if etag in request.if_none_match or (
+            not request.if_none_match and last_modified and request.if_modified_since
+            and last_modified <= request.if_modified_since
+        ):
+            page_cache.hit()
+            response = Response(status=304)
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            return response
+
+    with db.connection() as conn:
+        rows = fetch_page(conn, table, after_id, since, limit)
+
+    items = [to_dict(row) for row in rows]
+    etag = body_etag(items)
+    last_modified = max(filter(None, (parse_timestamp(modified_at(row)) for row in rows)), default=None)
+    page_cache.store(request.full_path, version, etag, last_modified)
+
+    response = jsonify(items)
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    if (after_id is not None or since is not None) and items:
+        response.headers['X-Next-After-Id'] = str(items[-1]['id'])
+    return response.make_conditional(request)
+
+@routes.route('/api/alerts')
 def get_alerts():
-    with db_lock:
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM government_alerts ORDER BY timestamp DESC LIMIT 20")
-        alerts = cursor.fetchall()
-        conn.close()
-    
-    return jsonify([{
-        'id': alert[0],
-        'alert_type': alert[1],
-        'location': alert[2],
-        'symptoms_count': alert[3],
-        'severity': alert[4],
-        'timestamp': alert[5],
-        'status': alert[6]
-    } for alert in alerts])
+    # updated_at (column 8) moves when an open alert's counts change
+    return paged_response('government_alerts', alert_to_dict,
+                          lambda row: row[8] if len(row) > 8 and row[8] else row[5])
 
-@app.route('/api/stats')
-def get_stats():
-    with db_lock:
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
+@routes.route('/api/interactions')
+def get_interactions():
+    return paged_response('user_interactions', interaction_to_dict, lambda row: row[5])
 
-        cursor.execute("SELECT COUNT(*) FROM user_interactions")
-        total_interactions = cursor.fetchone()[0] or 0
+ALERT_STREAM_KEEPALIVE = float(os.environ.get('ALERT_STREAM_KEEPALIVE_SECONDS', 15))
+ALERT_STREAM_BACKLOG = 500
 
-        cursor.execute("SELECT COUNT(DISTINCT user_phone) FROM user_interactions")
-        unique_users = cursor.fetchone()[0] or 0
+@routes.route('/api/alerts/stream')
+def alert_stream():
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_id = int(last_id) if last_id else None
+    except ValueError:
+        return jsonify({'error': 'Last-Event-ID must be an alert id'}), 400
+
+    # Subscribe before reading the backlog so nothing published in between is missed
+    subscriber = alert_broadcaster.subscribe()
+    if subscriber is None:
+        return jsonify({'error': 'Too many alert stream subscribers'}), 503
+
+    backlog = []
+    if last_id is not None:
+        backlog = [alert_to_dict(alert) for alert in db.fetchall(
+            "SELECT * FROM government_alerts WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, ALERT_STREAM_BACKLOG)
+        )]
+
+    return Response(
+        stream_with_context(stream_alerts(
+            subscriber, backlog, last_id, alert_broadcaster, ALERT_STREAM_KEEPALIVE
+        )),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+EXPORT_MIMETYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+@routes.route('/api/export/<kind>')
+def export_data(kind):
+    fmt = request.args.get('format', 'ndjson')
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+    try:
+        filters = ExportFilters.from_args(request.args)
+        chunks = export(DATABASE, kind, filters, fmt, compress)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    filename = f"{kind}.{fmt}" + ('.gz' if compress else '')
+    return Response(
+        chunks,
+        mimetype='application/gzip' if compress else EXPORT_MIMETYPES[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+@routes.route('/api/stats')
+def get_stats():
+    with db.connection() as conn:
+        cursor = conn.cursor()
 
-        cursor.execute("SELECT language, COUNT(*) FROM user_interactions GROUP BY language")
-        language_stats = dict(cursor.fetchall())
+        # Maintained on the write path, see stats_rollup
+        total_interactions, unique_users, language_stats = stats_rollup.read_totals(conn)
 
-        cursor.execute("SELECT COUNT(*) FROM government_alerts WHERE date(timestamp) = date('now')")
+        cursor.execute(
+            "SELECT COUNT(*) FROM government_alerts WHERE timestamp >= ? AND timestamp < ? AND status != ?",
+            (*utc_day_range(), SUPERSEDED)
+        )
         today_alerts = cursor.fetchone()[0] or 0
 
-        conn.close()
-
     return jsonify({
         'total_interactions': total_interactions,
         'unique_users': unique_users,
@@ -513,6 +698,248 @@ def get_stats():
         'today_alerts': today_alerts
     })
 
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+def record_request_time(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        metrics.observe('http_request_seconds', time.perf_counter() - start,
+                        'Time to build each response, by endpoint',
+                        endpoint=request.endpoint or 'unmatched')
+    return response
+
+def _counters(stats, names):
+    return {(('result', name),): stats[name] for name in names}
+
+# Read at scrape time, so they follow whatever create_app() built; a scrape before that skips them
+metrics.gauge('interaction_writer_queue_depth', 'Interactions waiting for the background writer',
+              lambda: interaction_writer.qsize())
+metrics.gauge('interaction_writer_rows_total', 'Interactions written or lost by the background writer',
+              lambda: {(('result', 'written'),): interaction_writer.written,
+                       (('result', 'failed'),): interaction_writer.failed}, kind='counter')
+metrics.gauge('llm_cache_lookups_total', 'LLM response cache lookups by outcome',
+              lambda: _counters(llm_cache.stats(), ('memory_hits', 'disk_hits', 'misses')), kind='counter')
+metrics.gauge('llm_cache_hit_ratio', 'Share of LLM cache lookups served from memory or disk',
+              lambda: llm_cache.stats()['hit_rate'])
+metrics.gauge('llm_cache_memory_entries', 'Entries in the in-memory LLM cache tier',
+              lambda: llm_cache.stats()['memory_entries'])
+metrics.gauge('llm_calls_total', 'Guarded LLM calls by outcome',
+              lambda: _counters(llm.stats, ('calls', 'successes', 'failures', 'timeouts',
+                                            'rejected_open', 'rejected_busy')) if llm else {}, kind='counter')
+metrics.gauge('db_pool_connections', 'Pooled SQLite connections, open and idle',
+              lambda: {(('state', name),): value for name, value in db.stats().items()})
+metrics.gauge('alert_stream_subscribers', 'Open /api/alerts/stream connections',
+              lambda: alert_broadcaster.subscriber_count())
+metrics.gauge('alert_stream_events_total', 'Alerts published to, and slow subscribers dropped from, the stream',
+              lambda: {(('event', 'published'),): alert_broadcaster.published,
+                       (('event', 'dropped'),): alert_broadcaster.dropped}, kind='counter')
+metrics.gauge('webhook_retries_total', 'Retried webhooks answered from a receipt or while still in flight',
+              lambda: {(('outcome', 'replayed'),): webhook_receipts.duplicates,
+                       (('outcome', 'in_flight'),): webhook_receipts.in_flight_timeouts}, kind='counter')
+metrics.gauge('admission_decisions_total', 'Chat, batch and webhook requests admitted, rate limited or shed',
+              lambda: {(('decision', name),): value for name, value in admission.stats().items()},
+              kind='counter')
+metrics.gauge('admission_tracked_users', 'Senders with a live token bucket',
+              lambda: admission.tracked_users())
+metrics.gauge('page_cache_hits_total', 'Conditional GETs answered 304 without querying',
+              lambda: page_cache.hits, kind='counter')
+metrics.gauge('knowledge_base_languages_loaded', 'Knowledge base languages loaded into memory',
+              lambda: len(knowledge.loaded_languages()))
+metrics.gauge('knowledge_base_reloads_total', 'Knowledge base files picked up without a restart',
+              lambda: knowledge.reloads, kind='counter')
+
+@routes.route('/metrics')
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+# Flipped by warm_up() and begin_drain(); see serve.py
+lifecycle = {'ready': False, 'draining': False}
+
+def warm_up():
+    """Pay first-request costs up front: pool connections, matcher, reply cache and SDK imports."""
+    started = time.perf_counter()
+    with ExitStack() as stack:
+        for _ in range(db.max_size):
+            stack.enter_context(db.connection()).execute("SELECT 1")
+    db.data_version()
+    chatbot.extract_symptoms("fever cough headache vaccination बुखार खांसी")
+    prerender_responses()
+    messaging_response()
+    if llm is not None:
+        try:
+            llm.warm_up()
+        except Exception as e:
+            # The breaker will keep the fallback off if the SDK stays broken
+            logger.error(f"❌ LLM warm-up failed: {e}")
+    lifecycle['ready'] = True
+    logger.info(f"🔥 Warmed up in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+def begin_drain():
+    """Fail readiness and end long-lived streams so the balancer moves traffic away."""
+    lifecycle['draining'] = True
+    alert_broadcaster.close()
+
+def shutdown():
+    """Stop background work, flush queued interactions and close the database; call after the last request."""
+    alert_broadcaster.stop()
+    alert_manager.stop()
+    if retention_stopped is not None:
+        retention_stopped.set()
+    if llm is not None:
+        llm.shutdown()
+    interaction_writer.close()
+    db.close()
+    knowledge.close()
+
+@routes.route('/healthz')
+def healthz():
+    return jsonify({'status': 'ok', 'pid': os.getpid()})
+
+@routes.route('/readyz')
+def readyz():
+    if lifecycle['draining']:
+        return jsonify({'status': 'draining'}), 503
+    if not lifecycle['ready']:
+        return jsonify({'status': 'starting'}), 503
+    try:
+        db.fetchone("SELECT 1")
+    except Exception as e:
+        return jsonify({'status': 'database unavailable', 'error': str(e)}), 503
+    return jsonify({'status': 'ready', 'writer_queue': interaction_writer.qsize()})
+
+def setting(config, name, default=None, cast=str):
+    """A config value: create_app()'s config dict, then the environment, then default."""
+    value = config.get(name, os.environ.get(name))
+    if value is None:
+        return default
+    return cast(value)
+
+def create_app(config=None):
+    """Build the Flask app and the services behind it. Call once per process.
+
+    config overrides the environment variables of the same name, e.g.
+    create_app({'DATABASE_PATH': 'test.db', 'LLM_BACKEND': 'stub'}).
+    """
+    global app, DATABASE, db, interaction_writer, knowledge, outbreak_tracker, alert_manager
+    global alert_broadcaster, admission, webhook_receipts, llm_cache, llm, chatbot, retention_stopped
+    config = dict(config or {})
+
+    DATABASE = setting(config, 'DATABASE_PATH', 'health_chatbot.db')
+    db = ConnectionPool(DATABASE, max_size=setting(config, 'DB_POOL_SIZE', 8, int))
+    init_db()
+
+    interaction_writer = start_writer(
+        db,
+        on_batch=update_rollups,
+        batch_size=setting(config, 'INTERACTION_BATCH_SIZE', 200, int),
+        flush_interval=setting(config, 'INTERACTION_FLUSH_INTERVAL', 0.5, float),
+        max_queue=setting(config, 'INTERACTION_QUEUE_SIZE', 10000, int),
+    )
+
+    # Optional background archival of old interactions, see retention.py
+    retention_stopped = None
+    if setting(config, 'RETENTION_DAYS'):
+        retention_stopped = start_retention_thread(
+            db,
+            setting(config, 'RETENTION_DAYS', cast=int),
+            setting(config, 'ARCHIVE_DIR', 'archive'),
+            interval=setting(config, 'RETENTION_INTERVAL_SECONDS', 3600, int),
+        )
+
+    # Compiled by build_kb.py; built from knowledge/ on first start if missing
+    knowledge = open_knowledge_base(
+        setting(config, 'KNOWLEDGE_BASE_PATH', KB_FILE),
+        preload=setting(config, 'KNOWLEDGE_BASE_PRELOAD', 'en,hi').split(','),
+        check_interval=setting(config, 'KNOWLEDGE_BASE_RELOAD_INTERVAL', 5, float),
+        on_reload=on_knowledge_reload,
+    )
+    prerender_responses()
+
+    outbreak_tracker = SharedOutbreakTracker(db)
+    outbreak_tracker.load()
+    alert_manager = AlertManager(
+        db,
+        cooldown=setting(config, 'ALERT_COOLDOWN_SECONDS', 3600, int),
+        update_interval=setting(config, 'ALERT_UPDATE_INTERVAL', 60, int),
+        sweep_interval=setting(config, 'ALERT_SWEEP_INTERVAL', 300, int),
+    )
+    # Quiet cells resolve even when no new detections arrive
+    alert_manager.start_sweeper()
+    # Each open stream holds one of this worker's request threads (serve.py --threads)
+    request_threads = setting(config, 'WEB_THREADS', 8, int)
+    alert_broadcaster = SharedAlertBroadcaster(
+        db, alert_to_dict,
+        poll_interval=setting(config, 'ALERT_STREAM_POLL_SECONDS', 1.0, float),
+        max_subscribers=stream_capacity(request_threads, setting(config, 'ALERT_STREAM_MAX_SUBSCRIBERS', None, int)),
+    )
+    alert_broadcaster.start()
+
+    # Buckets are per worker: the effective limit is up to WEB_WORKERS times this
+    admission = AdmissionController(
+        rate=setting(config, 'USER_MESSAGES_PER_MINUTE', 20, float) / 60,
+        burst=setting(config, 'USER_MESSAGE_BURST', 10, int),
+        max_concurrency=setting(config, 'MAX_CONCURRENT_REQUESTS', 64, int),
+    )
+    webhook_receipts = WebhookReceipts(
+        db,
+        ttl=setting(config, 'WEBHOOK_RECEIPT_TTL_SECONDS', 24 * 3600, int),
+        wait_timeout=setting(config, 'WEBHOOK_RETRY_WAIT_SECONDS', 10, float),
+    )
+
+    llm_cache = ResponseCache(
+        db,
+        max_memory=setting(config, 'LLM_CACHE_MEMORY_SIZE', 1024, int),
+        max_rows=setting(config, 'LLM_CACHE_MAX_ROWS', 50000, int),
+        ttl=setting(config, 'LLM_CACHE_TTL_SECONDS', 7 * 24 * 3600, int),
+    )
+
+    llm = None
+    if setting(config, 'LLM_BACKEND') == 'stub':
+        llm = StubClient(
+            latency=setting(config, 'LLM_STUB_LATENCY', 0, float),
+            failure_rate=setting(config, 'LLM_STUB_FAILURE_RATE', 0, float),
+        )
+        logger.info("🧪 Using stub LLM backend")
+    elif setting(config, 'GEMINI_API_KEY'):
+        # google-genai is imported on the first fallback, or by warm_up()
+        llm = GeminiClient(api_key=setting(config, 'GEMINI_API_KEY'))
+        logger.info("✅ Gemini AI is ENABLED")
+    else:
+        logger.warning("⚠️ Gemini AI is DISABLED — running in rule-only mode")
+
+    if llm:
+        llm = GuardedLLM(
+            llm,
+            timeout=setting(config, 'LLM_TIMEOUT_SECONDS', 8, float),
+            max_concurrency=setting(config, 'LLM_MAX_CONCURRENCY', 4, int),
+        )
+
+    chatbot = HealthChatbot(llm, llm_cache)
+
+    from flask_cors import CORS
+
+    app = Flask(__name__)
+    CORS(app)
+    app.register_blueprint(routes)
+    if metrics.ENABLED:
+        app.before_request(start_request_timer)
+        app.after_request(record_request_time)
+    return app
+
+# Module attributes that only exist once create_app() has run
+_APP_ATTRIBUTES = {
+    'app', 'DATABASE', 'db', 'interaction_writer', 'knowledge', 'outbreak_tracker', 'alert_manager',
+    'alert_broadcaster', 'admission', 'webhook_receipts', 'llm_cache', 'llm', 'chatbot', 'retention_stopped',
+}
+
+def __getattr__(name):
+    # e.g. gunicorn's app:app, or a script reading app.chatbot, without calling create_app() first
+    if name in _APP_ATTRIBUTES:
+        create_app()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 if __name__ == '__main__':
     os.makedirs('templates', exist_ok=True)
     os.makedirs('static', exist_ok=True)
@@ -527,4 +954,7 @@ if __name__ == '__main__':
     print("🚀 Starting server...")
     print("=" * 50)
 
+    # Development server; use serve.py to run on all cores
+    app = create_app()
+    warm_up()
     app.run(debug=True, host='0.0.0.0', port=5000)
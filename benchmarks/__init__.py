@@ -0,0 +1 @@
+"""Load tests and microbenchmarks for the chat pipeline; see benchmarks/__main__.py."""
@@ -0,0 +1,96 @@
+"""Run the benchmark suite against a throwaway database.
+
+    python -m benchmarks                              # print a report
+    python -m benchmarks --save baseline.json         # record a baseline
+    python -m benchmarks --compare baseline.json      # exit 1 on regressions
+
+Only compare baselines recorded on the same machine with the same options.
+"""
+import argparse
+import gc
+import importlib
+import logging
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import tracemalloc
+
+from benchmarks import load, micro, report
+
+
+def _prepare_environment(workdir):
+    # create_app() reads these, so they must be set before it runs
+    os.environ['DATABASE_PATH'] = os.path.join(workdir, 'bench.db')
+    os.environ.setdefault('LLM_BACKEND', 'stub')
+    # Measure the pipeline, not the per-user rate limits
+    os.environ.setdefault('USER_MESSAGE_BURST', '1000000')
+    os.environ.pop('RETENTION_DAYS', None)
+    logging.disable(logging.WARNING)
+
+
+def _max_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chat pipeline benchmarks")
+    parser.add_argument('--requests', type=int, default=1000, help="Requests per load run")
+    parser.add_argument('--iterations', type=int, default=2000, help="Calls per microbenchmark")
+    parser.add_argument('--concurrency', type=int, default=8, help="Client threads against the real server")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--skip-server', action='store_true', help="Only use the Flask test client")
+    parser.add_argument('--save', help="Write the report as JSON to this path")
+    parser.add_argument('--compare', help="Baseline JSON to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed slowdown before failing, 0.2 = 20%%")
+    parser.add_argument('--min-delta-ms', type=float, default=0.05, help="Ignore p95 changes smaller than this")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='chatbot-bench-')
+    try:
+        _prepare_environment(workdir)
+        app_module = importlib.import_module('app')
+        app_module.create_app()
+        results = report.new_report(vars(args))
+
+        results['results'].update(micro.run(app_module, args.iterations, args.seed))
+
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        results['results'].update(load.run_test_client(app_module, args.requests, args.seed))
+        if not args.skip_server:
+            results['results'].update(load.run_server(app_module, args.requests, args.concurrency, args.seed))
+        app_module.interaction_writer.flush()
+        gc.collect()
+        growth = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(before, 'filename'))
+        tracemalloc.stop()
+        results['results']['memory'] = {
+            'python_heap_growth_kb': round(growth / 1024, 1),
+            'max_rss_mb': _max_rss_mb(),
+        }
+
+        print(report.format_report(results))
+        if args.save:
+            report.save(results, args.save)
+            print(f"💾 Saved report to {args.save}")
+        if args.compare:
+            regressions = report.compare(results, report.load(args.compare), args.tolerance, args.min_delta_ms)
+            for line in regressions:
+                print(f"❌ {line}")
+            if regressions:
+                return 1
+            print(f"✅ No regressions beyond {args.tolerance:.0%} of {args.compare}")
+        return 0
+    finally:
+        app_module = sys.modules.get('app')
+        if app_module is not None:
+            app_module.interaction_writer.close()
+            app_module.db.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
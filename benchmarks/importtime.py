@@ -0,0 +1,91 @@
+"""Check that importing app stays cheap and free of side effects.
+
+    python -m benchmarks.importtime                   # print the import cost
+    python -m benchmarks.importtime --budget-ms 400   # exit 1 if over budget
+
+Runs `python -X importtime -c "import app"` in fresh interpreters and takes
+the fastest run. Fails if the import pulls in one of the modules that must
+wait for create_app(), or if it creates the database file.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+# Heavy or side-effecting modules that create_app() imports on demand
+DEFERRED_MODULES = ('google.genai', 'twilio', 'flask_cors')
+
+
+def budget_ms():
+    return float(os.environ.get('IMPORT_BUDGET_MS', 400))
+
+
+def parse_importtime(stderr):
+    """Return {module: (self_us, cumulative_us)} from -X importtime output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def measure(repeat=5):
+    """Import app in fresh interpreters; return (best_ms, modules, db_created)."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    best_ms, modules, db_created = None, {}, False
+    with tempfile.TemporaryDirectory(prefix='chatbot-import-') as workdir:
+        db_path = os.path.join(workdir, 'import.db')
+        env = dict(os.environ, DATABASE_PATH=db_path)
+        for _ in range(repeat):
+            result = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', 'import app'],
+                cwd=root, env=env, capture_output=True, text=True, check=True,
+            )
+            run = parse_importtime(result.stderr)
+            elapsed_ms = run['app'][1] / 1000
+            if best_ms is None or elapsed_ms < best_ms:
+                best_ms, modules = elapsed_ms, run
+            db_created = db_created or os.path.exists(db_path)
+    return best_ms, modules, db_created
+
+
+def check(best_ms, modules, db_created, budget_ms):
+    """Return a message for every way measure()'s result breaks the budget."""
+    failures = []
+    if best_ms > budget_ms:
+        failures.append(f"import app took {best_ms:.1f} ms, over the {budget_ms:.0f} ms budget")
+    for name in DEFERRED_MODULES:
+        if any(module == name or module.startswith(name + '.') for module in modules):
+            failures.append(f"{name} is imported at module level; import it inside create_app()")
+    if db_created:
+        failures.append("importing app created the database; leave that to create_app()")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time budget for the app module")
+    parser.add_argument('--budget-ms', type=float, default=budget_ms())
+    parser.add_argument('--repeat', type=int, default=5, help="Fresh interpreters to try, the fastest counts")
+    parser.add_argument('--top', type=int, default=10, help="Slowest modules to list")
+    args = parser.parse_args()
+
+    best_ms, modules, db_created = measure(args.repeat)
+    print(f"⏱️  import app: {best_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    slowest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+    for name, (self_us, cumulative_us) in slowest:
+        print(f"   {self_us / 1000:8.1f} ms self {cumulative_us / 1000:8.1f} ms total  {name}")
+
+    failures = check(best_ms, modules, db_created, args.budget_ms)
+    for line in failures:
+        print(f"❌ {line}")
+    if failures:
+        return 1
+    print("✅ Import is within budget and has no side effects")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Load runs through the Flask test client and a real local HTTP server."""
+import json
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import make_server
+
+from benchmarks.report import summarize
+from benchmarks.traffic import TrafficGenerator
+
+
+def _split(latencies_by_path, elapsed):
+    return {path: summarize(latencies, elapsed) for path, latencies in latencies_by_path.items()}
+
+
+def run_test_client(app_module, requests=1000, seed=42):
+    """Sequential requests in-process: pipeline cost without sockets."""
+    client = app_module.app.test_client()
+    latencies = {'/api/chat': [], '/whatsapp_webhook': []}
+    errors = 0
+    start = time.perf_counter()
+    for path, kind, payload in TrafficGenerator(seed).requests(requests):
+        t0 = time.perf_counter()
+        if kind == 'json':
+            response = client.post(path, json=payload)
+        else:
+            response = client.post(path, data=payload)
+        latencies[path].append(time.perf_counter() - t0)
+        errors += response.status_code >= 400
+    elapsed = time.perf_counter() - start
+    results = {f"load.test_client{path.replace('/', '.')}": summary
+               for path, summary in _split(latencies, elapsed).items()}
+    results['load.test_client.all'] = summarize(latencies['/api/chat'] + latencies['/whatsapp_webhook'], elapsed)
+    results['load.test_client.all']['errors'] = errors
+    return results
+
+
+class LocalServer:
+    """Threaded werkzeug server for the app on an ephemeral port."""
+
+    def __init__(self, flask_app):
+        self.server = make_server('127.0.0.1', 0, flask_app, threaded=True)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.thread.join()
+
+
+def _post(url, kind, payload):
+    if kind == 'json':
+        data, content_type = json.dumps(payload).encode('utf-8'), 'application/json'
+    else:
+        data, content_type = urllib.parse.urlencode(payload).encode('utf-8'), 'application/x-www-form-urlencoded'
+    request = urllib.request.Request(url, data=data, headers={'Content-Type': content_type})
+    t0 = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            response.read()
+            ok = True
+    except Exception:
+        ok = False
+    return time.perf_counter() - t0, ok
+
+
+def run_server(app_module, requests=1000, concurrency=8, seed=42):
+    """Concurrent requests over real sockets."""
+    traffic = list(TrafficGenerator(seed + 1).requests(requests))
+    latencies = {'/api/chat': [], '/whatsapp_webhook': []}
+    errors = 0
+    with LocalServer(app_module.app) as server:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [(path, pool.submit(_post, server.url + path, kind, payload))
+                       for path, kind, payload in traffic]
+            for path, future in futures:
+                latency, ok = future.result()
+                latencies[path].append(latency)
+                errors += not ok
+        elapsed = time.perf_counter() - start
+    results = {f"load.server{path.replace('/', '.')}": summary
+               for path, summary in _split(latencies, elapsed).items()}
+    results['load.server.all'] = summarize(latencies['/api/chat'] + latencies['/whatsapp_webhook'], elapsed)
+    results['load.server.all'].update(errors=errors, concurrency=concurrency)
+    return results
@@ -0,0 +1,43 @@
+"""Microbenchmarks of the pipeline stages, called directly without HTTP."""
+import time
+
+from benchmarks.report import summarize
+from benchmarks.traffic import TrafficGenerator
+
+
+def _time_calls(func, args_list):
+    latencies = []
+    clock = time.perf_counter
+    start = clock()
+    for args in args_list:
+        t0 = clock()
+        func(*args)
+        latencies.append(clock() - t0)
+    return summarize(latencies, clock() - start)
+
+
+def run(app_module, iterations=2000, seed=42):
+    chatbot = app_module.chatbot
+    traffic = TrafficGenerator(seed)
+    messages = [traffic.message() for _ in range(iterations)]
+    # Rule-based replies only; the LLM path is covered by the load runs
+    matched = [(m, chatbot.detect_language(m), chatbot.extract_symptoms(m)) for m in messages]
+    matched = [args for args in matched if args[2]]
+    html = [app_module.render_health_response(tuple(symptoms), language, 'web')
+            for _, language, symptoms in matched]
+    located = []
+    for i in range(iterations):
+        lat, lng = traffic.location()
+        if lat is not None:
+            located.append((lat, lng, ['fever'], f"bench_{i}"))
+
+    return {
+        'micro.extract_symptoms': _time_calls(chatbot.extract_symptoms, [(m,) for m in messages]),
+        'micro.get_health_response': _time_calls(chatbot.get_health_response, matched),
+        # Uncached render, what a new symptom/language/channel combination costs
+        'micro.render_health_response_uncached': _time_calls(
+            app_module.render_health_response.__wrapped__,
+            [(tuple(symptoms), language, 'whatsapp') for _, language, symptoms in matched]),
+        'micro.html_to_text': _time_calls(app_module.html_to_text, [(h,) for h in html]),
+        'micro.process_location_data': _time_calls(chatbot.process_location_data, located),
+    }
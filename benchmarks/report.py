@@ -0,0 +1,78 @@
+"""Latency summaries and JSON baseline comparison."""
+import json
+import platform
+import sys
+import time
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies, elapsed):
+    """Latencies in seconds -> p50/p95/p99 in ms plus throughput."""
+    values = sorted(latencies)
+    return {
+        'count': len(values),
+        'p50_ms': round(percentile(values, 0.50) * 1000, 4),
+        'p95_ms': round(percentile(values, 0.95) * 1000, 4),
+        'p99_ms': round(percentile(values, 0.99) * 1000, 4),
+        'throughput_per_s': round(len(values) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def new_report(config):
+    return {
+        'meta': {
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'config': config,
+        },
+        'results': {},
+    }
+
+
+def format_report(report):
+    lines = []
+    for name, result in report['results'].items():
+        if 'p50_ms' in result:
+            lines.append(f"{name:<40} p50 {result['p50_ms']:>9.3f} ms  p95 {result['p95_ms']:>9.3f} ms  "
+                         f"p99 {result['p99_ms']:>9.3f} ms  {result['throughput_per_s']:>10.1f}/s")
+        else:
+            lines.append(f"{name:<40} " + '  '.join(f"{key} {value}" for key, value in result.items()))
+    return '\n'.join(lines)
+
+
+def save(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(report, baseline, tolerance=0.2, min_delta_ms=0.05):
+    """Return regression messages against a baseline report.
+
+    p95 fails when it is more than tolerance slower and at least
+    min_delta_ms slower, so sub-microsecond jitter in the microbenchmarks is
+    ignored. Throughput is only checked for the load runs.
+    """
+    regressions = []
+    for name, result in report['results'].items():
+        old = baseline.get('results', {}).get(name)
+        if not old or 'p95_ms' not in result or 'p95_ms' not in old:
+            continue
+        if (result['p95_ms'] > old['p95_ms'] * (1 + tolerance)
+                and result['p95_ms'] - old['p95_ms'] >= min_delta_ms):
+            regressions.append(f"{name}: p95 {old['p95_ms']} -> {result['p95_ms']} ms")
+        if (name.startswith('load.') and old['throughput_per_s']
+                and result['throughput_per_s'] < old['throughput_per_s'] * (1 - tolerance)):
+            regressions.append(f"{name}: throughput {old['throughput_per_s']} -> {result['throughput_per_s']}/s")
+    return regressions
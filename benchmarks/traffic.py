@@ -0,0 +1,70 @@
+"""Seeded synthetic traffic: English/Hindi messages and clustered locations."""
+import random
+
+ENGLISH = (
+    "I have fever", "fever and cough since yesterday", "bad headache today",
+    "my child has a cough and fever", "when is the next vaccination camp",
+    "I have a sore throat and headache", "feeling feverish with body pain",
+)
+HINDI = (
+    "मुझे बुखार है", "खांसी और बुखार है", "सिर दर्द हो रहा है",
+    "बच्चे को खांसी है", "टीका कब लगेगा", "गले में दर्द और बुखार",
+)
+# No symptom keywords; these exercise the LLM fallback
+UNMATCHED = ("what should I eat to stay healthy", "is it safe to travel", "क्या पानी उबालना चाहिए")
+
+# Outbreak hotspots; most located traffic lands near one of them
+CLUSTERS = ((28.6139, 77.2090), (19.0760, 72.8777), (12.9716, 77.5946))
+
+
+class TrafficGenerator:
+    """Reproducible stream of chat requests for a given seed."""
+
+    def __init__(self, seed=42, hindi_share=0.35, unmatched_share=0.1, located_share=0.6,
+                 cluster_spread=0.02, users=500):
+        self.random = random.Random(seed)
+        self.hindi_share = hindi_share
+        self.unmatched_share = unmatched_share
+        self.located_share = located_share
+        self.cluster_spread = cluster_spread
+        self.users = users
+
+    def message(self):
+        roll = self.random.random()
+        if roll < self.unmatched_share:
+            return self.random.choice(UNMATCHED)
+        if roll < self.unmatched_share + self.hindi_share:
+            return self.random.choice(HINDI)
+        return self.random.choice(ENGLISH)
+
+    def location(self):
+        if self.random.random() >= self.located_share:
+            return None, None
+        lat, lng = self.random.choice(CLUSTERS)
+        return (round(self.random.gauss(lat, self.cluster_spread), 4),
+                round(self.random.gauss(lng, self.cluster_spread), 4))
+
+    def user(self):
+        return f"+9199{self.random.randrange(self.users):08d}"
+
+    def chat_payload(self):
+        lat, lng = self.location()
+        payload = {'message': self.message(), 'user_id': self.user()}
+        if lat is not None:
+            payload.update(lat=lat, lng=lng)
+        return payload
+
+    def webhook_form(self):
+        lat, lng = self.location()
+        body = self.message()
+        if lat is not None:
+            body = f"loc:{lat}:{lng}:{body}"
+        return {'Body': body, 'From': f"whatsapp:{self.user()}"}
+
+    def requests(self, count, webhook_share=0.5):
+        """Yield (path, kind, payload) tuples; kind is 'json' or 'form'."""
+        for _ in range(count):
+            if self.random.random() < webhook_share:
+                yield '/whatsapp_webhook', 'form', self.webhook_form()
+            else:
+                yield '/api/chat', 'json', self.chat_payload()
@@ -0,0 +1,206 @@
+"""Compile the knowledge base sources into the artifact the app reads.
+
+    python build_kb.py                             # knowledge/ -> knowledge.db
+    python build_kb.py knowledge extra.yaml --output /srv/kb/knowledge.db
+
+Each source file (.json, or .yaml/.yml when PyYAML is installed) holds one
+language:
+
+    {"language": "hi",
+     "labels": {"symptoms": "🔸 लक्षण", "important": "महत्वपूर्ण", ...},
+     "topics": {"fever": {"heading": "...", "synonyms": [...],
+                          "symptoms": "...", "treatment": "..."}}}
+
+Every topic key other than heading and synonyms is a section, shown in
+source order under the label of the same name. A language may be split
+across several files. Labels missing from a language are taken from the
+fallback language. Topics missing from it are answered in the fallback
+language at runtime.
+
+The output is replaced atomically, so running workers switch to it on
+their next reload check.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+
+from knowledge_base import FORMAT_VERSION, KB_FILE, SCHEMA, SOURCE_DIR
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_LANGUAGE = 'en'
+REQUIRED_LABELS = ('important', 'escalation', 'no_match')
+SOURCE_EXTENSIONS = ('.json', '.yaml', '.yml')
+
+
+def source_files(paths):
+    """Expand directories into their source files, sorted by name."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.endswith(SOURCE_EXTENSIONS)
+            ))
+        else:
+            files.append(path)
+    return files
+
+
+def load_source(path):
+    with open(path, encoding='utf-8') as f:
+        if path.endswith('.json'):
+            return json.load(f)
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError(f"{path}: install PyYAML (pip install pyyaml) to build from YAML sources")
+        return yaml.safe_load(f)
+
+
+def compile_sources(documents, fallback_language=FALLBACK_LANGUAGE):
+    """Validate and merge (path, document) pairs into {'topics', 'labels', 'entries', 'phrases'}."""
+    topics = []  # topic names in first-seen order
+    labels = {}  # language -> {key: value}
+    entries = {}  # language -> {topic: (heading, [[key, text], ...])}
+    phrases = {}  # (phrase, language) -> topic
+    owner = {}  # phrase -> topic, across languages
+
+    for path, doc in documents:
+        language = doc.get('language')
+        if not language:
+            raise ValueError(f"{path}: missing 'language'")
+        labels.setdefault(language, {}).update(doc.get('labels', {}))
+        by_topic = entries.setdefault(language, {})
+
+        for topic, entry in doc.get('topics', {}).items():
+            if topic in by_topic:
+                raise ValueError(f"{path}: topic '{topic}' is defined twice for '{language}'")
+            if 'heading' not in entry:
+                raise ValueError(f"{path}: topic '{topic}' has no heading")
+            sections = [[key, text] for key, text in entry.items() if key not in ('heading', 'synonyms')]
+            if not sections:
+                raise ValueError(f"{path}: topic '{topic}' has no sections")
+            by_topic[topic] = (entry['heading'], sections)
+            if topic not in topics:
+                topics.append(topic)
+
+            for phrase in entry.get('synonyms', []):
+                phrase = phrase.strip().lower()
+                if owner.setdefault(phrase, topic) != topic:
+                    raise ValueError(f"{path}: synonym '{phrase}' is used by both '{owner[phrase]}' and '{topic}'")
+                phrases[(phrase, language)] = topic
+
+    if fallback_language not in entries:
+        raise ValueError(f"No sources for the fallback language '{fallback_language}'")
+    missing = [topic for topic in topics if topic not in entries[fallback_language]]
+    if missing:
+        raise ValueError(f"Topics missing from '{fallback_language}': {', '.join(missing)}")
+
+    fallback_labels = labels[fallback_language]
+    for language, by_topic in entries.items():
+        needed = set(REQUIRED_LABELS)
+        for _, sections in by_topic.values():
+            needed.update(key for key, _ in sections)
+        for key in sorted(needed - set(labels[language])):
+            if key not in fallback_labels:
+                raise ValueError(f"No label '{key}' for '{language}' or '{fallback_language}'")
+            if language != fallback_language:
+                logger.warning(f"⚠️ '{language}' has no label '{key}', using the '{fallback_language}' one")
+            labels[language][key] = fallback_labels[key]
+
+    return {'topics': topics, 'labels': labels, 'entries': entries, 'phrases': phrases}
+
+
+def content_version(compiled):
+    """Short hash of the compiled content; unchanged sources give the same version."""
+    canonical = json.dumps({
+        'topics': compiled['topics'],
+        'labels': compiled['labels'],
+        'entries': compiled['entries'],
+        'phrases': sorted(f"{phrase}\t{language}\t{topic}" for (phrase, language), topic in compiled['phrases'].items()),
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(f"{FORMAT_VERSION}:{canonical}".encode('utf-8')).hexdigest()[:12]
+
+
+def write_artifact(compiled, output, fallback_language=FALLBACK_LANGUAGE):
+    """Write compiled into a temporary file next to output, then move it into place."""
+    version = content_version(compiled)
+    directory = os.path.dirname(os.path.abspath(output))
+    fd, tmp_path = tempfile.mkstemp(prefix='.knowledge-', suffix='.db', dir=directory)
+    os.close(fd)
+    try:
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.execute("PRAGMA journal_mode=OFF")
+            for statement in SCHEMA:
+                conn.execute(statement)
+            topic_ids = {topic: i for i, topic in enumerate(compiled['topics'], 1)}
+            conn.executemany("INSERT INTO topics (id, name) VALUES (?, ?)",
+                             [(i, topic) for topic, i in topic_ids.items()])
+            conn.executemany("INSERT INTO phrases (phrase, language, topic_id) VALUES (?, ?, ?)",
+                             [(phrase, language, topic_ids[topic])
+                              for (phrase, language), topic in compiled['phrases'].items()])
+            conn.executemany("INSERT INTO labels (language, key, value) VALUES (?, ?, ?)",
+                             [(language, key, value)
+                              for language, labels in compiled['labels'].items()
+                              for key, value in labels.items()])
+            conn.executemany("INSERT INTO entries (language, topic_id, heading, sections) VALUES (?, ?, ?, ?)",
+                             [(language, topic_ids[topic], heading,
+                               json.dumps(sections, ensure_ascii=False, separators=(',', ':')))
+                              for language, by_topic in compiled['entries'].items()
+                              for topic, (heading, sections) in by_topic.items()])
+            conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", [
+                ('format', str(FORMAT_VERSION)),
+                ('version', version),
+                ('fallback_language', fallback_language),
+                ('languages', ','.join(sorted(compiled['entries']))),
+            ])
+            conn.commit()
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, output)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return version
+
+
+def build(sources, output=KB_FILE, fallback_language=FALLBACK_LANGUAGE):
+    """Compile the source files and directories into output; return the version."""
+    files = source_files(sources)
+    if not files:
+        raise ValueError(f"No knowledge base sources in {', '.join(sources)}")
+    compiled = compile_sources([(path, load_source(path)) for path in files], fallback_language)
+    version = write_artifact(compiled, output, fallback_language)
+    logger.info(f"📚 Built {output} version {version}: {len(compiled['topics'])} topics, "
+                f"{len(compiled['phrases'])} synonyms, languages {','.join(sorted(compiled['entries']))}")
+    return version
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description="Compile the health knowledge base")
+    parser.add_argument('sources', nargs='*', default=[SOURCE_DIR], help="Source files or directories")
+    parser.add_argument('--output', default=os.environ.get('KNOWLEDGE_BASE_PATH', KB_FILE))
+    parser.add_argument('--fallback-language', default=FALLBACK_LANGUAGE)
+    args = parser.parse_args()
+
+    try:
+        build(args.sources, args.output, args.fallback_language)
+    except (OSError, ValueError) as e:
+        logger.error(f"❌ {e}")
+        return 1
+    print(f"💾 {os.path.getsize(args.output)} bytes")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,190 @@
+import sqlite3
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Applied to every pooled connection. WAL lets readers run alongside the single
+# writer, and synchronous=NORMAL is durable across app crashes in WAL mode.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=134217728",
+)
+
+
+def utc_day_range(day=None):
+    """Half-open [start, end) timestamp strings covering one UTC day.
+
+    Comparing the timestamp column against these lets SQLite use an index,
+    unlike date(timestamp) = date('now').
+    """
+    if day is None:
+        day = datetime.now(timezone.utc).date()
+    start = datetime(day.year, day.month, day.day)
+    return start.strftime('%Y-%m-%d %H:%M:%S'), (start + timedelta(days=1)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections shared by the request threads.
+
+    Connections are checked out for the duration of one read or one
+    transaction and handed back afterwards, so a request never pays
+    connection setup and readers never wait on a Python-level lock.
+    """
+
+    def __init__(self, path, max_size=8, timeout=10.0):
+        self.path = path
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._watcher_lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.timeout,
+            isolation_level=None,  # explicit BEGIN/COMMIT below
+            check_same_thread=False,
+        )
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.max_size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError("Timed out waiting for a database connection")
+
+    def _release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        start = time.perf_counter()
+        conn = self._acquire()
+        metrics.observe('db_pool_wait_seconds', time.perf_counter() - start,
+                        'Time spent waiting to check out a pooled connection')
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Run a block of writes as one IMMEDIATE transaction."""
+        with self.connection() as conn:
+            start = time.perf_counter()
+            conn.execute("BEGIN IMMEDIATE")
+            metrics.observe('db_lock_wait_seconds', time.perf_counter() - start,
+                            'Time spent waiting for the SQLite write lock')
+            try:
+                yield conn
+            except Exception:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    def execute(self, sql, params=()):
+        """Run a single write statement in its own transaction and return the cursor."""
+        with self.transaction() as conn:
+            return conn.execute(sql, params)
+
+    def fetchall(self, sql, params=()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def fetchone(self, sql, params=()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def data_version(self):
+        """Counter that changes whenever any connection commits a write.
+
+        Read from a dedicated connection that never writes, so commits from
+        the pool and from other processes both show up. No table is read.
+        """
+        with self._watcher_lock:
+            if self._watcher is None:
+                self._watcher = sqlite3.connect(self.path, timeout=self.timeout,
+                                                isolation_level=None, check_same_thread=False)
+            return self._watcher.execute("PRAGMA data_version").fetchone()[0]
+
+    def stats(self):
+        with self._lock:
+            return {'open': self._created, 'idle': self._idle.qsize()}
+
+    def close(self):
+        with self._watcher_lock:
+            if self._watcher is not None:
+                self._watcher.close()
+                self._watcher = None
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+def lease_owner():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def acquire_lease(pool, name, ttl, owner=None):
+    """Take or renew the named lease for ttl seconds; return False if another owner holds it.
+
+    Used to run a background job in one process out of many workers. A
+    holder that dies loses the lease once ttl runs out.
+    """
+    owner = owner or lease_owner()
+    now = time.time()
+    with pool.transaction() as conn:
+        return conn.execute("""
+            INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+            WHERE leases.owner = excluded.owner OR leases.expires_at < ?
+        """, (name, owner, now + ttl, now)).rowcount == 1
+
+
+def release_lease(pool, name, owner=None):
+    pool.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner or lease_owner()))
@@ -0,0 +1,231 @@
+"""Streaming NDJSON/CSV extracts of interactions and alerts.
+
+Rows are read through a dedicated read-only connection with fetchmany(), so
+the export sees one consistent snapshot and memory stays flat whatever its
+size. Output is produced chunk by chunk and gzipped on the fly when asked.
+Interactions are exported without user_phone. Rows that retention.py has
+archived are included from interaction_summaries, with message and response
+left empty, so region and date extracts keep every report.
+
+    python exporter.py interactions --start 2024-01-01 --end 2024-02-01 \\
+        --bbox 12.8,77.4,13.1,77.8 --symptom fever --format csv --gzip -o fever.csv.gz
+"""
+import argparse
+import csv
+import io
+import json
+import re
+import sqlite3
+import sys
+import zlib
+
+from pagination import parse_since
+
+FETCH_SIZE = 500
+CHUNK_BYTES = 64 * 1024
+
+INTERACTION_COLUMNS = ('id', 'timestamp', 'language', 'symptoms', 'location_lat', 'location_lng',
+                       'message', 'response')
+ALERT_COLUMNS = ('id', 'timestamp', 'alert_type', 'location', 'symptoms_count', 'severity', 'status',
+                 'updated_at')
+
+LOCATION_RE = re.compile(r'Lat:\s*(-?[\d.]+),\s*Lng:\s*(-?[\d.]+)')
+
+
+class ExportFilters:
+    """Validated export filters; every field is optional."""
+
+    def __init__(self, start=None, end=None, bbox=None, symptom=None, language=None):
+        self.start = parse_since(start) if start else None
+        self.end = parse_since(end) if end else None
+        self.bbox = parse_bbox(bbox) if isinstance(bbox, str) else bbox
+        self.symptom = symptom.strip().lower() if symptom else None
+        self.language = language or None
+
+    @classmethod
+    def from_args(cls, args):
+        return cls(args.get('start'), args.get('end'), args.get('bbox'),
+                   args.get('symptom'), args.get('language'))
+
+
+def parse_bbox(value):
+    """'min_lat,min_lng,max_lat,max_lng' -> tuple of floats."""
+    try:
+        min_lat, min_lng, max_lat, max_lng = (float(part) for part in value.split(','))
+    except ValueError:
+        raise ValueError("bbox must be min_lat,min_lng,max_lat,max_lng")
+    if min_lat > max_lat or min_lng > max_lng:
+        raise ValueError("bbox minimums must not exceed maximums")
+    return min_lat, min_lng, max_lat, max_lng
+
+
+def _time_clauses(filters, clauses, params):
+    # Half-open [start, end) so it can use the timestamp index
+    if filters.start:
+        clauses.append("timestamp >= ?")
+        params.append(filters.start)
+    if filters.end:
+        clauses.append("timestamp < ?")
+        params.append(filters.end)
+
+
+def interactions_query(filters):
+    clauses, params = [], []
+    _time_clauses(filters, clauses, params)
+    if filters.bbox:
+        clauses.append("location_lat BETWEEN ? AND ? AND location_lng BETWEEN ? AND ?")
+        min_lat, min_lng, max_lat, max_lng = filters.bbox
+        params += [min_lat, max_lat, min_lng, max_lng]
+    if filters.symptom:
+        # symptoms is stored comma-joined; pad it so 'flu' does not match 'influenza'
+        clauses.append("(',' || symptoms || ',') LIKE ?")
+        params.append(f"%,{filters.symptom},%")
+    if filters.language:
+        clauses.append("language = ?")
+        params.append(filters.language)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    # Summaries keep the ids of the rows they replaced, so the two never overlap
+    summary_columns = ', '.join('NULL' if column in ('message', 'response') else column
+                                for column in INTERACTION_COLUMNS)
+    return (f"SELECT {', '.join(INTERACTION_COLUMNS)} FROM user_interactions {where} "
+            f"UNION ALL SELECT {summary_columns} FROM interaction_summaries {where} "
+            f"ORDER BY id"), params + params
+
+
+def alerts_query(filters):
+    if filters.symptom or filters.language:
+        raise ValueError("alerts can only be filtered by date range and bbox")
+    clauses, params = [], []
+    _time_clauses(filters, clauses, params)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return f"SELECT {', '.join(ALERT_COLUMNS)} FROM government_alerts {where} ORDER BY id", params
+
+
+def _alert_in_bbox(row, bbox):
+    # Alerts only keep their location as 'Lat: x, Lng: y' text
+    match = LOCATION_RE.search(row['location'] or '')
+    if not match:
+        return False
+    lat, lng = float(match.group(1)), float(match.group(2))
+    return bbox[0] <= lat <= bbox[2] and bbox[1] <= lng <= bbox[3]
+
+
+EXPORTS = {
+    'interactions': (INTERACTION_COLUMNS, interactions_query, None),
+    'alerts': (ALERT_COLUMNS, alerts_query, _alert_in_bbox),
+}
+
+
+def open_readonly(path):
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+
+
+def iter_rows(conn, kind, filters):
+    """Yield export rows as dicts, FETCH_SIZE at a time."""
+    columns, build_query, row_filter = EXPORTS[kind]
+    sql, params = build_query(filters)
+    cursor = conn.execute(sql, params)
+    while True:
+        batch = cursor.fetchmany(FETCH_SIZE)
+        if not batch:
+            break
+        for values in batch:
+            row = dict(zip(columns, values))
+            if row_filter and filters.bbox and not row_filter(row, filters.bbox):
+                continue
+            yield row
+
+
+def iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def iter_csv(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= CHUNK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _batched(pieces):
+    """Join small text pieces into ~CHUNK_BYTES byte chunks."""
+    chunk, size = [], 0
+    for piece in pieces:
+        data = piece.encode('utf-8')
+        chunk.append(data)
+        size += len(data)
+        if size >= CHUNK_BYTES:
+            yield b''.join(chunk)
+            chunk, size = [], 0
+    if chunk:
+        yield b''.join(chunk)
+
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 writes a gzip header
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export(db_path, kind, filters, fmt='ndjson', compress=False):
+    """Generator of bytes for one export.
+
+    Filters are checked before the first chunk is produced, so bad input
+    raises ValueError from this call rather than mid-stream.
+    """
+    if kind not in EXPORTS:
+        raise ValueError(f"unknown export {kind!r}")
+    if fmt not in ('ndjson', 'csv'):
+        raise ValueError("format must be ndjson or csv")
+    EXPORTS[kind][1](filters)
+
+    def generate():
+        conn = open_readonly(db_path)
+        try:
+            rows = iter_rows(conn, kind, filters)
+            pieces = iter_csv(rows, EXPORTS[kind][0]) if fmt == 'csv' else iter_ndjson(rows)
+            chunks = _batched(pieces)
+            yield from gzip_stream(chunks) if compress else chunks
+        finally:
+            conn.close()
+
+    return generate()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export interactions or alerts")
+    parser.add_argument('kind', choices=sorted(EXPORTS))
+    parser.add_argument('--db', default='health_chatbot.db', help="SQLite database path")
+    parser.add_argument('--format', choices=('ndjson', 'csv'), default='ndjson')
+    parser.add_argument('--start', help="Inclusive UTC start, YYYY-MM-DD[ HH:MM:SS]")
+    parser.add_argument('--end', help="Exclusive UTC end, YYYY-MM-DD[ HH:MM:SS]")
+    parser.add_argument('--bbox', help="min_lat,min_lng,max_lat,max_lng")
+    parser.add_argument('--symptom')
+    parser.add_argument('--language')
+    parser.add_argument('--gzip', action='store_true', help="Compress the output")
+    parser.add_argument('-o', '--output', default='-', help="Output file, - for stdout")
+    args = parser.parse_args()
+
+    try:
+        filters = ExportFilters(args.start, args.end, args.bbox, args.symptom, args.language)
+        chunks = export(args.db, args.kind, filters, args.format, args.gzip)
+    except ValueError as e:
+        parser.error(str(e))
+
+    out = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb')
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
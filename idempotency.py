@@ -0,0 +1,137 @@
+import logging
+import time
+from collections import OrderedDict
+from threading import Condition
+
+logger = logging.getLogger(__name__)
+
+# Outcomes of WebhookReceipts.begin()
+CLAIMED = 'claimed'
+DUPLICATE = 'duplicate'
+IN_FLIGHT = 'in_flight'
+
+SELECT_RECEIPT_SQL = "SELECT created_at, response FROM webhook_receipts WHERE message_sid = ?"
+
+
+class WebhookReceipts:
+    """Seen-set of Twilio MessageSids with the TwiML each one was answered with.
+
+    The first request for a sid claims it and does the work; a retry of a
+    finished sid gets the stored reply back with no side effects. A retry
+    that arrives while the first attempt is still running waits up to
+    wait_timeout for it. Claims live in an LRU of up to max_memory entries
+    backed by the webhook_receipts table, so retries routed to another
+    worker or arriving after a restart are recognised too. Receipts expire
+    after ttl seconds; a claim whose worker died is taken over after
+    stale_after seconds.
+    """
+
+    EVICT_EVERY = 200
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, pool, ttl=24 * 3600, max_memory=10000, wait_timeout=10.0, stale_after=60.0):
+        self.pool = pool
+        self.ttl = ttl
+        self.max_memory = max_memory
+        self.wait_timeout = wait_timeout
+        self.stale_after = stale_after
+        self._memory = OrderedDict()  # sid -> (created_at, twiml or None while in flight)
+        self._changed = Condition()
+        self._claims = 0
+        self.duplicates = 0
+        self.in_flight_timeouts = 0
+
+    def begin(self, sid, now=None):
+        """Return (CLAIMED, None), (DUPLICATE, twiml) or (IN_FLIGHT, None) after waiting in vain."""
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            state, twiml = self._try_claim(sid, now or time.time())
+            if state != IN_FLIGHT:
+                if state == DUPLICATE:
+                    self.duplicates += 1
+                return state, twiml
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.in_flight_timeouts += 1
+                return IN_FLIGHT, None
+            # Woken at once for claims made in this process; others are polled
+            with self._changed:
+                self._changed.wait(min(remaining, self.POLL_INTERVAL))
+
+    def _try_claim(self, sid, now):
+        with self._changed:
+            entry = self._memory.get(sid)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._memory.move_to_end(sid)
+                if entry[1] is not None:
+                    return DUPLICATE, entry[1]
+
+        # The waiting poll only reads; the write lock is taken to claim
+        state = self._stored_state(sid, now, self.pool.fetchone(SELECT_RECEIPT_SQL, (sid,)))
+        if state is not None:
+            return state
+
+        with self.pool.transaction() as conn:
+            # Checked again under the lock: another worker may have claimed it since
+            state = self._stored_state(sid, now, conn.execute(SELECT_RECEIPT_SQL, (sid,)).fetchone())
+            if state is not None:
+                return state
+            # New, expired, or abandoned by a worker that died mid-request
+            conn.execute("""
+                INSERT OR REPLACE INTO webhook_receipts (message_sid, created_at, response)
+                VALUES (?, ?, NULL)
+            """, (sid, now))
+
+        self._remember(sid, now, None)
+        self._claims += 1
+        if self._claims % self.EVICT_EVERY == 0:
+            self.evict(now)
+        return CLAIMED, None
+
+    def _stored_state(self, sid, now, row):
+        """(DUPLICATE, twiml) or (IN_FLIGHT, None) for a stored receipt row, None if it can be claimed."""
+        if row is None:
+            return None
+        created_at, response = row
+        if response is not None and now - created_at < self.ttl:
+            self._remember(sid, created_at, response)
+            return DUPLICATE, response
+        if response is None and now - created_at < self.stale_after:
+            return IN_FLIGHT, None
+        return None
+
+    def complete(self, sid, twiml):
+        """Store the reply for a claimed sid so retries get it back."""
+        self.pool.execute("UPDATE webhook_receipts SET response = ? WHERE message_sid = ?", (twiml, sid))
+        with self._changed:
+            entry = self._memory.get(sid)
+            self._remember(sid, entry[0] if entry else time.time(), twiml)
+            self._changed.notify_all()
+
+    def release(self, sid):
+        """Drop a claim whose request failed so Twilio's retry is processed afresh."""
+        self.pool.execute("DELETE FROM webhook_receipts WHERE message_sid = ? AND response IS NULL", (sid,))
+        with self._changed:
+            entry = self._memory.get(sid)
+            if entry is not None and entry[1] is None:
+                del self._memory[sid]
+            self._changed.notify_all()
+
+    def _remember(self, sid, created_at, twiml):
+        with self._changed:
+            self._memory[sid] = (created_at, twiml)
+            self._memory.move_to_end(sid)
+            while len(self._memory) > self.max_memory:
+                self._memory.popitem(last=False)
+
+    def evict(self, now=None):
+        """Forget receipts older than ttl."""
+        cutoff = (now or time.time()) - self.ttl
+        with self._changed:
+            for sid in [sid for sid, (created_at, _) in self._memory.items() if created_at < cutoff]:
+                del self._memory[sid]
+        try:
+            self.pool.execute("DELETE FROM webhook_receipts WHERE created_at < ?", (cutoff,))
+        except Exception as e:
+            logger.error(f"❌ Webhook receipt eviction failed: {e}")
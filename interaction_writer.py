@@ -0,0 +1,155 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+from metrics import stage
+from stats_rollup import DEFAULT_LANGUAGE
+
+logger = logging.getLogger(__name__)
+
+INSERT_SQL = """
+    INSERT INTO user_interactions
+    (user_phone, message, response, language, location_lat, location_lng, symptoms, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_STOP = object()
+
+
+def utc_timestamp():
+    """Timestamp in the same format SQLite's CURRENT_TIMESTAMP produces."""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class InteractionWriter:
+    """Write-behind queue for user_interactions rows.
+
+    Request threads hand records to submit() and return immediately. A single
+    background thread groups them into one executemany transaction per
+    batch_size rows or flush_interval seconds, whichever comes first. When the
+    queue is full, submit() blocks for up to put_timeout seconds and then
+    writes the record itself, so producers slow down instead of losing rows.
+
+    on_batch(conn, batch), if given, runs inside the same transaction as the
+    insert, e.g. to keep rollup tables in step.
+    """
+
+    def __init__(self, pool, batch_size=200, flush_interval=0.5, max_queue=10000, put_timeout=2.0,
+                 on_batch=None):
+        self.pool = pool
+        self.on_batch = on_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.written = 0
+        self.failed = 0
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='interaction-writer', daemon=True)
+                self._thread.start()
+        return self
+
+    @staticmethod
+    def make_record(user_phone, message, response, language, lat=None, lng=None, symptoms=None):
+        if not isinstance(language, str) or not language:
+            language = DEFAULT_LANGUAGE
+        return (
+            user_phone, message, response, language, lat, lng,
+            ','.join(symptoms) if symptoms else None,
+            utc_timestamp(),
+        )
+
+    def submit(self, user_phone, message, response, language, lat=None, lng=None, symptoms=None):
+        record = self.make_record(user_phone, message, response, language, lat, lng, symptoms)
+        self.start()
+        try:
+            self._queue.put(record, timeout=self.put_timeout)
+        except queue.Full:
+            logger.warning("⚠️ Interaction queue full, writing synchronously")
+            self._write([record])
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def flush(self):
+        """Block until every record submitted so far has been written."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def close(self, timeout=10.0):
+        """Drain the queue and stop the background thread."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._write(batch)
+            for _ in range(len(batch) + stop):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def write_now(self, batch):
+        """Insert records from make_record() in one transaction, bypassing the queue."""
+        with stage('sqlite_insert_batch'), self.pool.transaction() as conn:
+            conn.executemany(INSERT_SQL, batch)
+            if self.on_batch:
+                self.on_batch(conn, batch)
+        self.written += len(batch)
+
+    def _write(self, batch):
+        try:
+            self.write_now(batch)
+            return
+        except Exception as e:
+            if len(batch) == 1:
+                self.failed += 1
+                logger.error(f"❌ Failed to write interaction: {e}")
+                return
+            logger.warning(f"⚠️ Batch of {len(batch)} interactions failed, retrying one by one: {e}")
+
+        # One bad record must not take the rest of its batch down with it
+        for record in batch:
+            try:
+                self.write_now([record])
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"❌ Dropped interaction from {record[0]}: {e}")
+
+
+def start_writer(pool, **kwargs):
+    writer = InteractionWriter(pool, **kwargs).start()
+    atexit.register(writer.close)
+    return writer
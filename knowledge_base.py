@@ -0,0 +1,239 @@
+"""Read side of the compiled knowledge base; build_kb.py writes it.
+
+The artifact is a small SQLite file opened read-only and memory-mapped. The
+symptom index (every synonym phrase -> topic) is read when the file is
+opened, because extracting symptoms needs all of it. Headings, sections and
+labels are read one language at a time on first use, so a worker that only
+ever answers in English and Hindi never loads the others.
+
+build_kb.py replaces the file atomically, and KnowledgeBase notices the new
+file within check_interval seconds and switches to it. Workers do not need
+a restart.
+"""
+import json
+import logging
+import os
+import sqlite3
+import time
+from threading import Lock
+
+from symptom_matcher import SymptomMatcher
+
+logger = logging.getLogger(__name__)
+
+# Bump when the table layout changes; readers refuse artifacts of another format
+FORMAT_VERSION = 1
+
+SCHEMA = (
+    "CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID",
+    "CREATE TABLE topics (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)",
+    # The symptom index; the matcher compiles it into one regex
+    """CREATE TABLE phrases (
+        phrase TEXT NOT NULL,
+        language TEXT NOT NULL,
+        topic_id INTEGER NOT NULL REFERENCES topics(id),
+        PRIMARY KEY (phrase, language)
+    ) WITHOUT ROWID""",
+    """CREATE TABLE labels (
+        language TEXT NOT NULL,
+        key TEXT NOT NULL,
+        value TEXT NOT NULL,
+        PRIMARY KEY (language, key)
+    ) WITHOUT ROWID""",
+    # sections is a JSON list of [label key, text] pairs in display order
+    """CREATE TABLE entries (
+        language TEXT NOT NULL,
+        topic_id INTEGER NOT NULL REFERENCES topics(id),
+        heading TEXT NOT NULL,
+        sections TEXT NOT NULL,
+        PRIMARY KEY (language, topic_id)
+    ) WITHOUT ROWID""",
+)
+
+KB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'knowledge.db')
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'knowledge')
+
+
+class LanguagePack:
+    """Labels and entries of one language, loaded together on first use."""
+
+    def __init__(self, labels, entries):
+        self.labels = labels
+        self.entries = entries  # topic -> (heading, [(label key, text), ...])
+
+
+class _Snapshot:
+    """One opened artifact. Replaced as a whole on reload."""
+
+    def __init__(self, path, preload=()):
+        self.conn = sqlite3.connect(f"file:{path}?mode=ro&immutable=1", uri=True, check_same_thread=False)
+        self.conn.execute("PRAGMA mmap_size=16777216")
+        meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+        if int(meta.get('format', 0)) != FORMAT_VERSION:
+            self.conn.close()
+            raise ValueError(
+                f"{path} has knowledge base format {meta.get('format')}, expected {FORMAT_VERSION}; "
+                f"rebuild it with build_kb.py"
+            )
+        self.version = meta['version']
+        self.fallback_language = meta['fallback_language']
+        self.languages = tuple(meta['languages'].split(','))
+
+        synonyms = {}
+        for name, language, phrase in self.conn.execute("""
+            SELECT t.name, p.language, p.phrase
+            FROM topics t JOIN phrases p ON p.topic_id = t.id
+            ORDER BY t.id
+        """):
+            synonyms.setdefault(name, {}).setdefault(language, []).append(phrase)
+        self.matcher = SymptomMatcher(synonyms)
+        self.packs = {}
+        self.lock = Lock()
+        for language in preload:
+            self.pack(language)
+
+    def pack(self, language):
+        if language not in self.languages:
+            language = self.fallback_language
+        pack = self.packs.get(language)
+        if pack is not None:
+            return pack
+        with self.lock:
+            if language not in self.packs:
+                labels = dict(self.conn.execute(
+                    "SELECT key, value FROM labels WHERE language = ?", (language,)
+                ))
+                entries = {
+                    name: (heading, [tuple(section) for section in json.loads(sections)])
+                    for name, heading, sections in self.conn.execute("""
+                        SELECT t.name, e.heading, e.sections
+                        FROM entries e JOIN topics t ON t.id = e.topic_id
+                        WHERE e.language = ?
+                    """, (language,))
+                }
+                self.packs[language] = LanguagePack(labels, entries)
+                logger.info(f"📚 Loaded {len(entries)} knowledge base entries for '{language}'")
+            return self.packs[language]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class KnowledgeBase:
+    """Symptom extraction and per-language health content from a build_kb.py artifact.
+
+    The preload languages are loaded up front, and again before a reloaded
+    file is swapped in; the rest load on first use. Every call checks at most
+    once per check_interval seconds whether the file was replaced, and reloads
+    it if so. A failed reload keeps the old content. on_reload(version) is
+    called after a successful reload.
+    """
+
+    def __init__(self, path=KB_FILE, preload=(), check_interval=5.0, on_reload=None):
+        self.path = path
+        self.preload = tuple(preload)
+        self.check_interval = check_interval
+        self.on_reload = on_reload
+        self._snapshot = _Snapshot(path, self.preload)
+        self._stat = self._file_id()
+        self._next_check = time.monotonic() + check_interval
+        self._reload_lock = Lock()
+        self.reloads = 0
+        logger.info(f"📚 Knowledge base {self._snapshot.version}: {len(self.topics)} topics, "
+                    f"languages {','.join(self._snapshot.languages)}")
+
+    def _file_id(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _current(self):
+        if self.check_interval and time.monotonic() >= self._next_check:
+            self.maybe_reload()
+        return self._snapshot
+
+    def maybe_reload(self):
+        """Reload if build_kb.py replaced the file; return True if the content changed."""
+        if not self._reload_lock.acquire(blocking=False):
+            return False  # another thread is already checking
+        try:
+            self._next_check = time.monotonic() + self.check_interval
+            file_id = self._file_id()
+            if file_id is None or file_id == self._stat:
+                return False
+            # Recorded first so a broken file is reported once, not on every check
+            self._stat = file_id
+            try:
+                snapshot = _Snapshot(self.path, self.preload)
+            except (sqlite3.Error, ValueError, KeyError) as e:
+                logger.error(f"❌ Knowledge base reload failed, keeping {self._snapshot.version}: {e}")
+                return False
+            if snapshot.version == self._snapshot.version:
+                snapshot.close()
+                return False
+            old, self._snapshot = self._snapshot, snapshot
+            self.reloads += 1
+            logger.info(f"🔄 Knowledge base reloaded: {old.version} -> {snapshot.version}")
+        finally:
+            self._reload_lock.release()
+        # The old snapshot is not closed: requests may still be reading from it,
+        # and its connection closes once the last of them drops it
+        if self.on_reload:
+            self.on_reload(snapshot.version)
+        return True
+
+    @property
+    def version(self):
+        return self._current().version
+
+    @property
+    def topics(self):
+        return self._snapshot.matcher.symptoms
+
+    @property
+    def languages(self):
+        return self._snapshot.languages
+
+    def loaded_languages(self):
+        return sorted(self._snapshot.packs)
+
+    def extract(self, message):
+        """Return the topics mentioned in message, in knowledge-base order."""
+        return self._current().matcher.extract(message)
+
+    def pack(self, language):
+        """The LanguagePack for language, or the fallback language if it has none."""
+        return self._current().pack(language)
+
+    def entry(self, topic, language):
+        """(heading, sections, labels) for topic, falling back to the default language."""
+        snapshot = self._current()
+        pack = snapshot.pack(language)
+        if topic not in pack.entries:
+            pack = snapshot.pack(snapshot.fallback_language)
+        entry = pack.entries.get(topic)
+        if entry is None:
+            return None
+        return entry[0], entry[1], pack.labels
+
+    def label(self, language, key):
+        snapshot = self._current()
+        value = snapshot.pack(language).labels.get(key)
+        if value is None:
+            value = snapshot.pack(snapshot.fallback_language).labels[key]
+        return value
+
+    def close(self):
+        self._snapshot.close()
+
+
+def open_knowledge_base(path=KB_FILE, source=SOURCE_DIR, **kwargs):
+    """Open path, compiling it from source first if it has not been built yet."""
+    if not os.path.exists(path):
+        import build_kb
+        logger.info(f"🛠️ {path} not found, building it from {source}")
+        build_kb.build([source], path)
+    return KnowledgeBase(path, **kwargs)
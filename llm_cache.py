@@ -0,0 +1,120 @@
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r'[^\w\sऀ-ॿ]')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_message(message):
+    """Fold case, punctuation and spacing so near-duplicate questions share a key."""
+    text = _PUNCTUATION.sub(' ', message.lower())
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+def cache_key(message, language):
+    return hashlib.sha1(f"{language}:{normalize_message(message)}".encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier cache for LLM replies keyed by normalized message and language.
+
+    The memory tier is an LRU of up to max_memory entries. Behind it, the
+    llm_cache table keeps up to max_rows entries across restarts and is
+    shared by all workers. Entries older than ttl seconds are treated as
+    misses and purged during periodic eviction.
+    """
+
+    EVICT_EVERY = 100
+
+    def __init__(self, pool, max_memory=1024, max_rows=50000, ttl=7 * 24 * 3600):
+        self.pool = pool
+        self.max_memory = max_memory
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._lock = Lock()
+        self._puts = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, message, language):
+        key = cache_key(message, language)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, response = entry
+                if now - created_at < self.ttl:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return response
+                del self._memory[key]
+
+        row = self.pool.fetchone(
+            "SELECT response, created_at FROM llm_cache WHERE key = ? AND created_at >= ?",
+            (key, now - self.ttl),
+        )
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        response, created_at = row
+        self.pool.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+        with self._lock:
+            self.disk_hits += 1
+            self._remember(key, created_at, response)
+        return response
+
+    def put(self, message, language, response):
+        key = cache_key(message, language)
+        now = time.time()
+        self.pool.execute("""
+            INSERT OR REPLACE INTO llm_cache (key, language, response, created_at, last_used)
+            VALUES (?, ?, ?, ?, ?)
+        """, (key, language, response, now, now))
+
+        with self._lock:
+            self._remember(key, now, response)
+            self._puts += 1
+            evict = self._puts % self.EVICT_EVERY == 0
+        if evict:
+            self.evict(now)
+
+    def _remember(self, key, created_at, response):
+        self._memory[key] = (created_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+
+    def evict(self, now=None):
+        """Drop expired rows, then the least recently used ones beyond max_rows."""
+        now = now if now is not None else time.time()
+        with self.pool.transaction() as conn:
+            conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+            excess = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_rows
+            if excess > 0:
+                conn.execute("""
+                    DELETE FROM llm_cache WHERE key IN (
+                        SELECT key FROM llm_cache ORDER BY last_used LIMIT ?
+                    )
+                """, (excess,))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                'memory_entries': len(self._memory),
+            }
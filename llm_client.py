@@ -0,0 +1,204 @@
+import logging
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from threading import BoundedSemaphore, Lock
+
+logger = logging.getLogger(__name__)
+
+
+class LLMClient:
+    """Interface for the language model behind the fallback replies."""
+
+    def generate(self, prompt):
+        """Return the reply text for prompt, or raise on failure."""
+        raise NotImplementedError
+
+    def warm_up(self):
+        """Do any slow one-off setup now rather than on the first call."""
+
+
+class GeminiClient(LLMClient):
+    """google-genai backend. Given only an api_key, the SDK (slow to import) is loaded on first use."""
+
+    def __init__(self, client=None, model="gemini-2.5-flash", api_key=None):
+        self.client = client
+        self.model = model
+        self.api_key = api_key
+        self._lock = Lock()
+
+    def _client(self):
+        if self.client is None:
+            with self._lock:
+                if self.client is None:
+                    from google import genai
+                    self.client = genai.Client(api_key=self.api_key)
+                    logger.info("✅ Gemini client ready")
+        return self.client
+
+    def warm_up(self):
+        self._client()
+
+    def generate(self, prompt):
+        response = self._client().models.generate_content(
+            model=self.model,
+            contents=[{"role": "user", "parts": [{"text": prompt}]}],
+        )
+        return response.text if response and hasattr(response, "text") else None
+
+
+class StubClient(LLMClient):
+    """Local stand-in for an upstream model, optionally slow or flaky."""
+
+    def __init__(self, reply="Please consult a doctor if your symptoms continue.",
+                 latency=0.0, failure_rate=0.0, seed=None):
+        self.reply = reply
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self.calls = 0
+
+    def generate(self, prompt):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise RuntimeError("stub upstream failure")
+        return self.reply
+
+
+class CircuitBreaker:
+    """Stops calling an upstream whose recent calls mostly fail or run slow.
+
+    The last `window` outcomes are kept. Once at least min_calls are recorded
+    and the failure rate reaches error_threshold, or the mean latency reaches
+    slow_threshold seconds, the breaker opens and rejects calls for
+    reset_timeout seconds. After that a single trial call is let through
+    (half-open); its outcome closes or re-opens the breaker.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, window=20, min_calls=5, error_threshold=0.5, slow_threshold=5.0,
+                 reset_timeout=30.0):
+        self.window = window
+        self.min_calls = min_calls
+        self.error_threshold = error_threshold
+        self.slow_threshold = slow_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_running = False
+            if self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record(self, success, latency):
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._trial_running = False
+                if success and latency < self.slow_threshold:
+                    self.state = self.CLOSED
+                    self._outcomes.clear()
+                    logger.info("✅ LLM circuit closed")
+                else:
+                    self._open()
+                return
+
+            self._outcomes.append((success, latency))
+            if len(self._outcomes) < self.min_calls:
+                return
+            failures = sum(1 for ok, _ in self._outcomes if not ok)
+            mean_latency = sum(lat for _, lat in self._outcomes) / len(self._outcomes)
+            if failures / len(self._outcomes) >= self.error_threshold or mean_latency >= self.slow_threshold:
+                self._open()
+
+    def _open(self):
+        if self.state != self.OPEN:
+            logger.warning("⚠️ LLM circuit opened, using rule-based replies")
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+
+
+class GuardedLLM:
+    """Runs LLM calls off the request thread with a deadline and a concurrency cap.
+
+    generate() returns None instead of raising whenever the reply cannot be
+    had in time: the breaker is open, max_concurrency calls are already in
+    flight, the call timed out, or the upstream failed. A timed-out call keeps
+    its slot until the upstream returns, so slow upstreams cannot pile up
+    more than max_concurrency threads.
+    """
+
+    def __init__(self, client, timeout=8.0, max_concurrency=4, breaker=None):
+        self.client = client
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self._slots = BoundedSemaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='llm')
+        self._stats_lock = Lock()
+        self.stats = {
+            'calls': 0,
+            'successes': 0,
+            'failures': 0,
+            'timeouts': 0,
+            'rejected_open': 0,
+            'rejected_busy': 0,
+        }
+
+    def warm_up(self):
+        self.client.warm_up()
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def generate(self, prompt):
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected_busy')
+            return None
+        if not self.breaker.allow():
+            self._slots.release()
+            self._count('rejected_open')
+            return None
+
+        self._count('calls')
+        started = time.monotonic()
+        future = self._executor.submit(self.client.generate, prompt)
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            text = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            self._count('timeouts')
+            self.breaker.record(False, self.timeout)
+            logger.warning(f"⚠️ LLM call timed out after {self.timeout}s")
+            return None
+        except Exception as e:
+            self._count('failures')
+            self.breaker.record(False, time.monotonic() - started)
+            logger.error(f"❌ LLM call failed: {e}")
+            return None
+
+        self._count('successes')
+        self.breaker.record(True, time.monotonic() - started)
+        return text
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,188 @@
+"""Per-stage latency histograms and a Prometheus text exposition.
+
+    with stage('twiml_build'):
+        ...
+
+    @timed('extract_symptoms')
+    def extract_symptoms(self, message):
+        ...
+
+Set METRICS_ENABLED=0 to switch the hooks off: timed() then returns the
+function untouched and stage() hands back one shared no-op context manager.
+Gauges and counters kept elsewhere are callbacks read only when /metrics
+is scraped.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+ENABLED = os.environ.get('METRICS_ENABLED', '1').lower() not in ('0', 'false', 'no')
+
+# Seconds; covers a regex match up to a slow LLM call
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and three additions under a lock."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+class Registry:
+    def __init__(self):
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._help = {}
+        self._gauges = []  # (name, help, type, callback)
+        self._lock = threading.Lock()
+
+    def histogram(self, name, help_text='', **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram())
+                self._help.setdefault(name, help_text)
+        return histogram
+
+    def gauge(self, name, help_text, callback, kind='gauge'):
+        """callback() returns a number, or a dict keyed by label tuples like (('tier', 'memory'),).
+
+        kind='counter' exposes a monotonically increasing value read the same way.
+        """
+        with self._lock:
+            self._gauges.append((name, help_text, kind, callback))
+
+    def render(self):
+        lines = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            gauges = list(self._gauges)
+
+        seen = set()
+        for (name, labels), histogram in histograms:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {self._help.get(name, '')}")
+                lines.append(f"# TYPE {name} histogram")
+            counts, total, count = histogram.snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {total}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+
+        for name, help_text, kind, callback in gauges:
+            try:
+                value = callback()
+            except Exception:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if isinstance(value, dict):
+                for labels, sample in sorted(value.items()):
+                    lines.append(f"{name}{_labels(labels)} {sample}")
+            else:
+                lines.append(f"{name} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = Registry()
+
+
+class _Timer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopTimer()
+
+STAGE_METRIC = 'chatbot_stage_seconds'
+STAGE_HELP = 'Time spent in each stage of the message pipeline'
+
+
+def stage(name):
+    """Context manager timing one pipeline stage into chatbot_stage_seconds."""
+    if not ENABLED:
+        return _NOOP
+    return _Timer(registry.histogram(STAGE_METRIC, STAGE_HELP, stage=name))
+
+
+def observe(metric, seconds, help_text='', **labels):
+    if ENABLED:
+        registry.histogram(metric, help_text, **labels).observe(seconds)
+
+
+def timed(name):
+    """Decorator form of stage(); a no-op wrapper is never installed when disabled."""
+    def decorate(func):
+        if not ENABLED:
+            return func
+        histogram = registry.histogram(STAGE_METRIC, STAGE_HELP, stage=name)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def gauge(name, help_text, callback, kind='gauge'):
+    registry.gauge(name, help_text, callback, kind)
+
+
+def render():
+    return registry.render()
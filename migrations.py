@@ -0,0 +1,241 @@
+"""Versioned schema migrations for health_chatbot.db.
+
+The applied version is kept in PRAGMA user_version. Each migration runs in
+its own transaction and bumps the version when it commits. The early steps
+use IF NOT EXISTS and guarded ALTERs, so databases created before this
+module existed are adopted as they are.
+
+    python migrations.py            # apply pending migrations
+    python migrations.py --check    # also verify the hot queries use indexes
+"""
+import argparse
+import logging
+import sqlite3
+
+import stats_rollup
+from database import utc_day_range
+
+logger = logging.getLogger(__name__)
+
+
+def _base_tables(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS user_interactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_phone TEXT,
+            message TEXT,
+            response TEXT,
+            language TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            location_lat REAL,
+            location_lng REAL,
+            symptoms TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS government_alerts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            alert_type TEXT,
+            location TEXT,
+            symptoms_count INTEGER,
+            severity TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            status TEXT DEFAULT 'ACTIVE'
+        )
+    """)
+
+
+def _outbreak_events(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS outbreak_events (
+            id INTEGER PRIMARY KEY,
+            timestamp REAL NOT NULL,
+            lat REAL NOT NULL,
+            lng REAL NOT NULL,
+            symptoms TEXT NOT NULL,
+            user_phone TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_outbreak_events_timestamp ON outbreak_events(timestamp)")
+
+
+def _alert_lifecycle(conn):
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(government_alerts)")}
+    if 'cell_key' not in columns:
+        conn.execute("ALTER TABLE government_alerts ADD COLUMN cell_key TEXT")
+    if 'updated_at' not in columns:
+        conn.execute("ALTER TABLE government_alerts ADD COLUMN updated_at DATETIME")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_government_alerts_cell ON government_alerts(cell_key, status)")
+
+
+def _llm_cache(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS llm_cache (
+            key TEXT PRIMARY KEY,
+            language TEXT,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache(last_used)")
+
+
+def _rollups(conn):
+    stats_rollup.create_tables(conn)
+
+
+def _time_range_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_user_interactions_timestamp ON user_interactions(timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_user_interactions_language_timestamp ON user_interactions(language, timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_user_interactions_user_phone ON user_interactions(user_phone)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_government_alerts_timestamp ON government_alerts(timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_government_alerts_status ON government_alerts(status)")
+
+
+def _interaction_summaries(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS interaction_summaries (
+            id INTEGER PRIMARY KEY,
+            timestamp DATETIME NOT NULL,
+            language TEXT,
+            symptoms TEXT,
+            location_lat REAL,
+            location_lng REAL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_interaction_summaries_timestamp ON interaction_summaries(timestamp)")
+
+
+def _webhook_receipts(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS webhook_receipts (
+            message_sid TEXT PRIMARY KEY,
+            created_at REAL NOT NULL,
+            response TEXT
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_webhook_receipts_created_at ON webhook_receipts(created_at)")
+
+
+def _leases(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS leases (
+            name TEXT PRIMARY KEY,
+            owner TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        ) WITHOUT ROWID
+    """)
+
+
+MIGRATIONS = [
+    (1, "base tables", _base_tables),
+    (2, "shared outbreak window", _outbreak_events),
+    (3, "alert lifecycle columns", _alert_lifecycle),
+    (4, "LLM response cache", _llm_cache),
+    (5, "dashboard rollups", _rollups),
+    (6, "time-range and lookup indexes", _time_range_indexes),
+    (7, "archived interaction summaries", _interaction_summaries),
+    (8, "webhook idempotency receipts", _webhook_receipts),
+    (9, "background job leases", _leases),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Apply every migration newer than the database's user_version."""
+    if conn.in_transaction:
+        conn.commit()
+
+    for version, description, apply in MIGRATIONS:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-read under the write lock; another worker may have got here first
+            if current_version(conn) >= version:
+                conn.rollback()
+                continue
+            apply(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+        logger.info(f"🗄️ Applied migration {version}: {description}")
+    return current_version(conn)
+
+
+# Hot queries and the index each one must use.
+def _query_plan_checks():
+    start, end = utc_day_range()
+    return [
+        ("SELECT * FROM government_alerts ORDER BY timestamp DESC LIMIT 20", (),
+         'idx_government_alerts_timestamp'),
+        ("SELECT COUNT(*) FROM government_alerts WHERE timestamp >= ? AND timestamp < ? AND status != ?",
+         (start, end, 'SUPERSEDED'), 'idx_government_alerts_timestamp'),
+        ("SELECT * FROM government_alerts WHERE status = ? ORDER BY id DESC LIMIT 20", ('ACTIVE',),
+         'idx_government_alerts_status'),
+        ("SELECT * FROM user_interactions ORDER BY timestamp DESC LIMIT 20", (),
+         'idx_user_interactions_timestamp'),
+        ("SELECT COUNT(*) FROM user_interactions WHERE timestamp >= ? AND timestamp < ?", (start, end),
+         'idx_user_interactions_timestamp'),
+        ("SELECT COUNT(*) FROM user_interactions WHERE language = ? AND timestamp >= ? AND timestamp < ?",
+         ('en', start, end), 'idx_user_interactions_language_timestamp'),
+        ("SELECT * FROM user_interactions WHERE user_phone = ?", ('+910000000000',),
+         'idx_user_interactions_user_phone'),
+        ("SELECT * FROM user_interactions WHERE id > ? ORDER BY id LIMIT 20", (0,),
+         'INTEGER PRIMARY KEY'),
+        ("SELECT MIN(+id) FROM user_interactions WHERE timestamp >= ?", (start,),
+         'idx_user_interactions_timestamp'),
+        ("SELECT * FROM government_alerts WHERE id > ? ORDER BY id LIMIT 20", (0,),
+         'INTEGER PRIMARY KEY'),
+        ("SELECT MIN(+id) FROM government_alerts WHERE timestamp >= ?", (start,),
+         'idx_government_alerts_timestamp'),
+    ]
+
+
+def check_query_plans(conn):
+    """Return (sql, plan) for every hot query that does not use its expected index."""
+    failures = []
+    for sql, params, index in _query_plan_checks():
+        plan = ' | '.join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+        if index not in plan:
+            failures.append((sql, plan))
+    return failures
+
+
+APP_TABLES = (
+    'user_interactions', 'government_alerts', 'outbreak_events', 'llm_cache', 'interaction_summaries',
+    'webhook_receipts', 'leases',
+) + stats_rollup.ROLLUP_TABLES
+
+
+def reset(conn):
+    """Drop every application table so migrate() rebuilds from scratch."""
+    for table in APP_TABLES:
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+    conn.execute("PRAGMA user_version = 0")
+    conn.commit()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Apply schema migrations")
+    parser.add_argument('--db', default='health_chatbot.db', help="SQLite database path")
+    parser.add_argument('--check', action='store_true', help="Verify hot queries use their indexes")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    print(f"🗄️ Schema version {migrate(conn)} (latest {LATEST_VERSION})")
+    if args.check:
+        failures = check_query_plans(conn)
+        for sql, plan in failures:
+            print(f"❌ {sql}\n   plan: {plan}")
+        if failures:
+            raise SystemExit(1)
+        print("✅ All hot queries use their indexes")
+    conn.close()
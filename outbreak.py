@@ -0,0 +1,390 @@
+import logging
+import math
+import time
+from collections import Counter, OrderedDict, deque
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SECONDS = 24 * 60 * 60
+
+# Grid cell sizes in degrees, finest first: roughly 1.1 km, 5.5 km and 28 km
+# at the equator. Outbreaks are detected on the finest level; the coarser
+# levels keep wide radius and region queries down to a handful of cells.
+LEVELS = (0.01, 0.05, 0.25)
+
+# A query scans the finest level whose covering cells fit in this budget.
+MAX_QUERY_CELLS = 64
+
+KM_PER_DEGREE = 111.32
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def coordinates(lat, lng):
+    """Return (lat, lng) as finite floats in range, or raise ValueError."""
+    try:
+        lat, lng = float(lat), float(lng)
+    except (TypeError, ValueError):
+        raise ValueError(f"Coordinates must be numbers, got {lat!r}, {lng!r}")
+    if not (math.isfinite(lat) and math.isfinite(lng)) or abs(lat) > 90 or abs(lng) > 180:
+        raise ValueError(f"Coordinates out of range: {lat}, {lng}")
+    return lat, lng
+
+
+class CellWindow:
+    """Cases reported in one grid cell during the last window.
+
+    Events are appended in time order, so expiry only ever pops from the left
+    and the per-symptom Counter is kept in step with the deque.
+    """
+
+    __slots__ = ('events', 'symptom_counts', 'last_seen')
+
+    def __init__(self):
+        self.events = deque()
+        self.symptom_counts = Counter()
+        self.last_seen = 0.0
+
+    def add(self, event):
+        self.events.append(event)
+        self.symptom_counts.update(event[1])
+        self.last_seen = event[0]
+
+    def expire(self, cutoff):
+        events = self.events
+        counts = self.symptom_counts
+        while events and events[0][0] < cutoff:
+            for symptom in events.popleft()[1]:
+                counts[symptom] -= 1
+                if counts[symptom] <= 0:
+                    del counts[symptom]
+
+    def __len__(self):
+        return len(self.events)
+
+
+class GridLevel:
+    """One resolution of the spatial index: cell (row, col) -> CellWindow.
+
+    Cells are kept in least-recently-updated order, so cells that have seen no
+    report for a whole window are dropped from the front in O(1) per cell.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.cells = OrderedDict()
+
+    def index(self, lat, lng):
+        return math.floor(lat / self.size), math.floor(lng / self.size)
+
+    def add(self, event, cutoff):
+        idx = self.index(event[3], event[4])
+        cell = self.cells.get(idx)
+        if cell is None:
+            cell = self.cells[idx] = CellWindow()
+        else:
+            self.cells.move_to_end(idx)
+        cell.add(event)
+        # A busy cell is never idle long enough to be evicted, so it expires as it grows
+        cell.expire(cutoff)
+        return idx
+
+    def live_cell(self, idx, cutoff):
+        cell = self.cells.get(idx)
+        if cell is not None:
+            cell.expire(cutoff)
+        return cell
+
+    def evict_idle(self, cutoff):
+        cells = self.cells
+        while cells:
+            idx, cell = next(iter(cells.items()))
+            if cell.last_seen >= cutoff:
+                break
+            del cells[idx]
+
+    def span(self, min_lat, min_lng, max_lat, max_lng):
+        (r0, c0), (r1, c1) = self.index(min_lat, min_lng), self.index(max_lat, max_lng)
+        return r0, c0, r1, c1
+
+    def bounds(self, idx):
+        row, col = idx
+        return (row * self.size, col * self.size,
+                (row + 1) * self.size, (col + 1) * self.size)
+
+
+class OutbreakTracker:
+    """Multi-resolution grid of sliding-window case counts.
+
+    Every case is filed under its cell at each level. Detection looks at a
+    cell together with its eight neighbours on the finest level, so cases a
+    few metres apart across a cell boundary are still counted together.
+    Radius and region queries touch only the cells that cover the area.
+    """
+
+    def __init__(self, window_seconds=WINDOW_SECONDS, levels=LEVELS):
+        self.window_seconds = window_seconds
+        self.levels = [GridLevel(size) for size in levels]
+        self._lock = Lock()
+
+    def cell_key(self, lat, lng):
+        fine = self.levels[0]
+        row, col = fine.index(lat, lng)
+        return f"{row * fine.size:.2f}_{col * fine.size:.2f}"
+
+    def neighbour_keys(self, lat, lng):
+        """Keys of the finest cell containing (lat, lng) and its eight neighbours."""
+        fine = self.levels[0]
+        row, col = fine.index(lat, lng)
+        return [f"{(row + dr) * fine.size:.2f}_{(col + dc) * fine.size:.2f}"
+                for dr in (0, -1, 1) for dc in (0, -1, 1)]
+
+    def record(self, lat, lng, symptoms, user, timestamp=None):
+        """Add one case and return (cell_key, case_count, symptom_counts).
+
+        The counts cover the case's finest cell and its eight neighbours.
+        """
+        lat, lng = coordinates(lat, lng)
+        if timestamp is None:
+            timestamp = time.time()
+        cutoff = timestamp - self.window_seconds
+
+        with self._lock:
+            self._add((timestamp, tuple(symptoms), user, lat, lng), cutoff)
+            case_count, symptom_counts = self._neighbourhood(lat, lng, cutoff)
+        return self.cell_key(lat, lng), case_count, dict(symptom_counts)
+
+    def record_many(self, cases, timestamp=None):
+        """Add (lat, lng, symptoms, user) cases at once.
+
+        Returns one (cell_key, case_count, symptom_counts) per case, counted
+        after the whole batch has been added.
+        """
+        cases = [coordinates(lat, lng) + (symptoms, user) for lat, lng, symptoms, user in cases]
+        if timestamp is None:
+            timestamp = time.time()
+        cutoff = timestamp - self.window_seconds
+
+        with self._lock:
+            for lat, lng, symptoms, user in cases:
+                self._add((timestamp, tuple(symptoms), user, lat, lng), cutoff)
+            return self._neighbourhoods(cases, cutoff)
+
+    def _neighbourhoods(self, cases, cutoff):
+        results = []
+        for lat, lng, _, _ in cases:
+            case_count, symptom_counts = self._neighbourhood(lat, lng, cutoff)
+            results.append((self.cell_key(lat, lng), case_count, dict(symptom_counts)))
+        return results
+
+    def _add(self, event, cutoff):
+        for level in self.levels:
+            level.add(event, cutoff)
+            level.evict_idle(cutoff)
+
+    def _neighbourhood(self, lat, lng, cutoff):
+        fine = self.levels[0]
+        row, col = fine.index(lat, lng)
+        case_count = 0
+        symptom_counts = Counter()
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                cell = fine.live_cell((row + dr, col + dc), cutoff)
+                if cell:
+                    case_count += len(cell)
+                    symptom_counts.update(cell.symptom_counts)
+        return case_count, symptom_counts
+
+    def neighbourhood_count(self, lat, lng, now=None):
+        cutoff = (now if now is not None else time.time()) - self.window_seconds
+        with self._lock:
+            return self._neighbourhood(lat, lng, cutoff)[0]
+
+    def _query_level(self, min_lat, min_lng, max_lat, max_lng):
+        for level in self.levels:
+            r0, c0, r1, c1 = level.span(min_lat, min_lng, max_lat, max_lng)
+            if (r1 - r0 + 1) * (c1 - c0 + 1) <= MAX_QUERY_CELLS:
+                return level, (r0, c0, r1, c1)
+        level = self.levels[-1]
+        return level, level.span(min_lat, min_lng, max_lat, max_lng)
+
+    def _scan(self, min_lat, min_lng, max_lat, max_lng, inside_cell, inside_event, now):
+        cutoff = (now if now is not None else time.time()) - self.window_seconds
+        level, (r0, c0, r1, c1) = self._query_level(min_lat, min_lng, max_lat, max_lng)
+        case_count = 0
+        symptom_counts = Counter()
+        with self._lock:
+            for row in range(r0, r1 + 1):
+                for col in range(c0, c1 + 1):
+                    cell = level.live_cell((row, col), cutoff)
+                    if not cell:
+                        continue
+                    if inside_cell(level.bounds((row, col))):
+                        case_count += len(cell)
+                        symptom_counts.update(cell.symptom_counts)
+                        continue
+                    for event in cell.events:
+                        if inside_event(event[3], event[4]):
+                            case_count += 1
+                            symptom_counts.update(event[1])
+        return case_count, dict(symptom_counts)
+
+    def cases_within(self, lat, lng, radius_km, now=None):
+        """Return (case_count, symptom_counts) for cases within radius_km."""
+        dlat = radius_km / KM_PER_DEGREE
+        dlng = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+
+        def inside_cell(bounds):
+            s, w, n, e = bounds
+            return all(haversine_km(lat, lng, clat, clng) <= radius_km
+                       for clat, clng in ((s, w), (s, e), (n, w), (n, e)))
+
+        def inside_event(elat, elng):
+            return haversine_km(lat, lng, elat, elng) <= radius_km
+
+        return self._scan(lat - dlat, lng - dlng, lat + dlat, lng + dlng,
+                          inside_cell, inside_event, now)
+
+    def cases_in_region(self, min_lat, min_lng, max_lat, max_lng, now=None):
+        """Return (case_count, symptom_counts) for cases inside a bounding box."""
+        def inside_cell(bounds):
+            s, w, n, e = bounds
+            return s >= min_lat and w >= min_lng and n <= max_lat and e <= max_lng
+
+        def inside_event(elat, elng):
+            return min_lat <= elat <= max_lat and min_lng <= elng <= max_lng
+
+        return self._scan(min_lat, min_lng, max_lat, max_lng, inside_cell, inside_event, now)
+
+    def __len__(self):
+        return len(self.levels[0].cells)
+
+
+class SharedOutbreakTracker(OutbreakTracker):
+    """OutbreakTracker backed by the outbreak_events table.
+
+    Every worker process appends its cases to the table and replays rows it
+    has not seen yet (by rowid) before answering, so all workers count the
+    same cases. load() rebuilds the window on startup, seeding the table from
+    recent located user_interactions when it has nothing in the window.
+    """
+
+    PRUNE_INTERVAL = 300
+
+    def __init__(self, pool, **kwargs):
+        super().__init__(**kwargs)
+        self.pool = pool
+        self._last_id = 0
+        self._last_prune = 0.0
+
+    def load(self, now=None):
+        now = now if now is not None else time.time()
+        cutoff = now - self.window_seconds
+
+        with self.pool.transaction() as conn:
+            if conn.execute("SELECT 1 FROM outbreak_events WHERE timestamp >= ? LIMIT 1",
+                            (cutoff,)).fetchone() is None:
+                since = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(cutoff))
+                seeded = conn.execute("""
+                    INSERT INTO outbreak_events (timestamp, lat, lng, symptoms, user_phone)
+                    SELECT CAST(strftime('%s', timestamp) AS REAL), location_lat, location_lng,
+                           symptoms, user_phone
+                    FROM user_interactions
+                    WHERE timestamp >= ?
+                      AND typeof(location_lat) IN ('real', 'integer')
+                      AND typeof(location_lng) IN ('real', 'integer')
+                      AND symptoms IS NOT NULL
+                    ORDER BY timestamp
+                """, (since,)).rowcount
+                if seeded:
+                    logger.info(f"🗺️ Seeded {seeded} outbreak events from recent interactions")
+
+        with self._lock:
+            self._last_id = 0
+            self._sync(cutoff)
+        logger.info(f"🗺️ Outbreak window loaded: {len(self)} active cells")
+
+    def record(self, lat, lng, symptoms, user, timestamp=None):
+        # Checked before the INSERT: every worker replays what goes into the table
+        lat, lng = coordinates(lat, lng)
+        if timestamp is None:
+            timestamp = time.time()
+        cutoff = timestamp - self.window_seconds
+
+        self.pool.execute("""
+            INSERT INTO outbreak_events (timestamp, lat, lng, symptoms, user_phone)
+            VALUES (?, ?, ?, ?, ?)
+        """, (timestamp, lat, lng, ','.join(symptoms), user))
+
+        with self._lock:
+            self._sync(cutoff)
+            case_count, symptom_counts = self._neighbourhood(lat, lng, cutoff)
+        self._maybe_prune(cutoff)
+        return self.cell_key(lat, lng), case_count, dict(symptom_counts)
+
+    def record_many(self, cases, timestamp=None):
+        cases = [coordinates(lat, lng) + (symptoms, user) for lat, lng, symptoms, user in cases]
+        if timestamp is None:
+            timestamp = time.time()
+        cutoff = timestamp - self.window_seconds
+
+        with self.pool.transaction() as conn:
+            conn.executemany("""
+                INSERT INTO outbreak_events (timestamp, lat, lng, symptoms, user_phone)
+                VALUES (?, ?, ?, ?, ?)
+            """, [(timestamp, lat, lng, ','.join(symptoms), user) for lat, lng, symptoms, user in cases])
+
+        with self._lock:
+            self._sync(cutoff)
+            results = self._neighbourhoods(cases, cutoff)
+        self._maybe_prune(cutoff)
+        return results
+
+    def sync(self, now=None):
+        """Replay cases recorded by other workers since the last sync."""
+        cutoff = (now if now is not None else time.time()) - self.window_seconds
+        with self._lock:
+            self._sync(cutoff)
+
+    def _sync(self, cutoff):
+        rows = self.pool.fetchall("""
+            SELECT id, timestamp, lat, lng, symptoms, user_phone
+            FROM outbreak_events
+            WHERE id > ? AND timestamp >= ?
+            ORDER BY id
+        """, (self._last_id, cutoff))
+        for row_id, timestamp, lat, lng, symptoms, user in rows:
+            self._last_id = row_id
+            try:
+                lat, lng = coordinates(lat, lng)
+                event = (float(timestamp), tuple(symptoms.split(',')), user, lat, lng)
+            except (ValueError, TypeError, AttributeError) as e:
+                # A bad row must not stop every later case from being counted
+                logger.error(f"❌ Skipping malformed outbreak event {row_id}: {e}")
+                continue
+            self._add(event, cutoff)
+
+    def _maybe_prune(self, cutoff):
+        if cutoff - self._last_prune < self.PRUNE_INTERVAL:
+            return
+        self._last_prune = cutoff
+        self.pool.execute("DELETE FROM outbreak_events WHERE timestamp < ?", (cutoff,))
+
+    def neighbourhood_count(self, lat, lng, now=None):
+        self.sync(now)
+        return super().neighbourhood_count(lat, lng, now)
+
+    def cases_within(self, lat, lng, radius_km, now=None):
+        self.sync(now)
+        return super().cases_within(lat, lng, radius_km, now)
+
+    def cases_in_region(self, min_lat, min_lng, max_lat, max_lng, now=None):
+        self.sync(now)
+        return super().cases_in_region(min_lat, min_lng, max_lat, max_lng, now)
@@ -0,0 +1,120 @@
+"""Keyset pagination and conditional GET for the read APIs.
+
+Pages are addressed by ?after_id= (exclusive id cursor) and ?since= (a
+timestamp lower bound), never by OFFSET. Each response carries an ETag built
+from its body and a Last-Modified taken from its newest row. ConditionalCache
+remembers the ETag for each URL together with the pool's data_version, so a
+revalidation that arrives before anything has been written is answered 304
+without running the query.
+"""
+import hashlib
+import json
+from collections import OrderedDict
+from datetime import datetime, timezone
+from threading import Lock
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 500
+
+SINCE_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d')
+
+
+def parse_page_args(args, default_limit=DEFAULT_LIMIT, max_limit=MAX_LIMIT):
+    """Return (after_id, since, limit) from request args; raise ValueError on bad input."""
+    after_id = args.get('after_id')
+    if after_id is not None:
+        after_id = int(after_id)
+
+    since = args.get('since')
+    if since is not None:
+        since = parse_since(since)
+
+    limit = int(args.get('limit', default_limit))
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return after_id, since, min(limit, max_limit)
+
+
+def parse_since(value):
+    """Normalise a since value to the 'YYYY-MM-DD HH:MM:SS' form stored in the tables."""
+    value = value.strip().rstrip('Z')
+    for fmt in SINCE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime('%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            continue
+    raise ValueError("since must look like YYYY-MM-DD or YYYY-MM-DD HH:MM:SS")
+
+
+def fetch_page(conn, table, after_id, since, limit):
+    """Rows for one page of table.
+
+    Without a cursor the newest rows come first, which is what the old
+    fixed LIMIT 20 endpoints returned. With after_id or since, rows come in
+    ascending id order so the last id is the next cursor.
+    """
+    if after_id is None and since is None:
+        return conn.execute(f"SELECT * FROM {table} ORDER BY timestamp DESC LIMIT ?", (limit,)).fetchall()
+
+    clauses, params = [], []
+    if since is not None:
+        # The timestamp index finds the first matching id; the page itself is
+        # then a primary key range instead of a scan filtered on timestamp.
+        # MIN(+id) keeps SQLite from walking the rowid order looking for a match.
+        first_id = conn.execute(f"SELECT MIN(+id) FROM {table} WHERE timestamp >= ?", (since,)).fetchone()[0]
+        if first_id is None:
+            return []
+        clauses.append("timestamp >= ?")
+        params.append(since)
+        after_id = first_id - 1 if after_id is None else max(after_id, first_id - 1)
+    clauses.append("id > ?")
+    params.append(after_id)
+    params.append(limit)
+    return conn.execute(
+        f"SELECT * FROM {table} WHERE {' AND '.join(clauses)} ORDER BY id LIMIT ?", params
+    ).fetchall()
+
+
+def parse_timestamp(value):
+    """Stored UTC timestamp -> aware datetime at HTTP-date precision."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    return parsed.replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def body_etag(items):
+    return hashlib.sha1(json.dumps(items, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class ConditionalCache:
+    """LRU of URL -> (data_version, etag, last_modified) for cheap 304s."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+
+    def lookup(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1], entry[2]
+
+    def hit(self):
+        """Count a request answered 304 from a lookup() result."""
+        with self._lock:
+            self.hits += 1
+
+    def store(self, key, version, etag, last_modified):
+        with self._lock:
+            self._entries[key] = (version, etag, last_modified)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
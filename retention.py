@@ -0,0 +1,157 @@
+"""Archive old user_interactions rows into per-day gzip NDJSON files.
+
+Rows older than the retention age are written out in full to
+<archive_dir>/interactions-YYYY-MM-DD.ndjson.gz. Each row leaves behind an
+interaction_summaries row (timestamp, language, symptoms, location) for
+outbreak analytics and is then deleted from user_interactions.
+
+Only the process holding the 'retention' lease archives, so several
+workers (or a worker and the CLI) never append the same rows twice.
+Work happens in bounded batches. Each batch reads outside any transaction;
+WAL readers do not block the writer. It then commits its summaries and
+deletes in one short write transaction, so live writes wait at most one
+batch.
+
+    python retention.py --days 30 --archive-dir archive
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from database import ConnectionPool, acquire_lease, release_lease
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = 'retention'
+
+COLUMNS = ('id', 'user_phone', 'message', 'response', 'language', 'timestamp',
+           'location_lat', 'location_lng', 'symptoms')
+
+
+def archive_path(archive_dir, day):
+    return os.path.join(archive_dir, f"interactions-{day}.ndjson.gz")
+
+
+def _append_archive(archive_dir, rows):
+    by_day = defaultdict(list)
+    for row in rows:
+        by_day[str(row['timestamp'])[:10]].append(row)
+
+    for day, day_rows in by_day.items():
+        # Appending adds a new gzip member; readers see one continuous stream
+        with open(archive_path(archive_dir, day), 'ab') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='ab') as out:
+                for row in day_rows:
+                    out.write(json.dumps(row, ensure_ascii=False).encode('utf-8') + b'\n')
+            raw.flush()
+            os.fsync(raw.fileno())
+
+
+def archive_batch(pool, cutoff, archive_dir, batch_size=1000):
+    """Archive up to batch_size rows older than cutoff; return how many were moved.
+
+    If the process dies between writing the archive and committing the
+    delete, the next run archives those rows again; archive consumers should
+    de-duplicate on id.
+    """
+    rows = pool.fetchall(f"""
+        SELECT {', '.join(COLUMNS)} FROM user_interactions
+        WHERE timestamp < ?
+        ORDER BY timestamp
+        LIMIT ?
+    """, (cutoff, batch_size))
+    if not rows:
+        return 0
+
+    records = [dict(zip(COLUMNS, row)) for row in rows]
+    _append_archive(archive_dir, records)
+
+    with pool.transaction() as conn:
+        conn.executemany("""
+            INSERT OR IGNORE INTO interaction_summaries
+            (id, timestamp, language, symptoms, location_lat, location_lng)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [(r['id'], r['timestamp'], r['language'], r['symptoms'],
+               r['location_lat'], r['location_lng']) for r in records])
+        conn.executemany("DELETE FROM user_interactions WHERE id = ?", [(r['id'],) for r in records])
+    return len(records)
+
+
+def run_retention(pool, max_age_days, archive_dir, batch_size=1000, max_batches=None, pause=0.05,
+                  lease_ttl=600, stopped=None):
+    """Archive everything older than max_age_days, one batch at a time.
+
+    Stops between batches once the stopped Event, if given, is set.
+    """
+    if max_age_days < 2:
+        # The outbreak window is rebuilt from the last 24h of raw rows
+        raise ValueError("max_age_days must be at least 2")
+    os.makedirs(archive_dir, exist_ok=True)
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=max_age_days)).strftime('%Y-%m-%d %H:%M:%S')
+
+    total = batches = 0
+    # Renewed before every batch; it outlives a batch by far
+    if not acquire_lease(pool, LEASE_NAME, lease_ttl):
+        logger.info("🗃️ Retention is running in another process, skipping")
+        return 0
+    try:
+        while max_batches is None or batches < max_batches:
+            if stopped is not None and stopped.is_set():
+                break
+            if batches and not acquire_lease(pool, LEASE_NAME, lease_ttl):
+                logger.warning("⚠️ Lost the retention lease, stopping")
+                break
+            moved = archive_batch(pool, cutoff, archive_dir, batch_size)
+            if not moved:
+                break
+            total += moved
+            batches += 1
+            time.sleep(pause)  # let queued live writes in between batches
+    finally:
+        release_lease(pool, LEASE_NAME)
+
+    if total:
+        logger.info(f"🗃️ Archived {total} interactions older than {cutoff} in {batches} batches")
+    return total
+
+
+def start_retention_thread(pool, max_age_days, archive_dir, interval=3600, **kwargs):
+    """Run retention every interval seconds on a daemon thread; set the returned Event to stop it."""
+    stopped = threading.Event()
+
+    def loop():
+        while not stopped.is_set():
+            try:
+                run_retention(pool, max_age_days, archive_dir, stopped=stopped, **kwargs)
+            except Exception as e:
+                logger.error(f"❌ Retention run failed: {e}")
+            stopped.wait(interval)
+
+    threading.Thread(target=loop, name='retention', daemon=True).start()
+    return stopped
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Archive old user interactions")
+    parser.add_argument('--db', default='health_chatbot.db', help="SQLite database path")
+    parser.add_argument('--days', type=int, default=30, help="Keep this many days of full rows")
+    parser.add_argument('--archive-dir', default='archive', help="Where to write the .ndjson.gz files")
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--max-batches', type=int, default=None, help="Stop after this many batches")
+    args = parser.parse_args()
+
+    import migrations
+
+    pool = ConnectionPool(args.db, max_size=2)
+    with pool.connection() as conn:
+        migrations.migrate(conn)
+    moved = run_retention(pool, args.days, args.archive_dir, args.batch_size, args.max_batches)
+    print(f"🗃️ Archived {moved} interactions")
+    pool.close()
@@ -0,0 +1,235 @@
+"""Production entry point: preforked worker processes, each serving with a thread pool.
+
+    python serve.py --workers 4 --threads 8 --bind 0.0.0.0:5000
+
+Uses gunicorn's gthread workers when gunicorn is installed
+(pip install gunicorn) and a built-in prefork server otherwise. Each worker
+imports app after the fork, so it owns its SQLite pool, writer thread and
+outbreak window, and warms up before taking traffic. SIGTERM drains:
+readiness fails, alert streams close, in-flight requests get up to
+--graceful-timeout seconds, and queued interactions are flushed.
+
+An open /api/alerts/stream holds a request thread for as long as the client
+stays connected, so each worker accepts at most --threads / 2 streams
+(ALERT_STREAM_MAX_SUBSCRIBERS, never more than --threads - 1) and the rest
+of its threads keep serving /api/chat and /healthz.
+
+Point the load balancer's health check at /readyz and liveness at /healthz.
+"""
+import argparse
+import importlib
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+def default_workers():
+    return int(os.environ.get('WEB_WORKERS', min(os.cpu_count() or 1, 8)))
+
+
+def load_app():
+    app_module = importlib.import_module('app')
+    app_module.create_app()
+    app_module.warm_up()
+    return app_module
+
+
+def run_gunicorn(args):
+    from gunicorn.app.base import BaseApplication
+
+    class ChatbotApplication(BaseApplication):
+        def load_config(self):
+            settings = {
+                'bind': args.bind,
+                'workers': args.workers,
+                'worker_class': 'gthread',
+                'threads': args.threads,
+                'graceful_timeout': args.graceful_timeout,
+                'timeout': max(30, args.graceful_timeout * 2),
+                'keepalive': 5,
+                # Workers must not share SQLite connections or writer threads with the master
+                'preload_app': False,
+                'post_worker_init': self.post_worker_init,
+                'worker_exit': lambda server, worker: self.app_module.shutdown(),
+            }
+            for key, value in settings.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            self.app_module = importlib.import_module('app')
+            return self.app_module.create_app()
+
+        def post_worker_init(self, worker):
+            self.app_module.warm_up()
+            # gunicorn has no hook for a graceful stop, so drain from its SIGTERM handler
+            stop = worker.handle_exit
+
+            def drain_then_stop(signum, frame):
+                self.app_module.begin_drain()
+                stop(signum, frame)
+
+            signal.signal(signal.SIGTERM, drain_then_stop)
+
+    ChatbotApplication().run()
+
+
+class PooledWSGIServer:
+    """werkzeug server whose requests run on a fixed-size thread pool."""
+
+    def __init__(self, sock, flask_app, threads):
+        from werkzeug.serving import BaseWSGIServer
+
+        host, port = sock.getsockname()[:2]
+        self.server = BaseWSGIServer(host, port, flask_app, fd=sock.fileno())
+        self.server.multithread = True
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='request')
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self.server.process_request = self._submit
+
+    def _submit(self, request, client_address):
+        with self._lock:
+            self.in_flight += 1
+        self.executor.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.server.finish_request(request, client_address)
+        except Exception:
+            self.server.handle_error(request, client_address)
+        finally:
+            self.server.shutdown_request(request)
+            with self._lock:
+                self.in_flight -= 1
+
+    def serve_until_drained(self, graceful_timeout):
+        stop = threading.Event()
+
+        def on_term(signum, frame):
+            stop.set()
+
+        signal.signal(signal.SIGTERM, on_term)
+        signal.signal(signal.SIGINT, on_term)
+        thread = threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.2}, daemon=True)
+        thread.start()
+        stop.wait()
+        return self.drain(graceful_timeout, thread)
+
+    def drain(self, graceful_timeout, thread):
+        app_module = sys.modules['app']
+        app_module.begin_drain()
+        self.server.shutdown()
+        thread.join()
+        deadline = time.monotonic() + graceful_timeout
+        while self.in_flight and time.monotonic() < deadline:
+            time.sleep(0.05)
+        if self.in_flight:
+            logger.warning(f"⚠️ Worker {os.getpid()} exiting with {self.in_flight} requests still running")
+        self.executor.shutdown(wait=False)
+        app_module.shutdown()
+        return 0
+
+
+def _worker(sock, args):
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    app_module = load_app()
+    server = PooledWSGIServer(sock, app_module.app, args.threads)
+    logger.info(f"👷 Worker {os.getpid()} serving with {args.threads} threads")
+    return server.serve_until_drained(args.graceful_timeout)
+
+
+def run_prefork(args):
+    host, _, port = args.bind.rpartition(':')
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host or '0.0.0.0', int(port)))
+    sock.listen(1024)
+    sock.set_inheritable(True)
+
+    if not hasattr(os, 'fork'):
+        logger.warning("⚠️ No fork() on this platform, serving from a single process")
+        return _worker(sock, args)
+
+    children = set()
+    stopping = threading.Event()
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                code = _worker(sock, args)
+            except Exception as e:
+                logger.error(f"❌ Worker {os.getpid()} crashed: {e}")
+            finally:
+                os._exit(code)
+        children.add(pid)
+
+    def on_term(signum, frame):
+        stopping.set()
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, on_term)
+    signal.signal(signal.SIGINT, on_term)
+
+    logger.info(f"🚀 Serving on {args.bind} with {args.workers} workers x {args.threads} threads (pid {os.getpid()})")
+    for _ in range(args.workers):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+        if not stopping.is_set():
+            logger.error(f"❌ Worker {pid} exited with status {status}, restarting")
+            time.sleep(1)
+            spawn()
+
+    sock.close()
+    logger.info("👋 All workers drained")
+    return 0
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Run the chatbot with multiple workers")
+    parser.add_argument('--bind', default=os.environ.get('BIND', '0.0.0.0:5000'))
+    parser.add_argument('--workers', type=int, default=default_workers())
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('WEB_THREADS', 8)))
+    parser.add_argument('--graceful-timeout', type=int, default=int(os.environ.get('GRACEFUL_TIMEOUT', 30)))
+    parser.add_argument('--server', choices=('auto', 'gunicorn', 'builtin'), default='auto')
+    args = parser.parse_args()
+    # Workers size their alert stream limit from it, see create_app()
+    os.environ['WEB_THREADS'] = str(args.threads)
+
+    use_gunicorn = args.server == 'gunicorn'
+    if args.server == 'auto':
+        try:
+            import gunicorn  # noqa: F401
+            use_gunicorn = hasattr(os, 'fork')
+        except ImportError:
+            use_gunicorn = False
+
+    if use_gunicorn:
+        return run_gunicorn(args)
+    return run_prefork(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
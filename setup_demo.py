@@ -1,60 +1,42 @@
 import sqlite3
 from datetime import datetime, timedelta
+import argparse
+import calendar
+from bisect import bisect
+import itertools
 import random
 import os
+import time
 
-def init_db():
+import migrations
+import stats_rollup
+from outbreak import OutbreakTracker
+
+def init_db(path='health_chatbot.db'):
     print("🗄️ Initializing database...")
-    conn = sqlite3.connect('health_chatbot.db')
-    cursor = conn.cursor()
+    conn = sqlite3.connect(path)
 
-    # Drop existing tables to ensure clean setup
-    cursor.execute("DROP TABLE IF EXISTS user_interactions")
-    cursor.execute("DROP TABLE IF EXISTS government_alerts")
-
-    cursor.execute("""
-        CREATE TABLE user_interactions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_phone TEXT,
-            message TEXT,
-            response TEXT,
-            language TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            location_lat REAL,
-            location_lng REAL,
-            symptoms TEXT
-        )
-    """)
-
-    cursor.execute("""
-        CREATE TABLE government_alerts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            alert_type TEXT,
-            location TEXT,
-            symptoms_count INTEGER,
-            severity TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            status TEXT DEFAULT 'ACTIVE'
-        )
-    """)
+    # Drop existing tables to ensure clean setup, then build the current schema
+    migrations.reset(conn)
+    migrations.migrate(conn)
 
     conn.commit()
     conn.close()
     print("✅ Database tables initialized")
 
-def insert_demo_data():
+def insert_demo_data(path='health_chatbot.db'):
     print("🎭 Inserting demo data...")
-    conn = sqlite3.connect('health_chatbot.db')
+    conn = sqlite3.connect(path)
     cursor = conn.cursor()
 
     # Sample user interactions with realistic data
     now = datetime.now()
     interactions = [
-        ("whatsapp:+919876543210", "I have fever and cough", "Fever response", "en", 28.6139, 77.2090, "fever,cough", now - timedelta(hours=2)),
-        ("whatsapp:+919876543211", "मुझे सिरदर्द है", "Headache response", "hi", 28.6140, 77.2091, "headache", now - timedelta(hours=4)),
-        ("whatsapp:+919876543212", "Vaccination schedule", "Vaccination info", "en", 28.6141, 77.2092, "vaccination", now - timedelta(hours=6)),
-        ("whatsapp:+919876543213", "मुझे बुखार है", "Fever response", "hi", 28.6142, 77.2093, "fever", now - timedelta(hours=8)),
-        ("whatsapp:+919876543214", "I have headache and fever", "Combined response", "en", 28.6143, 77.2094, "headache,fever", now - timedelta(hours=1)),
+        ("+919876543210", "I have fever and cough", "Fever response", "en", 28.6139, 77.2090, "fever,cough", now - timedelta(hours=2)),
+        ("+919876543211", "मुझे सिरदर्द है", "Headache response", "hi", 28.6140, 77.2091, "headache", now - timedelta(hours=4)),
+        ("+919876543212", "Vaccination schedule", "Vaccination info", "en", 28.6141, 77.2092, "vaccination", now - timedelta(hours=6)),
+        ("+919876543213", "मुझे बुखार है", "Fever response", "hi", 28.6142, 77.2093, "fever", now - timedelta(hours=8)),
+        ("+919876543214", "I have headache and fever", "Combined response", "en", 28.6143, 77.2094, "headache,fever", now - timedelta(hours=1)),
         ("web_demo_123", "Cough and throat pain", "Cough response", "en", 19.0760, 72.8777, "cough", now - timedelta(hours=3)),
         ("web_demo_456", "खांसी और गले में दर्द", "Cough response Hindi", "hi", 19.0761, 72.8778, "cough", now - timedelta(hours=5)),
     ]
@@ -80,11 +62,239 @@ def insert_demo_data():
             VALUES (?, ?, ?, ?, ?, ?)
         """, alert)
 
+    # Demo rows bypass the app's write path, so derive the dashboard rollups here
+    stats_rollup.rebuild_rollups(conn)
+
     conn.commit()
     conn.close()
     print("✅ Demo data inserted")
 
+# Generator mode: python setup_demo.py --rows 10_000_000 --days 90 --regions 50
+
+# (symptoms, weight); None is a message with no known symptom
+SYMPTOM_MIX = (
+    (('fever',), 30), (('cough',), 22), (('headache',), 18), (('fever', 'cough'), 12),
+    (('headache', 'fever'), 6), (('vaccination',), 5), (None, 7),
+)
+MESSAGES = {
+    ('fever',): (("I have fever", "fever since yesterday", "high temperature and chills"),
+                 ("मुझे बुखार है", "कल से बुखार है")),
+    ('cough',): (("I have a cough", "dry cough at night", "coughing a lot"),
+                 ("मुझे खांसी है", "रात में खांसी आती है")),
+    ('headache',): (("bad headache", "my head hurts", "headache since morning"),
+                    ("मुझे सिरदर्द है", "सिर में दर्द है")),
+    ('fever', 'cough'): (("fever and cough", "I have cough with fever"),
+                         ("बुखार और खांसी है",)),
+    ('headache', 'fever'): (("headache and fever", "fever with a headache"),
+                            ("सिरदर्द और बुखार है",)),
+    ('vaccination',): (("when is the next vaccination", "vaccine schedule for my child"),
+                       ("टीका कब लगेगा", "बच्चे का टीकाकरण")),
+    None: (("is it safe to travel", "what should I eat"),
+           ("क्या पानी उबालना चाहिए",)),
+}
+HINDI_SHARE = 0.4
+LOCATED_SHARE = 0.6
+# Roughly mainland India
+LAT_RANGE, LNG_RANGE = (8.5, 32.0), (70.0, 88.0)
+
+INSERT_INTERACTION_SQL = """
+    INSERT INTO user_interactions
+    (user_phone, message, response, language, location_lat, location_lng, symptoms, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Safe only because the database is rebuilt from scratch if the load dies
+BULK_LOAD_PRAGMAS = (
+    "PRAGMA journal_mode=MEMORY",
+    "PRAGMA synchronous=OFF",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-262144",
+)
+
+
+def plan_regions(rng, count):
+    """Region centres with a skewed share of traffic, like a few big cities and many towns."""
+    regions = [(round(rng.uniform(*LAT_RANGE), 4), round(rng.uniform(*LNG_RANGE), 4)) for _ in range(count)]
+    weights = [1.0 / (rank + 1) for rank in range(count)]
+    return regions, list(itertools.accumulate(weights))
+
+
+def plan_outbreaks(rng, regions, count, start, end):
+    """Outbreaks as dicts: a tight location, a symptom set and an active period.
+
+    The last one is still running at the end of the dataset so the live
+    outbreak window has something to show.
+    """
+    outbreaks = []
+    span = end - start
+    for i in range(count):
+        region = rng.randrange(len(regions))
+        lat, lng = regions[region]
+        duration = rng.uniform(1, 4) * 86400
+        begins = end - duration if i == count - 1 else start + rng.uniform(0, max(span - duration, 0))
+        outbreaks.append({
+            'region': region,
+            'lat': round(lat + rng.uniform(-0.05, 0.05), 4),
+            'lng': round(lng + rng.uniform(-0.05, 0.05), 4),
+            'symptoms': rng.choice([('fever',), ('fever', 'cough'), ('cough',)]),
+            'start': begins,
+            'end': begins + duration,
+            'share': rng.uniform(0.2, 0.5),
+            'cases': 0,
+        })
+    return sorted(outbreaks, key=lambda outbreak: outbreak['start'])
+
+
+def generate_interactions(rng, rows, start, end, regions, cumulative_weights, outbreaks, users_per_region):
+    """Yield interaction tuples in timestamp order, one at a time."""
+    mix, mix_weights = zip(*SYMPTOM_MIX)
+    mix_cumulative = list(itertools.accumulate(mix_weights))
+    responses = {symptoms: f"{'/'.join(symptoms)} guidance" if symptoms else "Please describe your symptoms"
+                 for symptoms in mix}
+    joined = {symptoms: ','.join(symptoms) if symptoms else None for symptoms in mix}
+    by_region = {}
+    for outbreak in outbreaks:
+        by_region.setdefault(outbreak['region'], []).append(outbreak)
+        joined.setdefault(outbreak['symptoms'], ','.join(outbreak['symptoms']))
+        responses.setdefault(outbreak['symptoms'], f"{'/'.join(outbreak['symptoms'])} guidance")
+
+    region_total = cumulative_weights[-1]
+    mix_total = mix_cumulative[-1]
+    step = (end - start) / rows
+    random_ = rng.random
+    strftime, gmtime = time.strftime, time.gmtime
+
+    for i in range(rows):
+        ts = start + (i + random_()) * step
+        region = bisect(cumulative_weights, random_() * region_total)
+        lat = lng = None
+
+        outbreak = None
+        for candidate in by_region.get(region, ()):
+            if candidate['start'] <= ts < candidate['end'] and random_() < candidate['share']:
+                outbreak = candidate
+                break
+
+        if outbreak:
+            outbreak['cases'] += 1
+            symptoms = outbreak['symptoms']
+            lat = round(outbreak['lat'] + (random_() - 0.5) * 0.006, 4)
+            lng = round(outbreak['lng'] + (random_() - 0.5) * 0.006, 4)
+        else:
+            symptoms = mix[bisect(mix_cumulative, random_() * mix_total)]
+            if random_() < LOCATED_SHARE:
+                center_lat, center_lng = regions[region]
+                lat = round(center_lat + (random_() - 0.5) * 0.2, 4)
+                lng = round(center_lng + (random_() - 0.5) * 0.2, 4)
+
+        language = 'hi' if random_() < HINDI_SHARE else 'en'
+        templates = MESSAGES.get(symptoms, MESSAGES[('fever',)])[language == 'hi']
+        yield (
+            # Stored without the whatsapp: prefix, as the webhook does
+            f"+91{region:03d}{int(random_() * users_per_region):07d}",
+            templates[int(random_() * len(templates))],
+            responses[symptoms],
+            language,
+            lat,
+            lng,
+            joined[symptoms],
+            strftime('%Y-%m-%d %H:%M:%S', gmtime(ts)),
+        )
+
+
+def outbreak_alerts(outbreaks, now):
+    tracker = OutbreakTracker()
+    for outbreak in outbreaks:
+        if outbreak['cases'] < 3:
+            continue
+        resolved = outbreak['end'] < now - 6 * 3600
+        yield (
+            'OUTBREAK_DETECTED',
+            f"Lat: {outbreak['lat']:.4f}, Lng: {outbreak['lng']:.4f}",
+            outbreak['cases'],
+            'HIGH' if outbreak['cases'] >= 5 else 'MEDIUM',
+            time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(outbreak['start'] + 3600)),
+            'RESOLVED' if resolved else 'NEW',
+            tracker.cell_key(outbreak['lat'], outbreak['lng']),
+            time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(min(outbreak['end'], now))),
+        )
+
+
+def generate_dataset(path, rows, days, regions=20, outbreaks=None, seed=42, batch_size=100_000):
+    """Rebuild path with rows synthetic interactions spread over the last days days."""
+    init_db(path)
+    rng = random.Random(seed)
+    now = calendar.timegm(time.gmtime())
+    start = now - days * 86400
+    region_centres, cumulative_weights = plan_regions(rng, regions)
+    planned = plan_outbreaks(rng, region_centres, outbreaks if outbreaks is not None else max(1, regions // 4),
+                             start, now)
+
+    conn = sqlite3.connect(path, isolation_level=None)
+    for pragma in BULK_LOAD_PRAGMAS:
+        conn.execute(pragma)
+
+    # Secondary indexes are cheaper to build once at the end than to maintain per row
+    indexes = conn.execute("""
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'index' AND tbl_name = 'user_interactions' AND sql IS NOT NULL
+    """).fetchall()
+    for name, _ in indexes:
+        conn.execute(f"DROP INDEX {name}")
+
+    print(f"🏭 Generating {rows:,} interactions over {days} days in {regions} regions, "
+          f"{len(planned)} outbreaks...")
+    began = time.time()
+    stream = generate_interactions(rng, rows, start, now, region_centres, cumulative_weights, planned,
+                                   users_per_region=max(100, rows // regions // 20))
+    loaded = 0
+    while loaded < rows:
+        conn.execute("BEGIN")
+        conn.executemany(INSERT_INTERACTION_SQL, itertools.islice(stream, batch_size))
+        conn.execute("COMMIT")
+        loaded = min(loaded + batch_size, rows)
+        rate = loaded / max(time.time() - began, 1e-9)
+        print(f"   {loaded:,} rows ({rate:,.0f}/s)", end='\r', flush=True)
+    print()
+
+    conn.execute("BEGIN")
+    conn.executemany("""
+        INSERT INTO government_alerts
+        (alert_type, location, symptoms_count, severity, timestamp, status, cell_key, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, outbreak_alerts(planned, now))
+    conn.execute("COMMIT")
+
+    print("🗂️ Rebuilding indexes and rollups...")
+    conn.execute("BEGIN")
+    for _, sql in indexes:
+        conn.execute(sql)
+    stats_rollup.rebuild_rollups(conn)
+    conn.execute("COMMIT")
+    # Only the bulk-loaded tables. Stats from a handful of demo alerts would
+    # steer the planner away from the government_alerts indexes for good.
+    for table in ('user_interactions',) + stats_rollup.ROLLUP_TABLES:
+        conn.execute(f"ANALYZE {table}")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.close()
+    print(f"✅ Generated {rows:,} interactions in {time.time() - began:.0f}s")
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Set up the demo database")
+    parser.add_argument('--db', default='health_chatbot.db', help="SQLite database path")
+    parser.add_argument('--rows', type=int, help="Generate this many synthetic interactions instead of the demo rows")
+    parser.add_argument('--days', type=int, default=90, help="Spread generated rows over this many days")
+    parser.add_argument('--regions', type=int, default=20, help="Number of population centres")
+    parser.add_argument('--outbreaks', type=int, help="Injected outbreak clusters (default regions / 4)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=100_000, help="Rows per transaction")
+    args = parser.parse_args()
+
+    if args.rows:
+        generate_dataset(args.db, args.rows, args.days, args.regions, args.outbreaks, args.seed, args.batch_size)
+        raise SystemExit(0)
+
     print("=" * 50)
     print("🏥 ProtoMinds Health Chatbot Setup")
     print("=" * 50)
@@ -95,8 +305,8 @@ if __name__ == "__main__":
         print("📁 Created templates directory")
 
     # Initialize database and insert demo data
-    init_db()
-    insert_demo_data()
+    init_db(args.db)
+    insert_demo_data(args.db)
 
     print("=" * 50)
     print("🎉 Setup complete!")
@@ -0,0 +1,190 @@
+"""Incrementally maintained counters behind /api/stats and /admin.
+
+The interaction writer calls apply_rollups() inside the same transaction that
+inserts a batch, so the rollup tables always agree with user_interactions.
+Run `python stats_rollup.py --rebuild` to recompute them from the stored rows.
+"""
+import argparse
+import sqlite3
+from collections import Counter
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS stats_counters (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS daily_language_stats (
+        day TEXT NOT NULL,
+        language TEXT NOT NULL,
+        interactions INTEGER NOT NULL DEFAULT 0,
+        unique_users INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, language)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS daily_language_users (
+        day TEXT NOT NULL,
+        language TEXT NOT NULL,
+        user_phone TEXT NOT NULL,
+        PRIMARY KEY (day, language, user_phone)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS known_users (
+        user_phone TEXT PRIMARY KEY
+    ) WITHOUT ROWID
+    """,
+)
+
+# Counted under this language when a record carries none
+DEFAULT_LANGUAGE = 'en'
+
+ROLLUP_TABLES = ('stats_counters', 'daily_language_stats', 'daily_language_users', 'known_users')
+
+# Live rows plus the summaries left behind by retention.py
+ALL_INTERACTIONS_SQL = f"""
+    SELECT timestamp, COALESCE(language, '{DEFAULT_LANGUAGE}') AS language FROM user_interactions
+    UNION ALL
+    SELECT timestamp, COALESCE(language, '{DEFAULT_LANGUAGE}') AS language FROM interaction_summaries
+"""
+
+BUMP_COUNTER_SQL = """
+    INSERT INTO stats_counters (name, value) VALUES (?, ?)
+    ON CONFLICT(name) DO UPDATE SET value = value + excluded.value
+"""
+
+
+def create_tables(conn):
+    for statement in SCHEMA:
+        conn.execute(statement)
+
+
+def apply_rollups(conn, records):
+    """Fold a batch of interaction records into the rollups.
+
+    records are (user_phone, language, timestamp) tuples; timestamp is the
+    'YYYY-MM-DD HH:MM:SS' UTC string stored in user_interactions.
+    """
+    interactions = Counter()
+    new_day_users = Counter()
+    languages = Counter()
+    new_users = 0
+
+    for user_phone, language, timestamp in records:
+        # language is NOT NULL here; a failure would roll back the writer's whole batch
+        language = language or DEFAULT_LANGUAGE
+        day = timestamp[:10]
+        interactions[day, language] += 1
+        languages[language] += 1
+        if user_phone is None:
+            continue
+        if conn.execute(
+            "INSERT OR IGNORE INTO daily_language_users (day, language, user_phone) VALUES (?, ?, ?)",
+            (day, language, user_phone),
+        ).rowcount:
+            new_day_users[day, language] += 1
+        new_users += conn.execute(
+            "INSERT OR IGNORE INTO known_users (user_phone) VALUES (?)", (user_phone,)
+        ).rowcount
+
+    conn.executemany("""
+        INSERT INTO daily_language_stats (day, language, interactions, unique_users)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(day, language) DO UPDATE SET
+            interactions = interactions + excluded.interactions,
+            unique_users = unique_users + excluded.unique_users
+    """, [(day, language, count, new_day_users[day, language])
+          for (day, language), count in interactions.items()])
+
+    counters = [('total_interactions', sum(languages.values())), ('unique_users', new_users)]
+    counters += [(f'language:{language}', count) for language, count in languages.items()]
+    conn.executemany(BUMP_COUNTER_SQL, counters)
+
+
+def read_totals(conn):
+    """Return (total_interactions, unique_users, language_distribution)."""
+    counters = dict(conn.execute("SELECT name, value FROM stats_counters").fetchall())
+    languages = {name.split(':', 1)[1]: value for name, value in counters.items()
+                 if name.startswith('language:') and value}
+    return counters.get('total_interactions', 0), counters.get('unique_users', 0), languages
+
+
+def read_day(conn, day):
+    """Rows of (interactions, language, unique_users) for one UTC day."""
+    return conn.execute("""
+        SELECT interactions, language, unique_users
+        FROM daily_language_stats
+        WHERE day = ?
+    """, (day,)).fetchall()
+
+
+def needs_rebuild(conn):
+    return (conn.execute("SELECT 1 FROM stats_counters LIMIT 1").fetchone() is None
+            and conn.execute("SELECT 1 FROM user_interactions LIMIT 1").fetchone() is not None)
+
+
+def rebuild_rollups(conn):
+    """Recompute the rollup tables from user_interactions and interaction_summaries.
+
+    Archived summaries carry no user_phone, so distinct-user sets for days
+    before the oldest live row are kept as they are; everything else is
+    derived again from the rows.
+    """
+    oldest = conn.execute("SELECT MIN(timestamp) FROM user_interactions").fetchone()[0]
+    if oldest is not None:
+        conn.execute("DELETE FROM daily_language_users WHERE day > ?", (oldest[:10],))
+    conn.execute("""
+        INSERT OR IGNORE INTO daily_language_users (day, language, user_phone)
+        SELECT DISTINCT substr(timestamp, 1, 10), COALESCE(language, ?), user_phone
+        FROM user_interactions
+        WHERE user_phone IS NOT NULL
+    """, (DEFAULT_LANGUAGE,))
+    conn.execute("""
+        INSERT OR IGNORE INTO known_users (user_phone)
+        SELECT DISTINCT user_phone FROM user_interactions WHERE user_phone IS NOT NULL
+    """)
+
+    conn.execute("DELETE FROM daily_language_stats")
+    conn.execute(f"""
+        INSERT INTO daily_language_stats (day, language, interactions, unique_users)
+        SELECT d.day, d.language, d.interactions,
+               (SELECT COUNT(*) FROM daily_language_users u
+                WHERE u.day = d.day AND u.language = d.language)
+        FROM (
+            SELECT substr(timestamp, 1, 10) AS day, language, COUNT(*) AS interactions
+            FROM ({ALL_INTERACTIONS_SQL})
+            GROUP BY 1, 2
+        ) d
+    """)
+
+    conn.execute("DELETE FROM stats_counters")
+    conn.execute(f"""
+        INSERT INTO stats_counters (name, value)
+        SELECT 'total_interactions', COUNT(*) FROM ({ALL_INTERACTIONS_SQL})
+        UNION ALL
+        SELECT 'unique_users', COUNT(*) FROM known_users
+        UNION ALL
+        SELECT 'language:' || language, COUNT(*) FROM ({ALL_INTERACTIONS_SQL}) GROUP BY language
+    """)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Maintain the dashboard rollup tables")
+    parser.add_argument('--db', default='health_chatbot.db', help="SQLite database path")
+    parser.add_argument('--rebuild', action='store_true', help="Recompute rollups from user_interactions")
+    args = parser.parse_args()
+
+    import migrations
+
+    conn = sqlite3.connect(args.db)
+    migrations.migrate(conn)
+    with conn:
+        if args.rebuild:
+            rebuild_rollups(conn)
+            print("✅ Rollups rebuilt")
+        total, unique, languages = read_totals(conn)
+    print(f"📊 {total} interactions, {unique} unique users, languages: {languages}")
+    conn.close()
@@ -0,0 +1,40 @@
+import re
+
+# Letters, digits and Devanagari (including its vowel signs, which \w does
+# not cover) count as word characters for boundary checks.
+_WORD_CHARS = r'\wऀ-ॿ'
+
+# Inflections a phrase may carry, so 'cough' also finds 'coughed' and
+# 'migraine' finds 'migraines' without listing every form.
+_SUFFIXES = r'(?:s|es|d|ed|ing)?'
+
+
+class SymptomMatcher:
+    """Finds every known symptom in a message with one compiled regex.
+
+    The synonym table maps a symptom to its phrases per language; the
+    knowledge base builds it from its symptom index. All phrases go into a
+    single alternation, longest first, with an optional inflection and
+    bounded so that 'hot' does not match inside 'hotel'.
+    """
+
+    def __init__(self, synonyms):
+        self.symptoms = list(synonyms)
+        self._order = {symptom: i for i, symptom in enumerate(self.symptoms)}
+        self._phrases = {}
+        for symptom, by_language in synonyms.items():
+            for phrases in by_language.values():
+                for phrase in phrases:
+                    self._phrases.setdefault(phrase.lower(), symptom)
+
+        alternation = '|'.join(
+            re.escape(phrase) for phrase in sorted(self._phrases, key=len, reverse=True)
+        )
+        self._pattern = re.compile(
+            rf'(?<![{_WORD_CHARS}])({alternation}){_SUFFIXES}(?![{_WORD_CHARS}])'
+        )
+
+    def extract(self, message):
+        """Return the symptoms mentioned in message, in synonym-table order."""
+        found = {self._phrases[m.group(1)] for m in self._pattern.finditer(message.lower())}
+        return sorted(found, key=self._order.__getitem__)
@@ -0,0 +1,34 @@
+import pytest
+
+import migrations
+from database import ConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    """A migrated database in a temporary directory."""
+    pool = ConnectionPool(str(tmp_path / 'test.db'), max_size=4)
+    with pool.connection() as conn:
+        migrations.migrate(conn)
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def chat_app(tmp_path):
+    """The app module after create_app() on a temporary database with the stub LLM."""
+    import app
+    app.create_app({
+        'DATABASE_PATH': str(tmp_path / 'app.db'),
+        'KNOWLEDGE_BASE_PATH': str(tmp_path / 'knowledge.db'),
+        'LLM_BACKEND': 'stub',
+        'USER_MESSAGE_BURST': '1000',
+        'RETENTION_DAYS': '',
+    })
+    yield app
+    app.shutdown()
+
+
+@pytest.fixture
+def client(chat_app):
+    return chat_app.app.test_client()
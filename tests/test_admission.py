@@ -0,0 +1,71 @@
+import pytest
+
+import app
+from admission import ADMITTED, LIMITED, SHED, AdmissionController
+
+
+@pytest.mark.parametrize('body', ['[1, 2]', '"fever"', '42', 'not json'])
+def test_chat_rejects_bodies_that_are_not_objects(client, body):
+    response = client.post('/api/chat', data=body, content_type='application/json')
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_chat_rejects_a_non_string_message(client):
+    response = client.post('/api/chat', json={'message': ['fever'], 'user_id': 'u'})
+    assert response.status_code == 400
+
+
+def test_user_over_their_rate_gets_429(client, monkeypatch):
+    monkeypatch.setattr(app, 'admission', AdmissionController(rate=1 / 60, burst=1))
+    assert client.post('/api/chat', json={'message': 'fever', 'user_id': 'u'}).status_code == 200
+    limited = client.post('/api/chat', json={'message': 'fever', 'user_id': 'u', 'language': 'hi'})
+    assert limited.status_code == 429
+    assert limited.get_json()['error'] == LIMITED
+    assert int(limited.headers['Retry-After']) > 0
+    # Other users have their own bucket
+    assert client.post('/api/chat', json={'message': 'fever', 'user_id': 'v'}).status_code == 200
+
+
+def test_requests_over_the_concurrency_limit_are_shed(client, monkeypatch):
+    monkeypatch.setattr(app, 'admission', AdmissionController(max_concurrency=1))
+    assert app.admission.acquire('busy') != SHED
+    shed = client.post('/api/chat', json={'message': 'fever', 'user_id': 'u'})
+    assert shed.status_code == 503
+    assert shed.get_json()['error'] == SHED
+    app.admission.release()
+    assert client.post('/api/chat', json={'message': 'fever', 'user_id': 'u'}).status_code == 200
+
+
+def test_unhashable_key_does_not_leak_a_slot():
+    controller = AdmissionController(max_concurrency=1)
+    with pytest.raises(TypeError):
+        controller.acquire(['x'])
+    assert controller.acquire('u') == ADMITTED
+
+
+def test_non_string_user_id_is_rejected_before_admission(client, monkeypatch):
+    monkeypatch.setattr(app, 'admission', AdmissionController(max_concurrency=2))
+    for _ in range(3):
+        reply = client.post('/api/chat', json={'message': 'fever', 'user_id': ['x']})
+        assert reply.status_code == 400 and 'user_id' in reply.get_json()['error']
+    assert client.post('/api/chat', json={'message': 'fever', 'user_id': 'u'}).status_code == 200
+
+
+def test_batch_is_charged_one_token_per_message(client, monkeypatch):
+    monkeypatch.setattr(app, 'admission', AdmissionController(rate=1 / 60, burst=5))
+    batch = {'user_id': 'clinic', 'messages': [{'message': 'fever'}] * 8}
+    # A full bucket admits a batch larger than the burst, and is left in debt
+    assert client.post('/api/chat/batch', json=batch).status_code == 200
+    limited = client.post('/api/chat/batch', json={'user_id': 'clinic', 'messages': [{'message': 'fever'}]})
+    assert limited.status_code == 429 and limited.get_json()['error'] == LIMITED
+    assert client.post('/api/chat', json={'message': 'fever', 'user_id': 'clinic'}).status_code == 429
+    assert app.admission.stats() == {'admitted': 1, 'limited': 2, 'shed': 0}
+
+
+def test_batch_is_shed_at_the_concurrency_limit(client, monkeypatch):
+    monkeypatch.setattr(app, 'admission', AdmissionController(max_concurrency=1))
+    app.admission.acquire('busy')
+    assert client.post('/api/chat/batch', json=[{'message': 'fever'}]).status_code == 503
+    app.admission.release()
+    assert client.post('/api/chat/batch', json=[{'message': 'fever'}]).status_code == 200
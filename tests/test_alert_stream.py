@@ -0,0 +1,87 @@
+import queue
+
+import pytest
+
+import alert_stream
+from alert_stream import SharedAlertBroadcaster, stream_capacity
+
+
+def insert_alert(pool, location='Lat: 12.9700, Lng: 77.5900'):
+    return pool.execute("""
+        INSERT INTO government_alerts (alert_type, location, symptoms_count, severity, status)
+        VALUES ('OUTBREAK_DETECTED', ?, 3, 'MEDIUM', 'NEW')
+    """, (location,)).lastrowid
+
+
+def to_dict(row):
+    return {'id': row[0], 'location': row[2]}
+
+
+def drain(subscriber):
+    alerts = []
+    while True:
+        try:
+            alerts.append(subscriber.get_nowait())
+        except queue.Empty:
+            return alerts
+
+
+@pytest.mark.parametrize('threads, requested, expected', [
+    (8, None, 4), (2, None, 1), (2, 100, 1), (1, None, 0), (8, 3, 3),
+])
+def test_streams_always_leave_request_threads_free(threads, requested, expected):
+    assert stream_capacity(threads, requested) == expected
+
+
+def test_every_worker_publishes_alerts_created_by_any_worker(pool):
+    insert_alert(pool, 'before')
+    first, second = SharedAlertBroadcaster(pool, to_dict), SharedAlertBroadcaster(pool, to_dict)
+    subscribers = first.subscribe(), second.subscribe()
+
+    alert_id = insert_alert(pool)
+    assert first.sync() == 1 and second.sync() == 1
+    for subscriber in subscribers:
+        assert drain(subscriber) == [{'id': alert_id, 'location': 'Lat: 12.9700, Lng: 77.5900'}]
+
+    # Nothing new committed: no query, nothing published twice
+    assert first.sync() == 0
+    assert drain(subscribers[0]) == []
+
+
+def test_sync_catches_up_over_several_batches(pool, monkeypatch):
+    monkeypatch.setattr(alert_stream, 'SYNC_BATCH', 2)
+    broadcaster = SharedAlertBroadcaster(pool, to_dict, queue_size=10)
+    subscriber = broadcaster.subscribe()
+    ids = [insert_alert(pool) for _ in range(5)]
+    assert [broadcaster.sync() for _ in range(4)] == [2, 2, 1, 0]
+    assert [alert['id'] for alert in drain(subscriber)] == ids
+
+
+def test_poller_delivers_without_an_explicit_sync(pool):
+    broadcaster = SharedAlertBroadcaster(pool, to_dict, poll_interval=0.05)
+    subscriber = broadcaster.subscribe()
+    broadcaster.start()
+    try:
+        alert_id = insert_alert(pool)
+        assert subscriber.get(timeout=2)['id'] == alert_id
+    finally:
+        broadcaster.stop()
+
+
+def test_stream_limit_follows_the_request_threads(client):
+    import app
+    assert app.alert_broadcaster.max_subscribers == 4
+    held = [app.alert_broadcaster.subscribe() for _ in range(4)]
+    assert client.get('/api/alerts/stream').status_code == 503
+    for subscriber in held:
+        app.alert_broadcaster.unsubscribe(subscriber)
+
+
+def test_chat_alert_reaches_this_workers_subscribers_at_once(client):
+    import app
+    subscriber = app.alert_broadcaster.subscribe()
+    for user in ('a', 'b', 'c'):
+        client.post('/api/chat', json={'message': 'I have fever', 'user_id': user, 'lat': 12.97, 'lng': 77.59})
+    alert = subscriber.get_nowait()
+    assert alert['alert_type'] == 'OUTBREAK_DETECTED' and alert['symptoms_count'] == 3
+    app.alert_broadcaster.unsubscribe(subscriber)
@@ -0,0 +1,105 @@
+import time
+
+from alerts import ESCALATED, NEW, RESOLVED, SUPERSEDED, AlertManager
+
+
+def detection(case_count, severity='MEDIUM', location='12.97_77.59'):
+    return {'location': location, 'lat': 12.97, 'lng': 77.59, 'case_count': case_count, 'severity': severity}
+
+
+def rows(pool):
+    return pool.fetchall("SELECT id, severity, status FROM government_alerts ORDER BY id")
+
+
+def test_repeat_detections_update_one_row(pool):
+    manager = AlertManager(pool, update_interval=0)
+    now = time.time()
+    assert manager.handle(detection(3), now=now) == (1, 'created')
+    assert manager.handle(detection(4), now=now + 1) == (1, 'updated')
+    assert manager.handle(detection(4), now=now + 2) == (1, 'unchanged')
+    assert rows(pool) == [(1, 'MEDIUM', NEW)]
+    assert pool.fetchone("SELECT symptoms_count FROM government_alerts")[0] == 4
+
+
+def test_escalation_supersedes_the_lower_severity_row(pool):
+    manager = AlertManager(pool)
+    now = time.time()
+    manager.handle(detection(3), now=now)
+    assert manager.handle(detection(5, 'HIGH'), now=now + 1) == (2, 'escalated')
+    assert rows(pool) == [(1, 'MEDIUM', SUPERSEDED), (2, 'HIGH', ESCALATED)]
+
+
+def test_sweep_resolves_quiet_cells_without_new_detections(pool):
+    manager = AlertManager(pool, resolve_after=60)
+    now = time.time()
+    manager.handle(detection(3), now=now)
+    manager.sweep(now + 30)
+    assert rows(pool)[0][2] == NEW
+    manager.sweep(now + 61)
+    assert rows(pool)[0][2] == RESOLVED
+
+
+def test_sweep_resolves_alerts_this_process_never_saw(pool):
+    AlertManager(pool).handle(detection(3))
+    AlertManager(pool, resolve_after=3600).sweep(time.time() + 7200)
+    assert rows(pool)[0][2] == RESOLVED
+
+
+def test_sweep_leaves_cells_another_worker_still_reports(pool):
+    first, second = AlertManager(pool, update_interval=0), AlertManager(pool, update_interval=0)
+    now = time.time()
+    first.handle(detection(3), now=now)
+    for hour in range(1, 7):
+        second.handle(detection(3 + hour), now=now + hour * 3600)
+
+    first.sweep(now + 6 * 3600 + 1)
+    assert rows(pool) == [(1, 'MEDIUM', NEW)]
+    assert pool.fetchone("SELECT symptoms_count FROM government_alerts")[0] == 9
+    assert first._states['12.97_77.59'].status == NEW
+
+
+def test_worker_reopens_a_row_another_worker_resolved(pool):
+    first, second = AlertManager(pool, update_interval=0), AlertManager(pool, update_interval=0)
+    now = time.time()
+    first.handle(detection(3), now=now)
+    second.handle(detection(4), now=now + 60)
+    AlertManager(pool, resolve_after=3600).sweep(now + 7200)
+    assert rows(pool)[0][2] == RESOLVED
+
+    assert second.handle(detection(10), now=now + 7260) == (1, 'reopened')
+    assert rows(pool) == [(1, 'MEDIUM', NEW)]
+    assert pool.fetchone("SELECT symptoms_count FROM government_alerts")[0] == 10
+
+
+def test_worker_follows_an_escalation_made_elsewhere(pool):
+    first, second = AlertManager(pool, update_interval=0), AlertManager(pool, update_interval=0)
+    now = time.time()
+    first.handle(detection(3), now=now)
+    second.handle(detection(3), now=now + 1)
+    first.handle(detection(5, 'HIGH'), now=now + 2)
+
+    assert second.handle(detection(4), now=now + 3) == (2, 'updated')
+    assert rows(pool) == [(1, 'MEDIUM', SUPERSEDED), (2, 'HIGH', ESCALATED)]
+
+
+def test_flare_up_within_cooldown_reopens(pool):
+    manager = AlertManager(pool, resolve_after=60, cooldown=600)
+    now = time.time()
+    manager.handle(detection(3), now=now)
+    manager.sweep(now + 61)
+    assert manager.handle(detection(3), now=now + 120) == (1, 'reopened')
+    assert rows(pool) == [(1, 'MEDIUM', NEW)]
+
+
+def test_neighbouring_cells_share_an_alert(pool):
+    manager = AlertManager(pool)
+    manager.handle(detection(3, location='a'), cell_keys=['a', 'b'])
+    alert_id, action = manager.handle(detection(3, location='b'), cell_keys=['b', 'a'])
+    assert (alert_id, action) == (1, 'unchanged')
+
+
+def test_stats_count_an_escalated_outbreak_once(client, chat_app):
+    now = time.time()
+    chat_app.alert_manager.handle(detection(3), now=now)
+    chat_app.alert_manager.handle(detection(5, 'HIGH'), now=now + 1)
+    assert client.get('/api/stats').json['today_alerts'] == 1
@@ -0,0 +1,61 @@
+def test_batch_reports_bad_items_and_processes_the_rest(client, chat_app):
+    reply = client.post('/api/chat/batch', json={'messages': [
+        {'message': 'fever', 'user_id': 'a', 'lat': 12.97, 'lng': 77.59},
+        {'message': 'fever', 'user_id': 'b', 'lat': '12.9x', 'lng': 77.59},
+        {'message': ''},
+        'not an object',
+        {'message': 'cough and fever', 'user_id': 'c', 'lat': '12.971', 'lng': '77.591'},
+    ]})
+    assert reply.status_code == 200
+    body = reply.json
+    assert (body['processed'], body['failed']) == (2, 3)
+    results = body['results']
+    assert 'error' in results[1] and 'Coordinates' in results[1]['error']
+    assert 'error' in results[2] and 'error' in results[3]
+    assert results[4]['symptoms_detected'] == ['fever', 'cough']
+
+    assert chat_app.db.fetchone("SELECT COUNT(*) FROM outbreak_events")[0] == 2
+    assert chat_app.db.fetchall("SELECT user_phone, location_lat FROM user_interactions ORDER BY id") == [
+        ('a', 12.97), ('c', 12.971)]
+
+
+def test_batch_rejects_an_empty_or_oversized_body(client, chat_app):
+    assert client.post('/api/chat/batch', json={'messages': []}).status_code == 400
+    too_many = [{'message': 'fever'}] * (chat_app.BATCH_MAX_MESSAGES + 1)
+    assert client.post('/api/chat/batch', json=too_many).status_code == 413
+
+
+def test_located_cases_in_one_batch_raise_one_alert(client, chat_app):
+    messages = [{'message': 'fever', 'user_id': f'u{i}', 'lat': 12.97, 'lng': 77.59} for i in range(5)]
+    results = client.post('/api/chat/batch', json=messages).json['results']
+    # Counted after the whole batch is added, so every case sees all five
+    assert all(r['alert_generated'] and r['alert_details']['case_count'] == 5 for r in results)
+    assert len({r['alert_details']['alert_id'] for r in results}) == 1
+    assert chat_app.db.fetchone("SELECT COUNT(*) FROM government_alerts")[0] == 1
+
+
+def test_batch_reports_a_non_scalar_user_id_per_item(client, chat_app):
+    reply = client.post('/api/chat/batch', json=[
+        {'message': 'fever', 'user_id': 'u1', 'lat': 12.97, 'lng': 77.59},
+        {'message': 'cough', 'user_id': {'x': 1}},
+    ])
+    assert reply.status_code == 200
+    assert 'user_id' in reply.json['results'][1]['error']
+    assert chat_app.db.fetchone("SELECT COUNT(*) FROM outbreak_events")[0] == 1
+    assert chat_app.db.fetchone("SELECT COUNT(*) FROM user_interactions")[0] == 1
+
+
+def test_failed_batch_write_records_no_outbreak_cases(client, chat_app, monkeypatch):
+    def fail(records):
+        raise RuntimeError('disk full')
+
+    monkeypatch.setattr(chat_app.interaction_writer, 'write_now', fail)
+    reply = client.post('/api/chat/batch', json=[{'message': 'fever', 'user_id': 'u1', 'lat': 12.97, 'lng': 77.59}])
+    assert reply.status_code == 500
+    assert chat_app.db.fetchone("SELECT COUNT(*) FROM outbreak_events")[0] == 0
+
+
+def test_batch_rejects_a_body_that_is_not_json(client):
+    reply = client.post('/api/chat/batch', data='fever', content_type='text/plain')
+    assert reply.status_code == 400
+    assert 'error' in reply.json
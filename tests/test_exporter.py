@@ -0,0 +1,100 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from exporter import ExportFilters, INTERACTION_COLUMNS, export
+
+INTERACTIONS = [
+    # user_phone, message, language, lat, lng, symptoms, timestamp
+    ('+911', 'fever', 'en', 12.97, 77.59, 'fever', '2024-01-01 00:00:00'),
+    ('+912', 'flu', 'hi', 12.98, 77.60, 'flu,cough', '2024-01-15 12:00:00'),
+    ('+913', 'influenza', 'en', 12.99, 77.61, 'influenza', '2024-01-31 23:59:59'),
+    ('+914', 'far away', 'en', 28.61, 77.20, 'fever', '2024-01-20 08:00:00'),
+    ('+915', 'too late', 'en', 12.97, 77.59, 'fever', '2024-02-01 00:00:00'),
+]
+
+
+@pytest.fixture
+def db_path(pool):
+    pool.execute("DELETE FROM user_interactions")
+    with pool.transaction() as conn:
+        conn.executemany("""
+            INSERT INTO user_interactions
+            (user_phone, message, response, language, location_lat, location_lng, symptoms, timestamp)
+            VALUES (?, ?, 'reply', ?, ?, ?, ?, ?)
+        """, INTERACTIONS)
+        conn.execute("""
+            INSERT INTO government_alerts (alert_type, location, symptoms_count, severity, status, timestamp)
+            VALUES ('OUTBREAK_DETECTED', 'Lat: 12.9700, Lng: 77.5900', 3, 'MEDIUM', 'NEW', '2024-01-10 00:00:00')
+        """)
+    return pool.path
+
+
+def ndjson(db_path, kind='interactions', **filters):
+    data = b''.join(export(db_path, kind, ExportFilters(**filters)))
+    return [json.loads(line) for line in data.decode('utf-8').splitlines()]
+
+
+def test_date_range_is_half_open(db_path):
+    rows = ndjson(db_path, start='2024-01-01', end='2024-02-01')
+    assert [row['message'] for row in rows] == ['fever', 'flu', 'influenza', 'far away']
+
+
+def test_bbox_symptom_and_language_filters(db_path):
+    assert [r['message'] for r in ndjson(db_path, bbox='12.9,77.5,13.0,77.7')] == [
+        'fever', 'flu', 'influenza', 'too late']
+    # Padded match: 'flu' does not match 'influenza'
+    assert [r['message'] for r in ndjson(db_path, symptom='Flu')] == ['flu']
+    assert [r['message'] for r in ndjson(db_path, language='hi')] == ['flu']
+
+
+def test_interactions_leave_out_user_phone(db_path):
+    rows = ndjson(db_path)
+    assert set(rows[0]) == set(INTERACTION_COLUMNS)
+    assert not any('+91' in json.dumps(row) for row in rows)
+
+
+def test_archived_interactions_are_exported_from_summaries(db_path, pool):
+    pool.execute("""
+        INSERT INTO interaction_summaries (id, timestamp, language, symptoms, location_lat, location_lng)
+        VALUES (100, '2023-12-31 10:00:00', 'en', 'fever', 12.97, 77.59)
+    """)
+    rows = ndjson(db_path, end='2024-01-02', symptom='fever')
+    assert [(row['id'], row['message']) for row in rows] == [(1, 'fever'), (100, None)]
+
+
+def test_csv_gzip_round_trip(db_path):
+    data = gzip.decompress(b''.join(export(db_path, 'interactions', ExportFilters(language='en'), 'csv', True)))
+    rows = list(csv.DictReader(io.StringIO(data.decode('utf-8'))))
+    assert [row['message'] for row in rows] == ['fever', 'influenza', 'far away', 'too late']
+    assert list(rows[0]) == list(INTERACTION_COLUMNS)
+
+
+def test_alerts_filter_on_their_location_text(db_path):
+    assert len(ndjson(db_path, 'alerts', bbox='12.9,77.5,13.0,77.7')) == 1
+    assert ndjson(db_path, 'alerts', bbox='28,77,29,78') == []
+
+
+@pytest.mark.parametrize('kind, filters', [
+    ('interactions', {'start': 'yesterday'}),
+    ('interactions', {'bbox': '13,77,12,78'}),
+    ('interactions', {'bbox': '1,2,3'}),
+    ('alerts', {'symptom': 'fever'}),
+    ('nothing', {}),
+])
+def test_bad_filters_raise_before_streaming(db_path, kind, filters):
+    with pytest.raises(ValueError):
+        export(db_path, kind, ExportFilters(**filters))
+
+
+def test_export_endpoint(client, chat_app):
+    client.post('/api/chat', json={'message': 'I have fever', 'user_id': 'u'})
+    chat_app.interaction_writer.flush()
+    reply = client.get('/api/export/interactions?format=csv&symptom=fever')
+    assert reply.status_code == 200 and reply.mimetype == 'text/csv'
+    assert 'I have fever' in reply.get_data(as_text=True)
+    assert client.get('/api/export/interactions?bbox=nope').status_code == 400
+    assert client.get('/api/export/alerts?format=xml').status_code == 400
@@ -0,0 +1,37 @@
+from idempotency import CLAIMED, DUPLICATE, IN_FLIGHT, WebhookReceipts
+
+NOW = 1_700_000_000.0
+
+
+def test_retry_of_a_finished_sid_replays_the_reply(pool):
+    receipts = WebhookReceipts(pool)
+    assert receipts.begin('SM1', NOW) == (CLAIMED, None)
+    receipts.complete('SM1', '<Response/>')
+    assert receipts.begin('SM1', NOW + 1) == (DUPLICATE, '<Response/>')
+    # Another worker, or this one after a restart, finds it in the table
+    assert WebhookReceipts(pool).begin('SM1', NOW + 2) == (DUPLICATE, '<Response/>')
+    assert receipts.duplicates == 1
+
+
+def test_waiting_on_an_in_flight_sid_only_reads(pool, monkeypatch):
+    WebhookReceipts(pool).begin('SM1', NOW)
+    other = WebhookReceipts(pool, wait_timeout=0.2)
+    transactions = []
+    transaction = pool.transaction
+    monkeypatch.setattr(pool, 'transaction', lambda: transactions.append(1) or transaction())
+
+    assert other.begin('SM1', NOW + 1) == (IN_FLIGHT, None)
+    assert transactions == []
+    assert other.in_flight_timeouts == 1
+
+
+def test_abandoned_claim_is_taken_over(pool):
+    WebhookReceipts(pool).begin('SM1', NOW)
+    assert WebhookReceipts(pool, stale_after=60).begin('SM1', NOW + 61) == (CLAIMED, None)
+
+
+def test_released_claim_is_processed_again(pool):
+    receipts = WebhookReceipts(pool)
+    receipts.begin('SM1', NOW)
+    receipts.release('SM1')
+    assert WebhookReceipts(pool).begin('SM1', NOW + 1) == (CLAIMED, None)
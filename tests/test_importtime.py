@@ -0,0 +1,23 @@
+from benchmarks import importtime
+
+
+def test_parse_importtime():
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   json.decoder\n"
+        "import time:       300 |       4200 | app\n"
+    )
+    assert importtime.parse_importtime(stderr) == {'json.decoder': (120, 120), 'app': (300, 4200)}
+
+
+def test_check_reports_every_broken_rule():
+    modules = {'app': (1, 500_000), 'twilio.rest': (1, 1), 'flask': (1, 1)}
+    failures = importtime.check(500.0, modules, True, 400)
+    assert len(failures) == 3
+    assert importtime.check(100.0, {'app': (1, 100_000)}, False, 400) == []
+
+
+def test_import_app_is_within_budget_and_side_effect_free():
+    # IMPORT_BUDGET_MS raises the budget on slow CI machines
+    best_ms, modules, db_created = importtime.measure(repeat=3)
+    assert importtime.check(best_ms, modules, db_created, importtime.budget_ms()) == []
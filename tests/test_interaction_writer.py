@@ -0,0 +1,49 @@
+from interaction_writer import InteractionWriter
+
+
+def count_rows(pool):
+    return pool.fetchone("SELECT COUNT(*) FROM user_interactions")[0]
+
+
+def test_submitted_records_are_written_in_batches(pool):
+    batches = []
+    writer = InteractionWriter(pool, batch_size=3, flush_interval=0.05,
+                               on_batch=lambda conn, batch: batches.append(len(batch))).start()
+    for i in range(7):
+        writer.submit(f'user{i}', 'fever', 'reply', 'en', symptoms=['fever'])
+    writer.close()
+
+    assert count_rows(pool) == 7
+    assert writer.written == 7 and writer.failed == 0
+    assert max(batches) <= 3 and sum(batches) == 7
+
+
+def test_bad_record_only_drops_itself(pool):
+    writer = InteractionWriter(pool)
+    good = [writer.make_record(f'user{i}', 'fever', 'reply', 'en') for i in range(3)]
+    bad = good[0][:-1]  # one binding short
+
+    writer._write([good[0], bad, good[1], good[2]])
+
+    assert count_rows(pool) == 3
+    assert writer.written == 3 and writer.failed == 1
+
+
+def test_on_batch_failure_rolls_back_that_record(pool):
+    def on_batch(conn, batch):
+        if any(record[0] == 'poison' for record in batch):
+            raise ValueError('rollup failed')
+
+    writer = InteractionWriter(pool, on_batch=on_batch)
+    writer._write([writer.make_record(user, 'hi', 'reply', 'en') for user in ('a', 'poison', 'b')])
+
+    assert [row[0] for row in pool.fetchall("SELECT user_phone FROM user_interactions ORDER BY id")] == ['a', 'b']
+    assert writer.failed == 1
+
+
+def test_flush_waits_for_queued_records(pool):
+    writer = InteractionWriter(pool, batch_size=100, flush_interval=0.2).start()
+    writer.submit('user', 'cough', 'reply', 'en')
+    writer.flush()
+    assert count_rows(pool) == 1
+    writer.close()
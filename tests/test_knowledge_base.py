@@ -0,0 +1,135 @@
+import json
+import os
+
+import pytest
+
+import build_kb
+from knowledge_base import SOURCE_DIR, KnowledgeBase, open_knowledge_base
+
+LABELS = {'symptoms': 'Symptoms', 'treatment': 'Treatment', 'important': 'Important',
+          'escalation': 'See a doctor', 'no_match': 'Sorry'}
+
+
+def english(**extra_topics):
+    topics = {
+        'fever': {'heading': 'About Fever', 'synonyms': ['fever', 'temperature'],
+                  'symptoms': 'Hot', 'treatment': 'Rest'},
+        'cough': {'heading': 'About Cough', 'synonyms': ['cough'], 'symptoms': 'Dry'},
+    }
+    topics.update(extra_topics)
+    return {'language': 'en', 'labels': dict(LABELS), 'topics': topics}
+
+
+def hindi():
+    # Only fever, and only one label of its own
+    return {'language': 'hi', 'labels': {'symptoms': 'लक्षण'},
+            'topics': {'fever': {'heading': 'बुखार', 'synonyms': ['बुखार'], 'symptoms': 'गर्म'}}}
+
+
+def write_sources(directory, *documents):
+    directory.mkdir(exist_ok=True)
+    for i, document in enumerate(documents):
+        (directory / f"{i}-{document['language']}.json").write_text(
+            json.dumps(document, ensure_ascii=False), encoding='utf-8')
+    return str(directory)
+
+
+@pytest.fixture
+def kb_path(tmp_path):
+    path = str(tmp_path / 'knowledge.db')
+    build_kb.build([write_sources(tmp_path / 'v1', english(), hindi())], path)
+    return path
+
+
+def test_duplicate_synonym_across_topics_is_rejected():
+    doc = english(flu={'heading': 'Flu', 'synonyms': ['Temperature '], 'symptoms': 'Aches'})
+    with pytest.raises(ValueError, match="'temperature' is used by both"):
+        build_kb.compile_sources([('en.json', doc)])
+
+
+def test_topic_missing_from_the_fallback_language_is_rejected():
+    doc = hindi()
+    doc['topics']['rash'] = {'heading': 'दाने', 'symptoms': 'लाल'}
+    with pytest.raises(ValueError, match="Topics missing from 'en': rash"):
+        build_kb.compile_sources([('en.json', english()), ('hi.json', doc)])
+
+
+def test_label_missing_from_the_fallback_language_is_rejected():
+    doc = english()
+    del doc['labels']['treatment']
+    with pytest.raises(ValueError, match="No label 'treatment'"):
+        build_kb.compile_sources([('en.json', doc)])
+
+
+def test_sources_without_the_fallback_language_are_rejected():
+    with pytest.raises(ValueError, match="fallback language 'en'"):
+        build_kb.compile_sources([('hi.json', hindi())])
+
+
+def test_missing_labels_are_taken_from_the_fallback_language():
+    compiled = build_kb.compile_sources([('en.json', english()), ('hi.json', hindi())])
+    assert compiled['labels']['hi']['symptoms'] == 'लक्षण'
+    assert compiled['labels']['hi']['important'] == 'Important'
+
+
+def test_same_content_builds_the_same_version(tmp_path):
+    source = write_sources(tmp_path / 'src', english(), hindi())
+    assert build_kb.build([source], str(tmp_path / 'a.db')) == build_kb.build([source], str(tmp_path / 'b.db'))
+
+
+def test_languages_load_lazily(kb_path):
+    kb = KnowledgeBase(kb_path)
+    assert kb.extract('I have a temperature and a cough') == ['fever', 'cough']
+    assert kb.loaded_languages() == []
+    heading, sections, labels = kb.entry('fever', 'hi')
+    assert heading == 'बुखार' and sections == [('symptoms', 'गर्म')]
+    assert kb.loaded_languages() == ['hi']
+    kb.close()
+
+
+def test_unknown_languages_and_missing_topics_fall_back(kb_path):
+    kb = KnowledgeBase(kb_path, preload=('en',))
+    assert kb.loaded_languages() == ['en']
+    assert kb.entry('fever', 'ta')[0] == 'About Fever'
+    # Hindi has no cough entry, so it is answered in English
+    assert kb.entry('cough', 'hi')[0] == 'About Cough'
+    assert kb.label('hi', 'escalation') == 'See a doctor'
+    assert kb.entry('rash', 'en') is None
+    kb.close()
+
+
+def test_rebuilt_file_is_picked_up(kb_path, tmp_path):
+    versions = []
+    kb = KnowledgeBase(kb_path, on_reload=versions.append)
+    old_version = kb.version
+    assert kb.maybe_reload() is False
+
+    doc = english(rash={'heading': 'About Rash', 'synonyms': ['rash'], 'symptoms': 'Red'})
+    build_kb.build([write_sources(tmp_path / 'v2', doc, hindi())], kb_path)
+    assert kb.maybe_reload() is True
+    assert kb.version != old_version and versions == [kb.version]
+    assert kb.extract('a rash') == ['rash']
+    assert kb.reloads == 1
+    kb.close()
+
+
+def test_broken_file_keeps_the_old_snapshot(kb_path, tmp_path):
+    kb = KnowledgeBase(kb_path)
+    version = kb.version
+    broken = tmp_path / 'broken.db'
+    broken.write_bytes(b'not a database')
+    os.replace(broken, kb_path)
+
+    assert kb.maybe_reload() is False
+    assert kb.version == version
+    assert kb.extract('fever') == ['fever']
+    # Reported once, not retried until the file changes again
+    assert kb.maybe_reload() is False
+    kb.close()
+
+
+def test_repo_sources_build_and_open(tmp_path):
+    kb = open_knowledge_base(str(tmp_path / 'knowledge.db'), SOURCE_DIR)
+    assert set(kb.languages) >= {'en', 'hi'}
+    assert kb.extract('मुझे बुखार है') == ['fever']
+    kb.close()
@@ -0,0 +1,27 @@
+import threading
+
+import app
+
+BACKGROUND_THREADS = ('alert-sweeper', 'alert-stream-sync', 'retention', 'llm')
+
+
+def background_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith(BACKGROUND_THREADS)]
+
+
+def test_shutdown_stops_every_background_thread(tmp_path):
+    for cycle in range(3):
+        app.create_app({
+            'DATABASE_PATH': str(tmp_path / 'app.db'),
+            'KNOWLEDGE_BASE_PATH': str(tmp_path / 'knowledge.db'),
+            'LLM_BACKEND': 'stub',
+            'RETENTION_DAYS': '30',
+            'ARCHIVE_DIR': str(tmp_path / 'archive'),
+        })
+        # Puts a thread in the LLM executor
+        assert app.llm.generate('hello') is not None
+        app.shutdown()
+
+    for thread in background_threads():
+        thread.join(timeout=2)
+    assert background_threads() == []
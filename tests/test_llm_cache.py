@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+from app import HealthChatbot
+from llm_cache import ResponseCache, cache_key, normalize_message
+from llm_client import GeminiClient
+
+
+class FakeModels:
+    def __init__(self, reply):
+        self.reply = reply
+        self.prompts = []
+
+    def generate_content(self, model, contents):
+        self.prompts.append(contents[0]['parts'][0]['text'])
+        return type('Response', (), {'text': self.reply})()
+
+
+class FakeGenAI:
+    """Stands in for google.genai.Client."""
+
+    def __init__(self, reply="Drink fluids and see a doctor if it continues."):
+        self.models = FakeModels(reply)
+
+
+def test_near_duplicate_messages_share_a_key():
+    assert normalize_message("  What is   DENGUE?! ") == "what is dengue"
+    assert cache_key("What is dengue?", 'en') == cache_key("what is dengue", 'en')
+    assert cache_key("what is dengue", 'en') != cache_key("what is dengue", 'hi')
+
+
+def test_fallback_calls_gemini_once_per_question(pool):
+    genai = FakeGenAI()
+    chatbot = HealthChatbot(GeminiClient(client=genai), ResponseCache(pool))
+
+    first = chatbot.gemini_fallback("What is dengue?", 'en')
+    second = chatbot.gemini_fallback("what is DENGUE", 'en')
+
+    assert first == second == genai.models.reply
+    assert len(genai.models.prompts) == 1
+    assert "what is dengue" in genai.models.prompts[0].lower()
+
+
+def test_replies_survive_a_restart_through_sqlite(pool):
+    ResponseCache(pool).put("what is dengue", 'en', "stored reply")
+
+    restarted = ResponseCache(pool)
+    assert restarted.get("What is dengue?", 'en') == "stored reply"
+    assert restarted.get("What is dengue?", 'en') == "stored reply"
+    assert (restarted.disk_hits, restarted.memory_hits) == (1, 1)
+
+
+def test_expired_entries_are_misses(pool):
+    cache = ResponseCache(pool, ttl=60)
+    cache.put("old question", 'en', "old reply")
+    pool.execute("UPDATE llm_cache SET created_at = created_at - 120")
+    assert ResponseCache(pool, ttl=60).get("old question", 'en') is None
+
+
+@pytest.mark.parametrize('max_memory', [1, 2])
+def test_memory_tier_is_bounded(pool, max_memory):
+    cache = ResponseCache(pool, max_memory=max_memory)
+    for i in range(5):
+        cache.put(f"question {i}", 'en', f"reply {i}")
+    assert cache.stats()['memory_entries'] == max_memory
+
+
+def test_evict_keeps_the_most_recently_used_rows(pool):
+    cache = ResponseCache(pool, max_rows=2)
+    for i in range(3):
+        cache.put(f"question {i}", 'en', f"reply {i}")
+        pool.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (time.time() + i, cache_key(f"question {i}", 'en')))
+    cache.evict()
+    assert pool.fetchone("SELECT COUNT(*) FROM llm_cache")[0] == 2
+    assert ResponseCache(pool).get("question 0", 'en') is None
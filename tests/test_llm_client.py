@@ -0,0 +1,66 @@
+import threading
+import time
+
+from llm_client import CircuitBreaker, GuardedLLM, StubClient
+
+
+def test_slow_upstream_is_cut_off_at_the_deadline():
+    llm = GuardedLLM(StubClient(latency=1.0), timeout=0.1)
+    started = time.monotonic()
+    assert llm.generate("hello") is None
+    assert time.monotonic() - started < 0.5
+    assert llm.stats['timeouts'] == 1
+    llm.shutdown()
+
+
+def test_failing_upstream_returns_none():
+    llm = GuardedLLM(StubClient(failure_rate=1.0), timeout=1)
+    assert llm.generate("hello") is None
+    assert llm.stats['failures'] == 1
+    llm.shutdown()
+
+
+def test_calls_beyond_the_concurrency_cap_are_rejected():
+    llm = GuardedLLM(StubClient(latency=0.3), timeout=1, max_concurrency=1)
+    results = []
+    thread = threading.Thread(target=lambda: results.append(llm.generate("first")))
+    thread.start()
+    time.sleep(0.05)
+    assert llm.generate("second") is None
+    thread.join()
+    assert results == [StubClient().reply]
+    assert llm.stats['rejected_busy'] == 1
+    llm.shutdown()
+
+
+def test_breaker_opens_on_failures_and_recovers_after_a_good_trial():
+    stub = StubClient(failure_rate=1.0)
+    breaker = CircuitBreaker(min_calls=3, reset_timeout=0.1)
+    llm = GuardedLLM(stub, timeout=1, breaker=breaker)
+
+    for _ in range(3):
+        llm.generate("hello")
+    assert breaker.state == CircuitBreaker.OPEN
+    assert llm.generate("hello") is None
+    assert stub.calls == 3 and llm.stats['rejected_open'] == 1
+
+    time.sleep(0.15)
+    stub.failure_rate = 0.0
+    assert llm.generate("hello") == stub.reply
+    assert breaker.state == CircuitBreaker.CLOSED
+    llm.shutdown()
+
+
+def test_breaker_opens_on_slow_calls():
+    breaker = CircuitBreaker(min_calls=2, slow_threshold=1.0)
+    breaker.record(True, 2.0)
+    breaker.record(True, 2.0)
+    assert not breaker.allow()
+
+
+def test_chat_falls_back_to_the_llm_once_per_question(client, chat_app):
+    stub = chat_app.llm.client
+    for _ in range(2):
+        reply = client.post('/api/chat', json={'message': 'what is dengue', 'user_id': 'u'})
+        assert reply.json['response'] == stub.reply
+    assert stub.calls == 1
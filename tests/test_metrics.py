@@ -0,0 +1,98 @@
+import os
+import subprocess
+import sys
+
+import metrics
+from metrics import Histogram, Registry
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def samples(text):
+    """{'name{labels}': value} for every sample line of a /metrics body."""
+    return {line.rsplit(' ', 1)[0]: line.rsplit(' ', 1)[1]
+            for line in text.splitlines() if line and not line.startswith('#')}
+
+
+def run_python(code, tmp_path, **env):
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True,
+                            env=dict(os.environ, DATABASE_PATH=str(tmp_path / 'metrics.db'), **env))
+    return result.stdout
+
+
+def test_histogram_buckets_are_cumulative_with_inf():
+    registry = Registry()
+    histogram = registry.histogram('latency_seconds', 'Latency', stage='parse')
+    for value in (0.0003, 0.002, 0.002, 30.0):
+        histogram.observe(value)
+    text = registry.render()
+    assert '# TYPE latency_seconds histogram' in text
+    values = samples(text)
+    assert values['latency_seconds_bucket{stage="parse",le="0.0005"}'] == '1'
+    assert values['latency_seconds_bucket{stage="parse",le="0.0025"}'] == '3'
+    assert values['latency_seconds_bucket{stage="parse",le="10.0"}'] == '3'
+    assert values['latency_seconds_bucket{stage="parse",le="+Inf"}'] == '4'
+    assert values['latency_seconds_count{stage="parse"}'] == '4'
+    assert float(values['latency_seconds_sum{stage="parse"}']) == 30.0043
+
+
+def test_observation_on_a_bucket_bound_falls_in_that_bucket():
+    histogram = Histogram(buckets=(1.0, 2.0))
+    histogram.observe(1.0)
+    assert histogram.snapshot()[0] == [1, 0, 0]
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    registry.gauge('odd_labels', 'Odd', lambda: {(('path', 'a"b\\c\nd'),): 1})
+    assert 'odd_labels{path="a\\"b\\\\c\\nd"} 1' in registry.render()
+
+
+def test_gauges_counters_and_failing_callbacks():
+    registry = Registry()
+    registry.gauge('queue_depth', 'Depth', lambda: 3)
+    registry.gauge('requests_total', 'Requests', lambda: {(('outcome', 'ok'),): 5}, kind='counter')
+    registry.gauge('broken', 'Not built yet', lambda: 1 / 0)
+    text = registry.render()
+    assert '# TYPE queue_depth gauge' in text and 'queue_depth 3' in text
+    assert '# TYPE requests_total counter' in text and 'requests_total{outcome="ok"} 5' in text
+    assert 'broken' not in text
+
+
+def test_disabled_metrics_leave_functions_untouched(monkeypatch):
+    monkeypatch.setattr(metrics, 'ENABLED', False)
+
+    def handler():
+        return 'ok'
+
+    assert metrics.timed('handler')(handler) is handler
+    assert metrics.stage('one') is metrics.stage('two') is metrics._NOOP
+    with metrics.stage('one'):
+        pass
+    metrics.observe('unused_seconds', 1.0)
+    assert 'unused_seconds' not in metrics.render()
+
+
+def test_metrics_enabled_0_switches_off_the_app_hooks(tmp_path):
+    out = run_python(
+        "import metrics, app; print(metrics.ENABLED, hasattr(app.HealthChatbot.extract_symptoms, '__wrapped__'))",
+        tmp_path, METRICS_ENABLED='0')
+    assert out.split() == ['False', 'False']
+
+
+def test_render_before_create_app_skips_unbuilt_services(tmp_path):
+    out = run_python("import app, metrics; print(metrics.render())", tmp_path)
+    assert 'chatbot_stage_seconds_bucket{stage="extract_symptoms",le="+Inf"} 0' in out
+    assert 'page_cache_hits_total 0' in out
+    assert 'interaction_writer_queue_depth' not in out
+    assert not (tmp_path / 'metrics.db').exists()
+
+
+def test_metrics_endpoint_after_create_app(client, chat_app):
+    client.post('/api/chat', json={'message': 'I have fever', 'user_id': 'u'})
+    reply = client.get('/metrics')
+    assert reply.status_code == 200 and reply.mimetype == 'text/plain'
+    values = samples(reply.get_data(as_text=True))
+    assert int(values['chatbot_stage_seconds_count{stage="extract_symptoms"}']) >= 1
+    assert 'interaction_writer_queue_depth' in values
+    assert values['admission_decisions_total{decision="admitted"}'] != '0'
@@ -0,0 +1,53 @@
+import sqlite3
+from datetime import date
+
+import migrations
+from database import utc_day_range
+
+
+def test_migrate_is_idempotent(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'fresh.db')
+    assert migrations.migrate(conn) == migrations.LATEST_VERSION
+    assert migrations.migrate(conn) == migrations.LATEST_VERSION
+    conn.close()
+
+
+def test_adopts_a_database_from_before_migrations(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'legacy.db')
+    conn.execute("""CREATE TABLE user_interactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, user_phone TEXT, message TEXT, response TEXT, language TEXT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, location_lat REAL, location_lng REAL, symptoms TEXT)""")
+    conn.execute("""CREATE TABLE government_alerts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, alert_type TEXT, location TEXT, symptoms_count INTEGER,
+        severity TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, status TEXT DEFAULT 'ACTIVE')""")
+    conn.execute("INSERT INTO user_interactions (user_phone, message, language) VALUES ('a', 'fever', 'en')")
+    conn.commit()
+
+    assert migrations.migrate(conn) == migrations.LATEST_VERSION
+    assert conn.execute("SELECT COUNT(*) FROM user_interactions").fetchone()[0] == 1
+    assert migrations.check_query_plans(conn) == []
+    conn.close()
+
+
+def test_hot_queries_use_their_indexes(pool):
+    with pool.connection() as conn:
+        assert migrations.check_query_plans(conn) == []
+
+
+def test_query_plan_check_catches_a_missing_index(pool):
+    with pool.connection() as conn:
+        conn.execute("DROP INDEX idx_user_interactions_timestamp")
+        failed = [sql for sql, _ in migrations.check_query_plans(conn)]
+    assert "SELECT * FROM user_interactions ORDER BY timestamp DESC LIMIT 20" in failed
+
+
+def test_reset_drops_every_app_table(pool):
+    with pool.connection() as conn:
+        migrations.reset(conn)
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert not tables & set(migrations.APP_TABLES)
+        assert migrations.migrate(conn) == migrations.LATEST_VERSION
+
+
+def test_utc_day_range_is_half_open():
+    assert utc_day_range(date(2026, 2, 28)) == ('2026-02-28 00:00:00', '2026-03-01 00:00:00')
@@ -0,0 +1,85 @@
+import math
+
+import pytest
+
+from outbreak import OutbreakTracker, SharedOutbreakTracker, coordinates
+
+NOW = 1_700_000_000.0
+
+
+@pytest.mark.parametrize('lat, lng', [
+    ('12.9x', 77.5), (None, 77.5), (float('nan'), 77.5), (math.inf, 0), (91, 0), (0, -181),
+])
+def test_coordinates_rejects_bad_values(lat, lng):
+    with pytest.raises(ValueError):
+        coordinates(lat, lng)
+
+
+def test_coordinates_accepts_numeric_strings():
+    assert coordinates('12.97', '77.59') == (12.97, 77.59)
+
+
+def test_neighbourhood_counts_cases_across_cell_boundaries():
+    tracker = OutbreakTracker()
+    tracker.record(12.9999, 77.5, ['fever'], 'a', NOW)
+    tracker.record(13.0001, 77.5, ['fever'], 'b', NOW)
+    key, count, symptoms = tracker.record(13.0001, 77.5001, ['cough'], 'c', NOW)
+    assert count == 3
+    assert symptoms == {'fever': 2, 'cough': 1}
+    assert key == tracker.cell_key(13.0001, 77.5001)
+
+
+def test_cases_leave_the_window():
+    tracker = OutbreakTracker(window_seconds=60)
+    tracker.record(12.97, 77.59, ['fever'], 'a', NOW)
+    assert tracker.neighbourhood_count(12.97, 77.59, NOW + 30) == 1
+    assert tracker.neighbourhood_count(12.97, 77.59, NOW + 61) == 0
+
+
+def test_busy_cells_stay_bounded_on_every_level():
+    tracker = OutbreakTracker(window_seconds=60)
+    for i in range(10_000):
+        tracker.record(12.97 + (i % 7) * 0.001, 77.59, ['fever'], f'u{i}', NOW + i)
+    for level in tracker.levels:
+        assert sum(len(cell) for cell in level.cells.values()) <= 61
+
+
+def test_radius_and_region_queries():
+    tracker = OutbreakTracker()
+    tracker.record_many([(12.97, 77.59, ['fever'], 'a'), (12.98, 77.60, ['cough'], 'b'),
+                         (28.61, 77.20, ['fever'], 'c')], NOW)
+    assert tracker.cases_within(12.97, 77.59, 5, NOW)[0] == 2
+    assert tracker.cases_in_region(12.0, 77.0, 13.5, 78.0, NOW) == (2, {'fever': 1, 'cough': 1})
+
+
+def test_shared_trackers_see_each_others_cases(pool):
+    first, second = SharedOutbreakTracker(pool), SharedOutbreakTracker(pool)
+    first.record(12.97, 77.59, ['fever'], 'a', NOW)
+    _, count, _ = second.record(12.97, 77.59, ['fever'], 'b', NOW)
+    assert count == 2
+    assert first.neighbourhood_count(12.97, 77.59, NOW) == 2
+
+
+def test_shared_tracker_rejects_bad_coordinates_before_storing(pool):
+    tracker = SharedOutbreakTracker(pool)
+    with pytest.raises(ValueError):
+        tracker.record('12.9x', 77.59, ['fever'], 'a', NOW)
+    with pytest.raises(ValueError):
+        tracker.record_many([(12.97, 77.59, ['fever'], 'a'), (12.97, 'east', ['fever'], 'b')], NOW)
+    assert pool.fetchone("SELECT COUNT(*) FROM outbreak_events")[0] == 0
+
+
+def test_malformed_stored_event_is_skipped(pool):
+    pool.execute("INSERT INTO outbreak_events (timestamp, lat, lng, symptoms, user_phone) "
+                 "VALUES (?, '12.9x', 77.59, 'fever', 'old')", (NOW,))
+    tracker = SharedOutbreakTracker(pool)
+    tracker.load(NOW)
+    _, count, _ = tracker.record(12.97, 77.59, ['fever'], 'a', NOW)
+    assert count == 1
+
+
+def test_chat_rejects_malformed_location(client):
+    bad = client.post('/api/chat', json={'message': 'fever', 'user_id': 'u', 'lat': '12.9x', 'lng': 77.5})
+    assert bad.status_code == 400
+    good = client.post('/api/chat', json={'message': 'fever', 'user_id': 'u', 'lat': 12.97, 'lng': 77.59})
+    assert good.status_code == 200
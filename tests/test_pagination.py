@@ -0,0 +1,25 @@
+import app
+
+
+def test_only_304s_count_as_cache_hits(client):
+    client.post('/api/chat', json={'message': 'fever', 'user_id': 'u'})
+    app.interaction_writer.flush()
+    first = client.get('/api/interactions?limit=10')
+    assert first.status_code == 200
+    hits = app.page_cache.hits
+
+    # Same version, but no validator: the page is queried and served again
+    assert client.get('/api/interactions?limit=10').status_code == 200
+    assert app.page_cache.hits == hits
+
+    again = client.get('/api/interactions?limit=10', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+    assert app.page_cache.hits == hits + 1
+
+
+def test_interactions_leave_out_user_phone(client):
+    client.post('/api/chat', json={'message': 'fever', 'user_id': '+919800000000'})
+    app.interaction_writer.flush()
+    items = client.get('/api/interactions?limit=10').get_json()
+    assert items and all('user_phone' not in item for item in items)
+    assert '+919800000000' not in client.get('/api/interactions?limit=10').get_data(as_text=True)
@@ -0,0 +1,56 @@
+import gzip
+import json
+import os
+import time
+
+import retention
+from database import acquire_lease, release_lease
+
+
+def add_interaction(pool, user, timestamp):
+    pool.execute("INSERT INTO user_interactions (user_phone, message, language, timestamp) VALUES (?, 'fever', 'en', ?)",
+                 (user, timestamp))
+
+
+def archived_ids(archive_dir):
+    ids = []
+    for name in sorted(os.listdir(archive_dir)):
+        with gzip.open(os.path.join(archive_dir, name), 'rt', encoding='utf-8') as f:
+            ids.extend(json.loads(line)['id'] for line in f)
+    return ids
+
+
+def test_old_rows_move_to_the_archive_and_leave_summaries(pool, tmp_path):
+    add_interaction(pool, 'old', '2020-01-01 10:00:00')
+    add_interaction(pool, 'older', '2019-12-31 10:00:00')
+    add_interaction(pool, 'new', time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()))
+
+    archive_dir = str(tmp_path / 'archive')
+    assert retention.run_retention(pool, 30, archive_dir, batch_size=1, pause=0) == 2
+
+    assert sorted(archived_ids(archive_dir)) == [1, 2]
+    assert sorted(os.listdir(archive_dir)) == ['interactions-2019-12-31.ndjson.gz', 'interactions-2020-01-01.ndjson.gz']
+    assert pool.fetchall("SELECT user_phone FROM user_interactions") == [('new',)]
+    assert pool.fetchone("SELECT COUNT(*) FROM interaction_summaries")[0] == 2
+    assert pool.fetchone("SELECT COUNT(*) FROM leases")[0] == 0
+
+
+def test_skips_while_another_process_holds_the_lease(pool, tmp_path):
+    add_interaction(pool, 'old', '2020-01-01 10:00:00')
+    assert acquire_lease(pool, retention.LEASE_NAME, 60, owner='other-host:1')
+
+    archive_dir = str(tmp_path / 'archive')
+    assert retention.run_retention(pool, 30, archive_dir, pause=0) == 0
+    assert os.listdir(archive_dir) == []
+
+    release_lease(pool, retention.LEASE_NAME, owner='other-host:1')
+    assert retention.run_retention(pool, 30, archive_dir, pause=0) == 1
+
+
+def test_expired_lease_can_be_taken_over(pool):
+    assert acquire_lease(pool, 'job', 0.2, owner='a')
+    assert not acquire_lease(pool, 'job', 60, owner='b')
+    time.sleep(0.25)
+    assert acquire_lease(pool, 'job', 60, owner='b')
+    assert not acquire_lease(pool, 'job', 60, owner='a')
+    assert acquire_lease(pool, 'job', 60, owner='b')  # renewal
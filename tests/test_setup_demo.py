@@ -0,0 +1,16 @@
+import sqlite3
+
+import setup_demo
+from migrations import check_query_plans
+
+
+def test_generated_dataset_keeps_hot_queries_on_their_indexes(tmp_path):
+    path = str(tmp_path / 'demo.db')
+    setup_demo.generate_dataset(path, rows=200, days=1, regions=4, outbreaks=2)
+    conn = sqlite3.connect(path)
+    try:
+        assert check_query_plans(conn) == []
+        phones = [row[0] for row in conn.execute("SELECT DISTINCT user_phone FROM user_interactions")]
+        assert phones and not any(phone.startswith('whatsapp:') for phone in phones)
+    finally:
+        conn.close()
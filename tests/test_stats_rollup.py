@@ -0,0 +1,49 @@
+import stats_rollup
+from interaction_writer import InteractionWriter
+
+
+def totals(pool):
+    with pool.connection() as conn:
+        return stats_rollup.read_totals(conn)
+
+
+def test_rollups_follow_written_batches(pool):
+    writer = InteractionWriter(pool, on_batch=lambda conn, batch: stats_rollup.apply_rollups(
+        conn, [(row[0], row[3], row[7]) for row in batch]))
+    writer.write_now([writer.make_record(user, 'fever', 'reply', language)
+                      for user, language in (('a', 'en'), ('a', 'en'), ('b', 'hi'))])
+    assert totals(pool) == (3, 2, {'en': 2, 'hi': 1})
+
+
+def test_missing_language_does_not_drop_the_batch(pool):
+    writer = InteractionWriter(pool, on_batch=lambda conn, batch: stats_rollup.apply_rollups(
+        conn, [(row[0], row[3], row[7]) for row in batch]))
+    writer._write([writer.make_record(user, 'fever', 'reply', language)
+                   for user, language in (('a', 'en'), ('b', None), ('c', 'hi'))])
+    assert writer.failed == 0
+    assert totals(pool) == (3, 3, {'en': 2, 'hi': 1})
+
+
+def test_rebuild_matches_incremental_rollups(pool):
+    writer = InteractionWriter(pool, on_batch=lambda conn, batch: stats_rollup.apply_rollups(
+        conn, [(row[0], row[3], row[7]) for row in batch]))
+    writer.write_now([writer.make_record(user, 'fever', 'reply', 'en') for user in ('a', 'b', 'a')])
+    # Rows written before the rollups existed may have no language at all
+    pool.execute("INSERT INTO user_interactions (user_phone, message, language, timestamp) "
+                 "VALUES ('legacy', 'hi', NULL, ?)", (writer.make_record('', '', '', 'en')[7],))
+    with pool.connection() as conn:
+        stats_rollup.apply_rollups(conn, [('legacy', None, writer.make_record('', '', '', 'en')[7])])
+    incremental = totals(pool)
+
+    with pool.transaction() as conn:
+        stats_rollup.rebuild_rollups(conn)
+    assert totals(pool) == incremental == (4, 3, {'en': 4})
+
+
+def test_chat_with_null_language_is_counted(client, chat_app):
+    assert client.post('/api/chat', json={'message': 'fever', 'user_id': 'a', 'language': None}).status_code == 200
+    client.post('/api/chat', json={'message': 'cough', 'user_id': 'b'})
+    chat_app.interaction_writer.flush()
+    stats = client.get('/api/stats').json
+    assert stats['total_interactions'] == 2
+    assert stats['language_distribution'] == {'en': 2}
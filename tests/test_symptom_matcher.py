@@ -0,0 +1,35 @@
+import json
+import os
+
+import pytest
+
+from knowledge_base import SOURCE_DIR
+from symptom_matcher import SymptomMatcher
+
+
+@pytest.fixture(scope='module')
+def matcher():
+    synonyms = {}
+    for language in ('en', 'hi'):
+        with open(os.path.join(SOURCE_DIR, f'{language}.json'), encoding='utf-8') as f:
+            for topic, entry in json.load(f)['topics'].items():
+                synonyms.setdefault(topic, {})[language] = entry['synonyms']
+    return SymptomMatcher(synonyms)
+
+
+@pytest.mark.parametrize('message, expected', [
+    ("I coughed all night", ['cough']),
+    ("my migraines are back", ['headache']),
+    ("the kids were immunized last year", ['vaccination']),
+    ("high temperatures and sore throats", ['fever', 'cough']),
+    ("burning up, coughing, head pain", ['fever', 'cough', 'headache']),
+    ("मुझे बुखार और सिर दर्द है", ['fever', 'headache']),
+    ("गले में खाँसी", ['cough']),
+])
+def test_extracts_symptoms(matcher, message, expected):
+    assert matcher.extract(message) == expected
+
+
+@pytest.mark.parametrize('message', ["booked a hotel", "photos of the shots", "throttle", "headachey"])
+def test_ignores_phrases_inside_other_words(matcher, message):
+    assert matcher.extract(message) == []